@@ -17,10 +17,11 @@ from src.models.schemas import (
     DIDConfig,
     CloudinaryConfig
 )
-from src.modules import validator, cartesia, did
+from src.modules import validator, cartesia, did, avatar
+from src.pipeline import render_parts_sync
 from src.utils.logger import get_logger, setup_logger
 from src.utils.config import load_config
-from src.utils.errors import ValidationError
+from src.utils.errors import ValidationError, AudioTooLongError, ConfigError
 from src.utils.script_optimizer import optimize_for_cartesia, compare_versions
 
 # ロガー設定
@@ -74,6 +75,20 @@ def initialize_session_state():
     if "video_url" not in st.session_state:
         st.session_state.video_url = None
 
+    if "video_path" not in st.session_state:
+        st.session_state.video_path = None
+
+    if "avatar_id" not in st.session_state:
+        st.session_state.avatar_id = None
+
+    # 最後にライブラリへ追加したアップロード（再実行のたびに選択を上書きしないため）
+    if "avatar_upload_id" not in st.session_state:
+        st.session_state.avatar_upload_id = None
+
+    # ライブラリが使えない場合に直接指定する画像URL
+    if "avatar_url" not in st.session_state:
+        st.session_state.avatar_url = None
+
 
 def render_input_screen():
     """入力画面"""
@@ -136,6 +151,8 @@ def render_input_screen():
 
     st.info("💡 動画の長さはスクリプトの文字数で自動的に決まります（最大5分）")
 
+    render_avatar_selector()
+
     st.markdown("---")
 
     # 動画生成開始ボタン
@@ -163,6 +180,59 @@ def render_input_screen():
         st.rerun()
 
 
+def render_avatar_selector():
+    """アバター画像の選択・追加"""
+    st.subheader("🧑 アバター画像")
+
+    try:
+        library = avatar.AvatarLibrary()
+    except ConfigError as e:
+        # ライブラリが無効（cache.avatars）なら画像URLを直接指定
+        logger.warning(f"アバター画像ライブラリを使用しません: {e}")
+        st.session_state.avatar_id = None
+        st.session_state.avatar_url = st.text_input(
+            "アバター画像URL",
+            value=st.session_state.avatar_url or config.get(
+                "avatar.default_url",
+                "https://d-id-public-bucket.s3.amazonaws.com/alice.jpg"
+            ),
+            help="D-IDが取得できる公開URL（JPEG/PNG）"
+        )
+        return
+
+    uploaded = st.file_uploader(
+        "画像を追加",
+        type=["jpg", "jpeg", "png", "webp"],
+        help="顔が中央に写った画像を選んでください（1回だけ縮小・保存され、以降は再利用されます）"
+    )
+    # アップロード欄にファイルが残っている間も再実行されるため、新しいファイルの時だけ追加・選択する
+    if uploaded is not None and uploaded.file_id != st.session_state.avatar_upload_id:
+        added, err = library.add(uploaded.getvalue(), name=Path(uploaded.name).stem)
+        if err:
+            st.error(f"⚠️ 画像を追加できません: {err}")
+        else:
+            st.session_state.avatar_upload_id = uploaded.file_id
+            st.session_state.avatar_id = added.avatar_id
+
+    avatars = library.list()
+    if not avatars:
+        st.caption("画像がない場合はサンプル画像を使用します")
+        return
+
+    ids = [item.avatar_id for item in avatars]
+    if st.session_state.avatar_id not in ids:
+        st.session_state.avatar_id = ids[0]
+
+    selected_id = st.selectbox(
+        "使用する画像",
+        options=ids,
+        index=ids.index(st.session_state.avatar_id),
+        format_func=lambda avatar_id: library.get(avatar_id).name
+    )
+    st.session_state.avatar_id = selected_id
+    st.image(library.get(selected_id).image_path, width=160)
+
+
 def render_generating_screen():
     """生成中画面"""
     st.header("⏳ 動画生成中...")
@@ -203,13 +273,47 @@ def render_generating_screen():
             api_secret=cloudinary_secret
         )
 
-        audio, err = cartesia.generate_audio_sync(
-            text=script,
-            api_key=cartesia_api_key,
-            voice_id=cartesia_voice_id,
-            cloudinary_config=cloudinary_config,
-            speed=voice_speed
-        )
+        max_duration = config.get("script.max_duration_seconds", 290)
+
+        if config.get("did.split.enabled", False):
+            # 分割モード: 上限で中止せずに生成し、上限以下の部分に分ける
+            audio_parts, err = cartesia.generate_audio_parts_sync(
+                text=script,
+                api_key=cartesia_api_key,
+                voice_id=cartesia_voice_id,
+                cloudinary_config=cloudinary_config,
+                speed=voice_speed,
+                max_part_seconds=max_duration,
+                did_api_key=did_api_key
+            )
+        else:
+            audio, err = cartesia.generate_audio_sync(
+                text=script,
+                api_key=cartesia_api_key,
+                voice_id=cartesia_voice_id,
+                cloudinary_config=cloudinary_config,
+                speed=voice_speed,
+                did_api_key=did_api_key
+            )
+            audio_parts = [audio] if audio else None
+
+        if isinstance(err, AudioTooLongError):
+            # 上限を超えた音声はアップロードしていない
+            st.error(f"""
+            ### ⚠️ 音声が長すぎます
+
+            **音声時間**: {err.duration_seconds:.1f}秒（音声が上限を超えました）
+            **制限**: {err.limit_seconds}秒（D-ID API制限）
+
+            **対処方法**:
+            スクリプトを2つに分けて、それぞれ別の動画として生成してください。
+            （config.yaml の did.split.enabled を有効にすると自動で分割します）
+
+            例:
+            - 前半: {len(script)//2}文字
+            - 後半: {len(script)//2}文字
+            """)
+            return
 
         if err:
             st.error(f"""
@@ -224,21 +328,33 @@ def render_generating_screen():
             """)
             return
 
-        st.session_state.audio_url = str(audio.audio_url)
+        audio = audio_parts[0]
+        # 分割した場合、音声のプレビューは生成画面でのみ表示（連結した動画に含まれる）。
+        # D-IDに直接アップロードした音声（s3://）はブラウザで再生できないため表示しない
+        playable = [part for part in audio_parts if part.audio_url.scheme in ("http", "https")]
+        st.session_state.audio_url = (
+            str(audio.audio_url) if len(audio_parts) == 1 and playable else None
+        )
         progress_bar.progress(50)
 
         st.success("✅ 音声生成完了")
 
         # 音声プレビュー
-        st.audio(str(audio.audio_url))
+        for part in playable:
+            st.audio(str(part.audio_url))
 
         # 音声時間チェック（D-ID制限）
-        max_duration = config.get("script.max_duration_seconds", 290)
-        actual_duration = audio.duration_seconds
+        actual_duration = sum(part.duration_seconds for part in audio_parts)
 
-        st.info(f"📊 音声時間: {actual_duration:.1f}秒 / 最大{max_duration}秒")
+        if len(audio_parts) > 1:
+            st.info(
+                f"📊 音声時間: {actual_duration:.1f}秒 / 最大{max_duration}秒"
+                f"（{len(audio_parts)}個に分割して生成します）"
+            )
+        else:
+            st.info(f"📊 音声時間: {actual_duration:.1f}秒 / 最大{max_duration}秒")
 
-        if actual_duration > max_duration:
+        if len(audio_parts) == 1 and actual_duration > max_duration:
             st.error(f"""
             ### ⚠️ 音声が長すぎます
 
@@ -259,17 +375,42 @@ def render_generating_screen():
         status_text.text("🎬 動画生成中（3-5分かかります）...")
         progress_bar.progress(60)
 
-        # アバター画像URL（仮）
-        # TODO: ユーザーがアップロードできるようにする
-        # Note: DefaultPresentersのURLは500エラーを返すため、D-IDのパブリックサンプルを使用
-        avatar_url = "https://d-id-public-bucket.s3.amazonaws.com/alice.jpg"
-
-        did_client = did.DIDClient(api_key=did_api_key)
-
-        video, err = did_client.generate(
-            audio_url=str(audio.audio_url),
-            avatar_url=avatar_url
+        # アバター画像URL（ライブラリの画像は初回のみアップロード、以降はURLを再利用）
+        # Note: DefaultPresentersのURLは500エラーを返すため、未選択時はD-IDのパブリックサンプルを使用
+        avatar_url = st.session_state.avatar_url or config.get(
+            "avatar.default_url",
+            "https://d-id-public-bucket.s3.amazonaws.com/alice.jpg"
         )
+        if st.session_state.avatar_id:
+            avatar_url, err = avatar.AvatarLibrary(cloudinary_config).get_url(
+                st.session_state.avatar_id
+            )
+            if err:
+                st.error(f"""
+                ### ⚠️ アバター画像エラー
+
+                **エラー**: {err}
+
+                別の画像を選ぶか、画像を追加し直してください。
+                """)
+                return
+
+        if len(audio_parts) > 1:
+            # 部分ごとに並列で生成し、再エンコードなしで連結
+            status_text.text(f"🎬 動画生成中（{len(audio_parts)}個を並列に生成して連結）...")
+            video, err = render_parts_sync(
+                audio_parts,
+                did.AsyncDIDClient(api_key=did_api_key),
+                avatar_url
+            )
+        else:
+            did_client = did.DIDClient(api_key=did_api_key)
+
+            video, err = did_client.generate(
+                audio_url=str(audio.audio_url),
+                avatar_url=avatar_url,
+                audio_duration=audio.duration_seconds
+            )
 
         if err:
             st.error(f"""
@@ -284,7 +425,8 @@ def render_generating_screen():
             """)
             return
 
-        st.session_state.video_url = str(video.video_url)
+        st.session_state.video_url = str(video.video_url) if video.video_url else None
+        st.session_state.video_path = video.video_path
         progress_bar.progress(100)
 
         st.success("✅ 動画生成完了！")
@@ -327,7 +469,11 @@ def render_completed_screen():
 
     with col2:
         st.subheader("🎬 動画")
-        if st.session_state.video_url:
+        # ローカルに保存済みならそちらを使う（URLの期限切れ・再ダウンロードを避ける）
+        video_path = st.session_state.video_path
+        if video_path and Path(video_path).exists():
+            st.video(video_path)
+        elif st.session_state.video_url:
             st.video(st.session_state.video_url)
 
     st.markdown("---")
@@ -336,7 +482,16 @@ def render_completed_screen():
     col1, col2 = st.columns(2)
 
     with col1:
-        if st.button("📥 動画をダウンロード", use_container_width=True):
+        if video_path and Path(video_path).exists():
+            with open(video_path, "rb") as f:
+                st.download_button(
+                    "📥 動画をダウンロード",
+                    data=f,
+                    file_name="avatar_video.mp4",
+                    mime="video/mp4",
+                    use_container_width=True
+                )
+        elif st.button("📥 動画をダウンロード", use_container_width=True):
             st.info("""
             💡 動画をダウンロードするには:
 
@@ -351,7 +506,7 @@ def render_completed_screen():
     with col2:
         if st.button("🔄 新しい動画を作成", use_container_width=True):
             # 状態リセット
-            for key in ["script", "audio_url", "video_url"]:
+            for key in ["script", "audio_url", "video_url", "video_path"]:
                 if key in st.session_state:
                     st.session_state[key] = ""
 
@@ -4,7 +4,7 @@
 Pydanticを使用した型安全なデータモデル
 """
 
-from pydantic import BaseModel, Field, HttpUrl
+from pydantic import AnyUrl, BaseModel, Field, HttpUrl
 from typing import Optional
 from enum import Enum
 
@@ -33,6 +33,50 @@ class VideoGenerationRequest(BaseModel):
     voice_speed: float = Field(1.0, ge=0.5, le=2.0, description="声の速度")
 
 
+class AudioGenerationStats(BaseModel):
+    """
+    音声生成1回分の計測結果
+
+    時間はすべて秒。first_chunk / last_chunk はリクエスト送信開始からの経過時間
+
+    Example:
+        >>> stats = AudioGenerationStats(first_chunk_seconds=0.35, chunk_count=120)
+        >>> stats.throughput_bytes_per_second
+    """
+    connect_seconds: float = Field(0.0, description="WebSocket接続（再利用時は0）")
+    send_seconds: float = Field(0.0, description="リクエスト送信")
+    first_chunk_seconds: Optional[float] = Field(None, description="最初のチャンク受信まで")
+    last_chunk_seconds: Optional[float] = Field(None, description="最後のチャンク受信まで")
+    write_seconds: float = Field(0.0, description="WAV書き込み（合計）")
+    silence_seconds: float = Field(0.0, description="無音の圧縮")
+    silence_removed_seconds: float = Field(0.0, description="無音の圧縮で短縮した音声時間")
+    loudness_seconds: float = Field(0.0, description="ラウドネス正規化")
+    encode_seconds: float = Field(0.0, description="ローカルエンコード")
+    upload_seconds: float = Field(0.0, description="アップロード")
+    total_seconds: float = Field(0.0, description="generate全体")
+    audio_bytes: int = Field(0, description="受信したPCMのバイト数")
+    chunk_count: int = Field(0, description="受信したチャンク数")
+    segment_count: int = Field(0, description="セグメント数（文分割モード）")
+    upload_bytes: int = Field(0, description="アップロードしたバイト数")
+    connection_reused: bool = Field(False, description="プールの接続を再利用したか")
+    cache_hit: bool = Field(False, description="音声キャッシュにヒットしたか")
+
+    @property
+    def streaming_seconds(self) -> Optional[float]:
+        """最初から最後のチャンクまでの時間"""
+        if self.first_chunk_seconds is None or self.last_chunk_seconds is None:
+            return None
+        return self.last_chunk_seconds - self.first_chunk_seconds
+
+    @property
+    def throughput_bytes_per_second(self) -> Optional[float]:
+        """受信スループット（バイト/秒）"""
+        streaming = self.streaming_seconds
+        if not streaming:
+            return None
+        return self.audio_bytes / streaming
+
+
 class GeneratedAudio(BaseModel):
     """
     生成された音声
@@ -43,9 +87,14 @@ class GeneratedAudio(BaseModel):
         ...     duration_seconds=45.5
         ... )
     """
-    audio_url: HttpUrl = Field(..., description="音声ファイルURL")
+    audio_url: AnyUrl = Field(..., description="音声ファイルURL（D-IDへ直接アップロードした場合は s3://）")
+    audio_host: Optional[str] = Field(None, description="アップロード先（audio_host.backend）")
+    audio_url_expires_at: Optional[float] = Field(None, description="音声URLの有効期限（UNIX時刻、Noneは無期限）")
     duration_seconds: float = Field(..., description="音声時間（秒）")
     file_size_bytes: Optional[int] = Field(None, description="ファイルサイズ（バイト）")
+    frame_count: Optional[int] = Field(None, description="フレーム数（PCM: サンプル数、MP3: フレーム数）")
+    sample_rate: Optional[int] = Field(None, description="サンプルレート（Hz）")
+    stats: Optional[AudioGenerationStats] = Field(None, description="生成時の計測結果")
 
 
 class GeneratedVideo(BaseModel):
@@ -58,9 +107,71 @@ class GeneratedVideo(BaseModel):
         ...     duration_seconds=60.0
         ... )
     """
-    video_url: HttpUrl = Field(..., description="動画ファイルURL")
+    video_url: Optional[HttpUrl] = Field(..., description="動画ファイルURL（分割して連結した動画はNone）")
     duration_seconds: float = Field(..., description="動画時間（秒）")
     resolution: Optional[str] = Field(None, description="解像度（例: 1920x1080）")
+    video_path: Optional[str] = Field(None, description="ローカルに保存した動画ファイル（保存しない・失敗時はNone）")
+    sha256: Optional[str] = Field(None, description="動画ファイルのSHA-256")
+
+
+class AvatarImage(BaseModel):
+    """
+    アバター画像（ライブラリに登録済み）
+
+    Example:
+        >>> avatar = AvatarImage(
+        ...     avatar_id="3f2a...",
+        ...     name="講師A",
+        ...     width=1024,
+        ...     height=1024
+        ... )
+    """
+    avatar_id: str = Field(..., description="画像ID（前処理後の画像のSHA-256）")
+    name: str = Field(..., description="表示名")
+    width: int = Field(..., description="幅（px）")
+    height: int = Field(..., description="高さ（px）")
+    file_size_bytes: Optional[int] = Field(None, description="ファイルサイズ（バイト）")
+    image_url: Optional[HttpUrl] = Field(None, description="公開URL（未アップロードはNone）")
+    image_path: Optional[str] = Field(None, description="ローカルの画像ファイル")
+    added_at: float = Field(0.0, description="追加日時（UNIX時間）")
+
+
+class DIDJob(BaseModel):
+    """
+    D-IDの動画生成ジョブ（バッチ実行用）
+
+    Example:
+        >>> job = DIDJob(
+        ...     audio_url="https://res.cloudinary.com/.../audio.mp3",
+        ...     avatar_url="https://example.com/avatar.jpg",
+        ...     audio_duration=45.5
+        ... )
+    """
+    audio_url: str = Field(..., description="音声ファイルURL")
+    avatar_url: str = Field(..., description="アバター画像URL")
+    audio_duration: Optional[float] = Field(None, description="音声の長さ（秒、ポーリングの予測に使用）")
+    priority: int = Field(0, description="優先度（小さいほど先に実行、同じなら投入順）")
+    job_id: Optional[str] = Field(None, description="ジョブID（省略時は投入順の連番）")
+
+
+class DIDJobResult(BaseModel):
+    """
+    D-IDの動画生成ジョブの結果
+
+    Example:
+        >>> result.video.video_url if result.succeeded else result.error
+    """
+    job_id: str = Field(..., description="ジョブID")
+    video: Optional[GeneratedVideo] = Field(None, description="生成された動画（失敗時はNone）")
+    error: Optional[str] = Field(None, description="エラー内容（成功時はNone）")
+    attempts: int = Field(0, description="リクエスト回数（レート制限による再試行を含む）")
+    queued_seconds: float = Field(0.0, description="キューで待った時間")
+    elapsed_seconds: float = Field(0.0, description="投入から完了までの時間")
+
+    @property
+    def succeeded(self) -> bool:
+        """成功したか"""
+        return self.video is not None
 
 
 class ScriptValidation(BaseModel):
@@ -0,0 +1,267 @@
+"""
+アバター画像ライブラリ
+
+機能:
+  - アップロードされた画像の前処理（向きの補正・中央で切り抜き・D-IDの処理解像度への縮小・JPEG変換）
+  - コンテンツアドレス方式で保存（同じ画像は1つだけ、同じ元画像は前処理し直さない）
+  - Cloudinaryへのアップロードは1回だけ（公開URLを保存して以降のジョブで再利用）
+
+D-IDは元画像を取得してから顔検出・前処理を行うため、
+必要以上に大きな画像は転送と前処理の時間を増やすだけになる
+"""
+
+import hashlib
+import io
+import os
+import tempfile
+import time
+from typing import List, Optional, Tuple
+
+import cloudinary
+import cloudinary.uploader
+from PIL import Image, ImageOps
+
+from ..models.schemas import AvatarImage, CloudinaryConfig
+from ..utils.errors import CloudinaryError, ConfigError, ValidationError
+from ..utils.logger import get_logger
+from ..utils.config import get_config
+from ..utils.cache import DiskCache, get_cache
+
+logger = get_logger(__name__)
+
+
+class AvatarLibrary:
+    """
+    アバター画像ライブラリ
+
+    画像は前処理後のJPEGのSHA-256（avatar_id）で保存し、
+    アップロード済みならその公開URLをメタデータに記録する
+
+    Example:
+        >>> library = AvatarLibrary(cloudinary_config)
+        >>> avatar, err = library.add(uploaded_file.getvalue(), name="講師A")
+        >>> url, err = library.get_url(avatar.avatar_id)  # 初回のみアップロード
+    """
+
+    def __init__(self, cloudinary_config: Optional[CloudinaryConfig] = None):
+        """
+        初期化
+
+        Args:
+            cloudinary_config: Cloudinary設定（アップロードする場合に必要）
+
+        Raises:
+            ConfigError: cache.avatars が無効
+        """
+        config = get_config()
+
+        # 前処理後のサイズ（この大きさを覆うように縮小し、中央で切り抜く。拡大はしない）
+        self.width = config.get("avatar.width", 1024)
+        self.height = config.get("avatar.height", 1024)
+        self.jpeg_quality = config.get("avatar.jpeg_quality", 90)
+        self.folder = config.get("avatar.folder", "ai-avatar/avatars")
+
+        # ユーザーが保存した画像のため、上限による削除（LRU）はしない（cache.avatars.max_size_mb: null）
+        self.cache = get_cache("avatars")
+        if self.cache is None:
+            raise ConfigError("アバター画像ライブラリには cache.avatars を有効にしてください")
+        if self.cache.max_bytes is not None:
+            logger.warning(
+                "cache.avatars に上限が設定されているため、保存した画像が削除される場合があります"
+                "（max_size_mb: null を推奨）"
+            )
+
+        if cloudinary_config:
+            cloudinary.config(
+                cloud_name=cloudinary_config.cloud_name,
+                api_key=cloudinary_config.api_key,
+                api_secret=cloudinary_config.api_secret
+            )
+
+    def add(
+        self,
+        data: bytes,
+        name: str = ""
+    ) -> Tuple[Optional[AvatarImage], Optional[Exception]]:
+        """
+        画像をライブラリに追加（前処理して保存。アップロードはまだ行わない）
+
+        Args:
+            data: 画像ファイルの内容（JPEG/PNG/WebPなど）
+            name: 表示名
+
+        Returns:
+            (avatar, error):
+                - 成功: (AvatarImage, None)（同じ画像が登録済みならそれを返す）
+                - 失敗: (None, Exception)
+
+        Example:
+            >>> avatar, err = library.add(open("face.png", "rb").read(), name="講師A")
+        """
+        try:
+            # 同じ元画像・同じ設定なら前処理を省略
+            source_key = DiskCache.make_key(
+                "source",
+                hashlib.sha256(data).hexdigest(),
+                self.width,
+                self.height,
+                self.jpeg_quality
+            )
+            entry = self.cache.get(source_key)
+            if entry is not None:
+                avatar = self.get(entry[0]["avatar_id"])
+                if avatar:
+                    return (avatar, None)
+
+            processed = self._preprocess(data)
+            avatar_id = hashlib.sha256(processed).hexdigest()
+
+            avatar = self.get(avatar_id)
+            if avatar is None:
+                with Image.open(io.BytesIO(processed)) as image:
+                    width, height = image.size
+
+                avatar = AvatarImage(
+                    avatar_id=avatar_id,
+                    name=name or avatar_id[:8],
+                    width=width,
+                    height=height,
+                    file_size_bytes=len(processed),
+                    added_at=time.time()
+                )
+                self._store(avatar, processed)
+
+                logger.info(
+                    f"アバター画像を追加: {avatar.name} ({width}x{height}, "
+                    f"{len(data)}バイト → {len(processed)}バイト)"
+                )
+
+            self.cache.put(source_key, {"avatar_id": avatar_id})
+            return (avatar, None)
+
+        except Image.UnidentifiedImageError:
+            return (None, ValidationError("画像ファイルとして読み込めません"))
+
+        except Exception as e:
+            logger.error(f"アバター画像の追加エラー: {e}", exc_info=True)
+            return (None, e)
+
+    def _preprocess(self, data: bytes) -> bytes:
+        """
+        向きを補正し、width x height を覆う大きさに縮小して中央で切り抜き、JPEGにする
+
+        元画像が小さい場合は拡大せず、縦横比だけ合わせる
+        """
+        with Image.open(io.BytesIO(data)) as source:
+            image = ImageOps.exif_transpose(source).convert("RGB")
+
+        crop = _fit_aspect(image.size, (self.width, self.height))
+        size = (self.width, self.height) if crop[0] > self.width else crop
+        image = ImageOps.fit(image, size, method=Image.LANCZOS)
+
+        output = io.BytesIO()
+        image.save(output, format="JPEG", quality=self.jpeg_quality, optimize=True)
+        return output.getvalue()
+
+    def _store(self, avatar: AvatarImage, processed: Optional[bytes] = None) -> None:
+        """メタデータ（と前処理後の画像）を保存"""
+        meta = avatar.model_dump(mode="json", exclude={"image_path"})
+
+        if processed is None:
+            # メタデータのみ更新（本体はその場に残す）
+            self.cache.put(avatar.avatar_id, meta, data_path=avatar.image_path, move=True)
+            return
+
+        fd, tmp_path = tempfile.mkstemp(suffix=".jpg")
+        try:
+            with os.fdopen(fd, 'wb') as f:
+                f.write(processed)
+            self.cache.put(avatar.avatar_id, meta, data_path=tmp_path)
+        finally:
+            if os.path.exists(tmp_path):
+                os.unlink(tmp_path)
+
+    def get(self, avatar_id: str) -> Optional[AvatarImage]:
+        """
+        登録済みの画像を取得
+
+        Args:
+            avatar_id: 画像ID
+
+        Returns:
+            AvatarImage（なければNone）
+        """
+        entry = self.cache.get(avatar_id)
+        if entry is None or entry[1] is None:
+            return None
+        return AvatarImage(**entry[0], image_path=entry[1])
+
+    def list(self) -> List[AvatarImage]:
+        """
+        登録済みの画像の一覧（追加の新しい順）
+
+        Returns:
+            AvatarImage のリスト
+        """
+        avatars = []
+        for key in self.cache.keys():
+            avatar = self.get(key)
+            if avatar is not None and avatar.avatar_id == key:
+                avatars.append(avatar)
+        return sorted(avatars, key=lambda avatar: avatar.added_at, reverse=True)
+
+    def get_url(self, avatar_id: str) -> Tuple[Optional[str], Optional[Exception]]:
+        """
+        画像の公開URLを取得（未アップロードの場合のみアップロード）
+
+        Args:
+            avatar_id: 画像ID
+
+        Returns:
+            (url, error): 公開URLまたはエラー
+        """
+        avatar = self.get(avatar_id)
+        if avatar is None:
+            return (None, ValidationError(f"アバター画像が見つかりません: {avatar_id}"))
+
+        if avatar.image_url:
+            logger.info(f"アバター画像のURLを再利用: {avatar.image_url}")
+            return (str(avatar.image_url), None)
+
+        try:
+            logger.info(f"アバター画像をアップロード: {avatar.name}")
+
+            # 同じ画像は同じ public_id（再アップロードしても重複しない）
+            result = cloudinary.uploader.upload(
+                avatar.image_path,
+                resource_type="image",
+                folder=self.folder,
+                public_id=avatar_id,
+                overwrite=False
+            )
+
+            url = result.get("secure_url")
+            if not url:
+                return (None, CloudinaryError("URLが取得できませんでした"))
+
+        except cloudinary.exceptions.Error as e:
+            logger.error(f"Cloudinaryエラー: {e}")
+            return (None, CloudinaryError(f"アップロード失敗: {e}"))
+
+        except Exception as e:
+            logger.error(f"予期しないエラー: {e}")
+            return (None, e)
+
+        avatar = AvatarImage(**{**avatar.model_dump(), "image_url": url})
+        self._store(avatar)
+
+        logger.info(f"Cloudinaryアップロード成功: {url}")
+        return (url, None)
+
+
+def _fit_aspect(size: Tuple[int, int], aspect: Tuple[int, int]) -> Tuple[int, int]:
+    """size に収まる最大の、aspect と同じ縦横比の大きさ"""
+    width, height = size
+    if width * aspect[1] > height * aspect[0]:
+        return (max(1, round(height * aspect[0] / aspect[1])), height)
+    return (width, max(1, round(width * aspect[1] / aspect[0])))
@@ -2,42 +2,339 @@
 Cartesia API - 音声生成
 
 機能:
-  - WebSocket接続管理
+  - WebSocket接続管理（接続プールで再利用）
   - 音声生成（声クローン使用）
-  - Cloudinaryアップロード
+  - 文分割モード（1接続で複数context_idを並列生成）
+  - ローカルエンコード（MP3/AAC）→ アップロード（audio_host.backend: Cloudinary / D-ID / S3）
+  - 音声キャッシュ（同一スクリプトの再生成を省略）
+  - 差分生成（変更・追加された文だけを生成し、文ごとの音声を連結）
+  - 無音の圧縮（前後の無音・長すぎる間）
+  - ラウドネス正規化
+  - 長いスクリプトの分割生成（上限時間以下に間の位置で切り、部分ごとにアップロード）
+  - 計測（接続・初回チャンク・スループット・アップロードの各時間）
   - エラーハンドリング
 
 参考: resources/Cartesia実装ガイド.md
 """
 
 import asyncio
+import functools
+import logging
 import websockets
 import json
-import base64
 import tempfile
 import os
-import wave
+import socket
 import struct
-from typing import Tuple, Optional
+import threading
+import time
+import unicodedata
+import uuid
+from contextlib import asynccontextmanager
+from typing import Tuple, Optional, List, Dict, AsyncIterator, Callable
 from pathlib import Path
 
-import cloudinary
-import cloudinary.uploader
-from mutagen import File as MutagenFile
 
-from ..models.schemas import GeneratedAudio, CartesiaConfig, CloudinaryConfig
-from ..utils.errors import AudioGenerationError, CloudinaryError, TimeoutError
+from ..models.schemas import (
+    AudioGenerationStats,
+    GeneratedAudio,
+    CartesiaConfig,
+    CloudinaryConfig
+)
+from ..utils.errors import (
+    AudioGenerationError,
+    AudioTooLongError,
+    ConfigError,
+    TimeoutError
+)
 from ..utils.logger import get_logger
 from ..utils.config import get_config
+from ..utils.audio import (
+    PCMWavSink, PCM_ENCODINGS, can_encode, compact_silence, encode_audio_async,
+    normalize_loudness, splice_wav_files, split_wav
+)
+from ..utils.cache import DiskCache, get_cache
+from ..utils.script_optimizer import segment_script, split_sentences
+from ..utils.event_loop import run_sync
+from ..utils.audio_host import AudioHost, create_audio_host, url_expired
+from ..utils.codec import loads_json, decode_base64
+from ..utils.metrics import observe, SIZE_BUCKETS, COUNT_BUCKETS
 
 logger = get_logger(__name__)
 
 
+class _StaleConnectionError(Exception):
+    """プールから取り出した接続が既に切断されていた（再接続して再試行可能）"""
+    pass
+
+
+def _is_open(websocket) -> bool:
+    """
+    WebSocket接続が開いているか判定
+
+    websocketsのレガシー実装（.open）と新実装（.state）の両方に対応
+    """
+    is_open = getattr(websocket, "open", None)
+    if isinstance(is_open, bool):
+        return is_open
+
+    state = getattr(websocket, "state", None)
+    return getattr(state, "name", None) == "OPEN"
+
+
+def _abort(websocket) -> None:
+    """
+    イベントループを使わずに接続を切断
+
+    ループが止まっている・閉じている場合は close() を実行できないため、
+    ソケットをシャットダウンしてトランスポートを破棄する
+    """
+    transport = getattr(websocket, "transport", None)
+    if transport is None:
+        return
+
+    sock = transport.get_extra_info("socket")
+    try:
+        if sock is not None:
+            sock.shutdown(socket.SHUT_RDWR)
+    except OSError:
+        pass
+
+    try:
+        transport.abort()
+    except RuntimeError:
+        # ループが閉じている（ソケットはシャットダウン済み）
+        pass
+
+
+class _PooledConnection:
+    """プールから貸し出した接続（送受信は元の接続に委譲）"""
+
+    def __init__(self, websocket, reused: bool, connect_seconds: float = 0.0):
+        self.websocket = websocket
+        self.reused = reused
+        self.connect_seconds = connect_seconds
+
+    async def send(self, message) -> None:
+        await self.websocket.send(message)
+
+    async def recv(self):
+        return await self.websocket.recv()
+
+
+def _normalize_text(text: str) -> str:
+    """
+    キャッシュキー用にテキストを正規化
+
+    Unicode正規化（NFC）・改行コードの統一・行末と前後の空白除去
+    """
+    text = unicodedata.normalize("NFC", text).replace("\r\n", "\n")
+    return "\n".join(line.rstrip() for line in text.split("\n")).strip()
+
+
+class CartesiaConnectionPool:
+    """
+    Cartesia WebSocket接続プール
+
+    認証済みのWebSocket接続を保持し、generate呼び出し間で再利用する
+    （接続ごとのDNS・TCP・TLS・アップグレードを省略）
+
+    - 同時に貸し出す接続数は max_size まで（超過分は空きを待つ）
+    - キープアライブは websockets の ping で維持
+    - アイドル時間超過・切断済みの接続は破棄して再接続
+
+    Example:
+        >>> pool = CartesiaConnectionPool(uri, max_size=4)
+        >>> async with pool.connection() as websocket:
+        ...     await websocket.send(message)
+        >>> await pool.close()
+    """
+
+    def __init__(
+        self,
+        uri: str,
+        max_size: int = 4,
+        idle_timeout: float = 240.0,
+        ping_interval: float = 20.0,
+        ping_timeout: float = 20.0
+    ):
+        """
+        初期化
+
+        Args:
+            uri: WebSocket URL（認証パラメータ込み）
+            max_size: 最大接続数
+            idle_timeout: アイドル接続を破棄するまでの秒数
+            ping_interval: キープアライブpingの間隔（秒）
+            ping_timeout: pingの応答待ち時間（秒）
+        """
+        self.uri = uri
+        self.max_size = max_size
+        self.idle_timeout = idle_timeout
+        self.ping_interval = ping_interval
+        self.ping_timeout = ping_timeout
+
+        # (接続, 返却時刻) のリスト（末尾が最新）
+        self._idle: List[Tuple[object, float]] = []
+        self._semaphore: Optional[asyncio.Semaphore] = None
+        self._loop: Optional[asyncio.AbstractEventLoop] = None
+        self.last_connect_seconds = 0.0
+
+    def _bind_loop(self) -> asyncio.Semaphore:
+        """
+        実行中のイベントループにプールを紐付け
+
+        接続はイベントループに属するため、ループが変わった場合は
+        保持している接続を閉じて作り直す（元のループが動いていればそのループで
+        close() し、止まっていればソケットを直接切断する）
+        """
+        loop = asyncio.get_running_loop()
+
+        if self._loop is not loop:
+            idle, self._idle = self._idle, []
+            if idle:
+                logger.debug("イベントループが変わったためアイドル接続を破棄")
+
+            old_loop = self._loop
+            for websocket, _ in idle:
+                if old_loop is not None and old_loop.is_running() and not old_loop.is_closed():
+                    asyncio.run_coroutine_threadsafe(self._discard(websocket), old_loop)
+                else:
+                    _abort(websocket)
+
+            self._semaphore = asyncio.Semaphore(self.max_size)
+            self._loop = loop
+
+        return self._semaphore
+
+    async def _connect(self):
+        """新しい接続を確立"""
+        logger.debug("Cartesia WebSocket接続を新規作成")
+        return await websockets.connect(
+            self.uri,
+            ping_interval=self.ping_interval,
+            ping_timeout=self.ping_timeout
+        )
+
+    async def _checkout(self, fresh: bool = False) -> Tuple[object, bool]:
+        """
+        アイドル接続を取り出す（なければ新規接続）
+
+        Args:
+            fresh: アイドル接続を使わず、必ず新規接続する
+
+        Returns:
+            (websocket, reused): 接続と、再利用かどうか
+        """
+        now = time.monotonic()
+
+        while self._idle and not fresh:
+            websocket, released_at = self._idle.pop()
+
+            if now - released_at > self.idle_timeout or not _is_open(websocket):
+                await self._discard(websocket)
+                continue
+
+            return (websocket, True)
+
+        started = time.perf_counter()
+        websocket = await self._connect()
+        self.last_connect_seconds = time.perf_counter() - started
+        return (websocket, False)
+
+    def _checkin(self, websocket) -> None:
+        """接続をプールに返却"""
+        if _is_open(websocket) and len(self._idle) < self.max_size:
+            self._idle.append((websocket, time.monotonic()))
+        else:
+            asyncio.ensure_future(self._discard(websocket))
+
+    async def _discard(self, websocket) -> None:
+        """接続を閉じて破棄"""
+        try:
+            await websocket.close()
+        except Exception as e:
+            logger.debug(f"接続クローズ時のエラーを無視: {e}")
+
+    @asynccontextmanager
+    async def connection(self, fresh: bool = False) -> AsyncIterator[object]:
+        """
+        接続を借りる
+
+        ブロック内で例外が発生した場合、接続は状態が不明なため破棄する
+        （未受信のメッセージが残った接続を次の呼び出しに渡さない）
+
+        Args:
+            fresh: アイドル接続を使わず、必ず新規接続する（切断されていた接続の再試行用）
+
+        Yields:
+            WebSocket接続（属性 reused: プールから再利用した接続か、
+            connect_seconds: 新規接続にかかった秒数）
+        """
+        semaphore = self._bind_loop()
+        await semaphore.acquire()
+
+        websocket = None
+        try:
+            websocket, reused = await self._checkout(fresh)
+            yield _PooledConnection(
+                websocket,
+                reused,
+                0.0 if reused else self.last_connect_seconds
+            )
+        except BaseException:
+            if websocket is not None:
+                await self._discard(websocket)
+                websocket = None
+            raise
+        finally:
+            if websocket is not None:
+                self._checkin(websocket)
+            semaphore.release()
+
+    async def close(self) -> None:
+        """保持しているアイドル接続をすべて閉じる"""
+        idle, self._idle = self._idle, []
+        for websocket, _ in idle:
+            await self._discard(websocket)
+
+
+class _OrderedWriter:
+    """
+    セグメントのchunkをスクリプト順に書き込む
+
+    先頭の未完了セグメントのchunkは直接書き込み、後続セグメントのchunkは
+    順番が来るまでだけ保持する（保持量は同時生成数の範囲に収まる）
+    """
+
+    def __init__(self, write: Callable[[bytes], None]):
+        self._write = write
+        self._head = 0
+        self._pending: Dict[int, bytearray] = {}
+        self._finished = set()
+
+    def chunk(self, index: int, data: bytes) -> None:
+        if index == self._head:
+            self._write(data)
+        elif index in self._pending:
+            self._pending[index] += data
+        else:
+            self._pending[index] = bytearray(data)
+
+    def done(self, index: int) -> None:
+        # 完了した先頭セグメントを進め、次のセグメントの保留分を書き出す
+        self._finished.add(index)
+        while self._head in self._finished:
+            self._head += 1
+            if self._head in self._pending:
+                self._write(self._pending.pop(self._head))
+
+
 class CartesiaClient:
     """
     Cartesia API クライアント
 
-    WebSocket接続で音声を生成し、Cloudinaryにアップロード
+    WebSocket接続で音声を生成し、アップロード先（audio_host）にアップロード
 
     Example:
         >>> client = CartesiaClient(
@@ -53,7 +350,8 @@ class CartesiaClient:
         self,
         api_key: str,
         voice_id: str,
-        cloudinary_config: Optional[CloudinaryConfig] = None
+        cloudinary_config: Optional[CloudinaryConfig] = None,
+        audio_host: Optional[AudioHost] = None
     ):
         """
         初期化
@@ -62,6 +360,7 @@ class CartesiaClient:
             api_key: Cartesia APIキー
             voice_id: 声クローンID
             cloudinary_config: Cloudinary設定
+            audio_host: 音声のアップロード先（省略時は config.yaml の audio_host.backend）
         """
         self.api_key = api_key
         self.voice_id = voice_id
@@ -73,25 +372,108 @@ class CartesiaClient:
         self.model = config.get("cartesia.model", "sonic-multilingual")
         self.timeout = config.get("cartesia.timeout_seconds", 60)
 
-        # Cloudinary設定
-        if cloudinary_config:
-            cloudinary.config(
-                cloud_name=cloudinary_config.cloud_name,
-                api_key=cloudinary_config.api_key,
-                api_secret=cloudinary_config.api_secret
+        # 出力フォーマット（WAVに書き込むため Raw PCM で受信）
+        self.output_format = dict(config.get("cartesia.output_format") or {})
+        self.output_format.setdefault("container", "raw")
+        self.output_format.setdefault("encoding", "pcm_s16le")
+        self.output_format.setdefault("sample_rate", 44100)
+
+        if (
+            self.output_format["container"] != "raw"
+            or self.output_format["encoding"] not in PCM_ENCODINGS
+        ):
+            raise ConfigError(
+                f"cartesia.output_format は raw / {' / '.join(PCM_ENCODINGS)} のみ対応: "
+                f"{self.output_format}"
             )
 
+        # 出力WAVのサンプルレート（Cartesiaが出せないレートはリサンプリング）
+        self.sample_rate = (
+            config.get("cartesia.target_sample_rate")
+            or self.output_format["sample_rate"]
+        )
+
+        # 生成中の長さ上限（超えた時点で中止。D-IDの制限に合わせる）
+        self.max_duration = config.get(
+            "cartesia.max_duration_seconds",
+            config.get("script.max_duration_seconds", 290)
+        )
+
+        # 文分割モード（長いスクリプトを文単位で並列生成）
+        self.segmentation_enabled = config.get("cartesia.segmentation.enabled", False)
+        self.segment_max_chars = config.get("cartesia.segmentation.max_chars", 200)
+        self.max_in_flight = config.get("cartesia.segmentation.max_in_flight", 4)
+
+        # 差分生成モード（文ごとの音声を保存し、変更・追加された文だけ生成）
+        self.incremental_enabled = config.get("cartesia.incremental.enabled", False)
+        self.crossfade_ms = config.get("cartesia.incremental.crossfade_ms", 20)
+
+        # 無音の圧縮（先頭・末尾の無音を削り、長すぎる間を縮める）
+        self.silence_enabled = config.get("cartesia.silence.enabled", False)
+        self.silence_options = {
+            "threshold_db": config.get("cartesia.silence.threshold_db", -45.0),
+            "frame_ms": config.get("cartesia.silence.frame_ms", 20),
+            "max_pause_ms": config.get("cartesia.silence.max_pause_ms", 500),
+            "edge_pad_ms": config.get("cartesia.silence.edge_pad_ms", 100),
+        }
+
+        # 長い音声の分割（間の位置で切る。generate_parts で使用）
+        self.split_options = {
+            "threshold_db": config.get("did.split.threshold_db", -45.0),
+            "search_fraction": config.get("did.split.search_fraction", 0.1),
+        }
+
+        # ラウドネス正規化（声・サービスによる音量の差をなくす）
+        self.loudness_enabled = config.get("loudness.enabled", False)
+        self.loudness_options = {
+            "target_db": config.get("loudness.target_db", -18.0),
+            "max_gain_db": config.get("loudness.max_gain_db", 20.0),
+            "ceiling_db": config.get("loudness.ceiling_db", -1.0),
+        }
+
+        # 音声キャッシュ（無効ならNone）
+        self.cache = get_cache("audio")
+        self.sentence_cache = get_cache("sentences")
+
+        # 接続プール（WebSocketを呼び出し間で再利用）
+        uri = f"{self.ws_url}?api_key={self.api_key}&cartesia_version=2024-06-10"
+        self.pool = CartesiaConnectionPool(
+            uri,
+            max_size=config.get("cartesia.pool.max_size", 4),
+            idle_timeout=config.get("cartesia.pool.idle_timeout_seconds", 240),
+            ping_interval=config.get("cartesia.pool.ping_interval_seconds", 20),
+            ping_timeout=config.get("cartesia.pool.ping_timeout_seconds", 20)
+        )
+
+        # 音声のアップロード先
+        self.audio_host = audio_host or create_audio_host(cloudinary_config=cloudinary_config)
+
     async def generate(
         self,
         text: str,
-        speed: float = 1.0
+        speed: float = 1.0,
+        segmented: Optional[bool] = None,
+        max_duration: Optional[float] = None,
+        incremental: Optional[bool] = None
     ) -> Tuple[Optional[GeneratedAudio], Optional[Exception]]:
         """
         音声生成
 
+        受信中の音声が上限時間を超えた時点で生成を中止し、
+        AudioTooLongError を返す（アップロードまで進めない）。
+        無音の圧縮が有効な場合は、圧縮後に上限に収まる音声を中止しないよう、
+        受信中には中止せず、圧縮後の長さで判定する
+
+        差分生成モードでは、以前に生成した文の音声を再利用し、
+        変更・追加された文だけを生成して連結する
+
         Args:
             text: 生成するテキスト
             speed: 再生速度（0.5-2.0）
+            segmented: 文分割モード（None: config.yamlの設定に従う）
+            max_duration: 上限時間（秒、None: config.yamlの設定、0: 上限なし）
+            incremental: 差分生成モード（None: config.yamlの設定に従う。
+                文キャッシュが無効な場合は使わない）
 
         Returns:
             (audio, error):
@@ -101,161 +483,885 @@ class CartesiaClient:
         Example:
             >>> audio, err = await client.generate("こんにちは", speed=1.0)
         """
-        try:
-            logger.info(f"音声生成開始: {len(text)}文字")
-
-            # WebSocket接続（Python 3.13対応）
-            uri = f"{self.ws_url}?api_key={self.api_key}&cartesia_version=2024-06-10"
-
-            async with websockets.connect(uri) as websocket:
-                # 単一メッセージで全パラメータを送信（最新API仕様）
-                message = {
-                    "context_id": "temp",
-                    "model_id": self.model,
-                    "transcript": text,
-                    "voice": {
-                        "mode": "id",
-                        "id": self.voice_id
-                    },
-                    "output_format": {
-                        "container": "raw",
-                        "encoding": "pcm_s16le",
-                        "sample_rate": 44100
-                    },
-                    "language": "ja",
-                    "continue": False,
-                    "_experimental_voice_controls": {
-                        "speed": speed
-                    }
-                }
-
-                await websocket.send(json.dumps(message))
-                logger.debug("メッセージ送信完了")
-
-                # 音声データ受信
-                audio_chunks = []
-                while True:
-                    try:
-                        message = await asyncio.wait_for(
-                            websocket.recv(),
-                            timeout=self.timeout
-                        )
-
-                        data = json.loads(message)
+        started = time.perf_counter()
+        stats = AudioGenerationStats()
 
-                        if data.get("type") == "chunk":
-                            # Base64デコードして音声データを保存
-                            audio_data = base64.b64decode(data["data"])
-                            audio_chunks.append(audio_data)
-                            logger.debug(f"音声チャンク受信: {len(audio_data)}バイト")
+        if incremental is None:
+            incremental = self.incremental_enabled
+        incremental = incremental and self.sentence_cache is not None
 
-                        elif data.get("type") == "done":
-                            logger.info("音声生成完了")
-                            break
+        if max_duration is None:
+            max_duration = self.max_duration
 
-                        elif data.get("type") == "error":
-                            error_msg = data.get("error", "Unknown error")
-                            return (None, AudioGenerationError(f"Cartesia error: {error_msg}"))
-
-                    except asyncio.TimeoutError:
-                        return (None, TimeoutError(f"音声生成タイムアウト（{self.timeout}秒）"))
-
-            # 音声データを結合
-            audio_bytes = b"".join(audio_chunks)
-
-            if not audio_bytes:
-                return (None, AudioGenerationError("音声データが空です"))
-
-            logger.info(f"音声データ生成完了: {len(audio_bytes)}バイト")
+        try:
+            logger.info(f"音声生成開始: {len(text)}文字")
 
-            # Raw PCM (pcm_s16le) を WAV ファイルに変換して保存
-            tmp_path = tempfile.mktemp(suffix=".wav")
+            # キャッシュ確認（同じテキスト・声・設定なら生成もアップロードも省略）
+            cache_key = None
+            if self.cache:
+                cache_key = self._cache_key(text, speed, segmented, incremental)
+                audio = await self._load_cached(cache_key)
+                if audio:
+                    stats.cache_hit = True
+                    stats.total_seconds = time.perf_counter() - started
+                    audio.stats = stats
+                    self._record_stats(stats)
+                    return (audio, None)
 
-            # WAVファイル作成
-            with wave.open(tmp_path, 'wb') as wav_file:
-                wav_file.setnchannels(1)  # モノラル
-                wav_file.setsampwidth(2)  # 16-bit signed int = 2 bytes
-                wav_file.setframerate(44100)
-                wav_file.writeframes(audio_bytes)
+            # Raw PCM を受信しながら WAV ファイル（16bit）に書き込む
+            fd, tmp_path = tempfile.mkstemp(suffix=".wav")
+            os.close(fd)
+            upload_path = None
 
             try:
-                # mutagenで実際の音声時間を測定
-                audio_file = MutagenFile(tmp_path)
-                actual_duration = audio_file.info.length
-                logger.info(f"音声時間（実測）: {actual_duration:.2f}秒")
+                frame_count, sample_rate = await self._render_wav(
+                    text, speed, tmp_path, segmented, incremental, max_duration, stats
+                )
+                actual_duration = frame_count / sample_rate
+
+                # ローカルで圧縮（アップロード量を減らし、アップロード先での変換待ちをなくす）
+                stage_started = time.perf_counter()
+                upload_path = await self._encode(tmp_path)
+                stats.encode_seconds = time.perf_counter() - stage_started
 
-                # Cloudinaryにアップロード
-                audio_url, err = self._upload_to_cloudinary(tmp_path)
+                # アップロード（ブロッキングのため別スレッドで。共有ループ上の他の生成を止めない）
+                stage_started = time.perf_counter()
+                audio_url, err = await asyncio.get_running_loop().run_in_executor(
+                    None, self.audio_host.upload, upload_path
+                )
+                stats.upload_seconds = time.perf_counter() - stage_started
                 if err:
                     return (None, err)
 
+                stats.upload_bytes = os.path.getsize(upload_path)
+                stats.total_seconds = time.perf_counter() - started
+
                 # GeneratedAudioオブジェクト作成
                 audio = GeneratedAudio(
                     audio_url=audio_url,
-                    duration_seconds=actual_duration,  # mutagenで実測した値
-                    file_size_bytes=len(audio_bytes)
+                    audio_host=self.audio_host.name,
+                    audio_url_expires_at=self.audio_host.url_expires_at(),
+                    duration_seconds=actual_duration,  # PCMのフレーム数から算出した値
+                    file_size_bytes=stats.upload_bytes,
+                    frame_count=frame_count,
+                    sample_rate=sample_rate,
+                    stats=stats
                 )
 
+                if cache_key:
+                    self.cache.put(
+                        cache_key,
+                        audio.model_dump(mode="json", exclude={"stats"}),
+                        data_path=upload_path
+                    )
+
+                self._record_stats(stats)
+
                 logger.info(f"音声生成成功: {audio_url} ({actual_duration:.2f}秒)")
                 return (audio, None)
 
             finally:
                 # 一時ファイル削除
-                if os.path.exists(tmp_path):
-                    os.unlink(tmp_path)
+                for path in {tmp_path, upload_path}:
+                    if path and os.path.exists(path):
+                        os.unlink(path)
 
         except websockets.exceptions.WebSocketException as e:
             logger.error(f"WebSocket error: {e}")
             return (None, AudioGenerationError(f"WebSocket接続エラー: {e}"))
 
+        except AudioTooLongError as e:
+            logger.warning(str(e))
+            return (None, e)
+
         except Exception as e:
             logger.error(f"音声生成エラー: {e}", exc_info=True)
             return (None, e)
 
-    def _upload_to_cloudinary(
+    async def generate_parts(
         self,
-        audio_file_path: str
-    ) -> Tuple[Optional[str], Optional[Exception]]:
+        text: str,
+        speed: float = 1.0,
+        max_part_seconds: Optional[float] = None,
+        segmented: Optional[bool] = None,
+        incremental: Optional[bool] = None
+    ) -> Tuple[Optional[List[GeneratedAudio]], Optional[Exception]]:
         """
-        Cloudinaryにアップロード
+        音声を生成し、上限時間以下の部分に分けてアップロード（長いスクリプト用）
+
+        上限での生成の中止は行わず（max_duration=0）、生成後のPCMを
+        間（無音）の位置で切る。部分ごとにエンコード・アップロードする。
+        音声キャッシュは使わない（文キャッシュは差分生成モードで使う）
 
         Args:
-            audio_file_path: 音声ファイルパス
+            text: 生成するテキスト
+            speed: 再生速度（0.5-2.0）
+            max_part_seconds: 1つの部分の上限時間（秒、None: config.yamlの設定）
+            segmented: 文分割モード（None: config.yamlの設定に従う）
+            incremental: 差分生成モード（None: config.yamlの設定に従う）
 
         Returns:
-            (url, error): CloudinaryのURLまたはエラー
+            (audios, error):
+                - 成功: (順番通りの GeneratedAudio のリスト, None)（上限以下なら1つ）
+                - 失敗: (None, Exception)
+
+        Example:
+            >>> parts, err = await client.generate_parts(long_text, max_part_seconds=290)
         """
+        started = time.perf_counter()
+        stats = AudioGenerationStats()
+
+        if incremental is None:
+            incremental = self.incremental_enabled
+        incremental = incremental and self.sentence_cache is not None
+
+        if max_part_seconds is None:
+            max_part_seconds = self.max_duration
+
         try:
-            logger.info("Cloudinaryにアップロード開始")
-
-            # アップロード（MP3形式に変換）
-            result = cloudinary.uploader.upload(
-                audio_file_path,
-                resource_type="video",  # 音声も"video"
-                folder="ai-avatar/audio",
-                overwrite=True,
-                unique_filename=True,
-                format="mp3",  # WAVをMP3に自動変換
-                eager=[{"format": "mp3"}],  # 変換を強制実行
-                eager_async=False  # 変換完了まで待機
-            )
+            logger.info(f"音声生成開始（分割）: {len(text)}文字")
 
-            url = result.get("secure_url")
+            fd, tmp_path = tempfile.mkstemp(suffix=".wav")
+            os.close(fd)
+            temp_paths = {tmp_path}
 
-            if not url:
-                return (None, CloudinaryError("URLが取得できませんでした"))
+            try:
+                frame_count, sample_rate = await self._render_wav(
+                    text, speed, tmp_path, segmented, incremental, 0, stats
+                )
 
-            logger.info(f"Cloudinaryアップロード成功: {url}")
-            return (url, None)
+                parts = split_wav(tmp_path, max_part_seconds, **self.split_options)
+                temp_paths.update(path for path, _ in parts)
 
-        except cloudinary.exceptions.Error as e:
-            logger.error(f"Cloudinaryエラー: {e}")
-            return (None, CloudinaryError(f"アップロード失敗: {e}"))
+                audios = []
+                for part_path, part_frames in parts:
+                    stage_started = time.perf_counter()
+                    upload_path = await self._encode(part_path)
+                    temp_paths.add(upload_path)
+                    stats.encode_seconds += time.perf_counter() - stage_started
+
+                    stage_started = time.perf_counter()
+                    audio_url, err = await asyncio.get_running_loop().run_in_executor(
+                        None, self.audio_host.upload, upload_path
+                    )
+                    stats.upload_seconds += time.perf_counter() - stage_started
+                    if err:
+                        return (None, err)
+
+                    file_size = os.path.getsize(upload_path)
+                    stats.upload_bytes += file_size
+                    audios.append(GeneratedAudio(
+                        audio_url=audio_url,
+                        audio_host=self.audio_host.name,
+                        audio_url_expires_at=self.audio_host.url_expires_at(),
+                        duration_seconds=part_frames / sample_rate,
+                        file_size_bytes=file_size,
+                        frame_count=part_frames,
+                        sample_rate=sample_rate
+                    ))
+
+                stats.total_seconds = time.perf_counter() - started
+                for audio in audios:
+                    audio.stats = stats
+                self._record_stats(stats)
+
+                logger.info(
+                    f"音声生成成功: {len(audios)}個に分割 "
+                    f"({frame_count / sample_rate:.2f}秒)"
+                )
+                return (audios, None)
+
+            finally:
+                for path in temp_paths:
+                    if path and os.path.exists(path):
+                        os.unlink(path)
+
+        except websockets.exceptions.WebSocketException as e:
+            logger.error(f"WebSocket error: {e}")
+            return (None, AudioGenerationError(f"WebSocket接続エラー: {e}"))
 
         except Exception as e:
-            logger.error(f"予期しないエラー: {e}")
+            logger.error(f"音声生成エラー: {e}", exc_info=True)
             return (None, e)
 
+    async def _render_wav(
+        self,
+        text: str,
+        speed: float,
+        wav_path: str,
+        segmented: Optional[bool],
+        incremental: bool,
+        max_duration: Optional[float],
+        stats: AudioGenerationStats
+    ) -> Tuple[int, int]:
+        """
+        音声を生成してWAVファイルに書き込み、無音の圧縮・ラウドネス正規化まで行う
+
+        Args:
+            text: 生成するテキスト
+            speed: 再生速度
+            wav_path: 書き込み先のWAVファイル
+            segmented: 文分割モード
+            incremental: 差分生成モード
+            max_duration: 上限時間（秒、None/0: 上限なし）
+            stats: 計測結果の記録先
+
+        Returns:
+            (frame_count, sample_rate)
+
+        Raises:
+            AudioTooLongError: 音声が上限時間を超えた
+                （無音の圧縮が有効な場合は圧縮後の長さで判定）
+            AudioGenerationError: 音声データが空・無音
+        """
+        # 無音の圧縮で短くなる分は受信中にはわからないため、その場合は圧縮後に判定する
+        stream_limit = None if self.silence_enabled else max_duration
+
+        if incremental:
+            # 文ごとのWAV（変換済み）を連結するため、変換なしで書き込む
+            with PCMWavSink(wav_path, sample_rate=self.sample_rate) as sink:
+                await self._synthesize_incremental(
+                    text, speed, sink, stream_limit, stats
+                )
+        else:
+            with PCMWavSink(
+                wav_path,
+                sample_rate=self.sample_rate,
+                source_rate=self.output_format["sample_rate"],
+                source_encoding=self.output_format["encoding"]
+            ) as sink:
+                await self._synthesize(
+                    text, speed, sink, segmented, stream_limit, stats
+                )
+
+        if not sink.byte_count:
+            raise AudioGenerationError("音声データが空です")
+
+        logger.info(f"音声データ生成完了: {sink.byte_count}バイト")
+
+        # 音声時間は受信したバイト数から算出（ファイルの再読み込み不要）
+        frame_count = sink.frame_count
+        logger.info(f"音声時間（実測）: {sink.duration_seconds:.2f}秒")
+
+        # 以降のファイル処理はブロッキングのため別スレッドで（共有ループ上の他の生成を止めない）
+        loop = asyncio.get_running_loop()
+
+        # 無音を圧縮（D-IDの処理時間・課金は音声の長さに比例する）
+        if self.silence_enabled:
+            stage_started = time.perf_counter()
+            frame_count, removed = await loop.run_in_executor(
+                None, functools.partial(compact_silence, wav_path, **self.silence_options)
+            )
+            stats.silence_seconds = time.perf_counter() - stage_started
+            stats.silence_removed_seconds = removed
+
+            if not frame_count:
+                raise AudioGenerationError("音声データが無音です")
+
+            logger.info(
+                f"無音を圧縮: {removed:.2f}秒短縮 → {frame_count / sink.sample_rate:.2f}秒 "
+                f"({stats.silence_seconds * 1000:.0f}ms)"
+            )
+
+            compacted_duration = frame_count / sink.sample_rate
+            if max_duration and compacted_duration > max_duration:
+                raise AudioTooLongError(compacted_duration, max_duration)
+
+        # 音量を揃える（ゲイン + ピークリミッター）
+        if self.loudness_enabled:
+            stage_started = time.perf_counter()
+            loudness, gain_db = await loop.run_in_executor(
+                None, functools.partial(normalize_loudness, wav_path, **self.loudness_options)
+            )
+            stats.loudness_seconds = time.perf_counter() - stage_started
+
+            if loudness is not None:
+                logger.info(
+                    f"ラウドネス正規化: {loudness:.1f}dB → ゲイン{gain_db:+.1f}dB "
+                    f"({stats.loudness_seconds * 1000:.0f}ms)"
+                )
+
+        return (frame_count, sink.sample_rate)
+
+    def _cache_key(
+        self,
+        text: str,
+        speed: float,
+        segmented: Optional[bool],
+        incremental: bool = False
+    ) -> str:
+        """
+        キャッシュキーを作成
+
+        正規化したテキスト・声・モデル・速度・出力フォーマット・生成方式・後処理の設定のハッシュ
+        """
+        if segmented is None:
+            segmented = self.segmentation_enabled
+
+        if incremental:
+            mode = f"incremental:{self.crossfade_ms}"
+        else:
+            mode = self.segment_max_chars if segmented else None
+
+        return DiskCache.make_key(
+            _normalize_text(text),
+            self.voice_id,
+            self.model,
+            round(speed, 3),
+            self.output_format,
+            self.sample_rate,
+            mode,
+            self.silence_options if self.silence_enabled else None,
+            self.loudness_options if self.loudness_enabled else None
+        )
+
+    def _sentence_key(self, sentence: str, speed: float) -> str:
+        """文キャッシュのキーを作成（文単位で _cache_key と同じ要素のハッシュ）"""
+        return DiskCache.make_key(
+            "sentence",
+            _normalize_text(sentence),
+            self.voice_id,
+            self.model,
+            round(speed, 3),
+            self.output_format,
+            self.sample_rate
+        )
+
+    async def _load_cached(self, cache_key: str) -> Optional[GeneratedAudio]:
+        """
+        キャッシュから音声を取得
+
+        同じアップロード先の有効なURLがあればそのまま返し、音声ファイルのみの場合・
+        アップロード先が変わった場合・URLが期限切れ（間近）の場合はアップロードだけ行う
+
+        Returns:
+            GeneratedAudio（キャッシュなし・アップロード失敗時はNone）
+        """
+        entry = self.cache.get(cache_key)
+        if entry is None:
+            return None
+
+        meta, data_path = entry
+
+        # audio_host のない古いエントリはCloudinaryにアップロードしたもの
+        uploaded_to = meta.get("audio_host") or "cloudinary"
+        if (
+            not meta.get("audio_url")
+            or uploaded_to != self.audio_host.name
+            or url_expired(meta.get("audio_url_expires_at"))
+        ):
+            if data_path is None:
+                return None
+
+            audio_url, err = await asyncio.get_running_loop().run_in_executor(
+                None, self.audio_host.upload, data_path
+            )
+            if err:
+                logger.warning(f"キャッシュ音声の再アップロード失敗: {err}")
+                return None
+
+            meta["audio_url"] = audio_url
+            meta["audio_host"] = self.audio_host.name
+            meta["audio_url_expires_at"] = self.audio_host.url_expires_at()
+            self.cache.put(cache_key, meta, data_path=data_path)
+
+        audio = GeneratedAudio(**meta)
+        logger.info(f"音声キャッシュヒット: {audio.audio_url} ({audio.duration_seconds:.2f}秒)")
+        return audio
+
+    async def _synthesize(
+        self,
+        text: str,
+        speed: float,
+        sink: PCMWavSink,
+        segmented: Optional[bool] = None,
+        max_duration: Optional[float] = None,
+        stats: Optional[AudioGenerationStats] = None
+    ) -> None:
+        """
+        プールの接続で音声を生成し、PCMをシンクに書き込む
+
+        文分割モードでは、スクリプトを文の境界でセグメントに分け、
+        1つの接続上で複数のcontext_idとして並列に生成する
+
+        Args:
+            text: 生成するテキスト
+            speed: 再生速度
+            sink: PCMの書き込み先（スクリプト順に書き込まれる）
+            segmented: 文分割モード（None: 設定に従う）
+            max_duration: 上限時間（秒、None/0: 上限なし）
+            stats: 計測結果の記録先（接続・送信・受信の各時間）
+
+        Raises:
+            AudioGenerationError: Cartesiaがエラーを返した
+            AudioTooLongError: 受信した音声が上限時間を超えた
+            TimeoutError: 受信タイムアウト
+        """
+        if segmented is None:
+            segmented = self.segmentation_enabled
+
+        if segmented and len(text) > self.segment_max_chars:
+            segments = segment_script(text, self.segment_max_chars) or [text]
+            logger.info(f"文分割モード: {len(segments)}セグメント（同時{self.max_in_flight}件）")
+        else:
+            segments = [text]
+
+        writer = _OrderedWriter(sink.write)
+        await self._stream_segments(
+            segments, speed, writer.chunk, writer.done, max_duration, stats
+        )
+
+    async def _stream_segments(
+        self,
+        segments: List[str],
+        speed: float,
+        on_chunk: Callable[[int, bytes], None],
+        on_done: Callable[[int], None],
+        max_duration: Optional[float] = None,
+        stats: Optional[AudioGenerationStats] = None
+    ) -> None:
+        """
+        プールの接続を借りてセグメントを生成
+
+        再利用した接続が既に切断されていた場合は、新しい接続で1回だけ再試行
+
+        Args:
+            segments: 生成するテキストのリスト
+            speed: 再生速度
+            on_chunk: chunk受信時に (セグメント番号, PCM) で呼ばれる
+            on_done: セグメント完了時に セグメント番号 で呼ばれる
+            max_duration: 上限時間（秒、None/0: 上限なし）
+            stats: 計測結果の記録先
+        """
+        if stats is None:
+            stats = AudioGenerationStats()
+        stats.segment_count = len(segments)
+
+        for attempt in range(2):
+            try:
+                # 再試行はアイドル接続（同じく切断されている可能性がある）を使わない
+                async with self.pool.connection(fresh=attempt > 0) as websocket:
+                    stats.connect_seconds += websocket.connect_seconds
+                    stats.connection_reused = websocket.reused
+                    return await self._stream_contexts(
+                        websocket, segments, speed, on_chunk, on_done, max_duration, stats
+                    )
+
+            except _StaleConnectionError:
+                if attempt:
+                    raise AudioGenerationError("WebSocket接続エラー: 再接続後も切断されました")
+                logger.warning("プール内の接続が切断されていたため再接続します")
+
+    async def _synthesize_incremental(
+        self,
+        text: str,
+        speed: float,
+        sink: PCMWavSink,
+        max_duration: Optional[float] = None,
+        stats: Optional[AudioGenerationStats] = None
+    ) -> None:
+        """
+        文単位の差分生成
+
+        スクリプトを文に分け、文キャッシュにない文だけを1つの接続上で並列に生成する。
+        生成した文は文キャッシュに保存し、全文のWAVを短いクロスフェードで連結する。
+        文キャッシュはテキストの内容で引くため、文の並べ替え・削除にもそのまま対応する
+
+        Args:
+            text: 生成するテキスト
+            speed: 再生速度
+            sink: 連結結果の書き込み先（self.sample_rate の16bit PCM、変換なし）
+            max_duration: 上限時間（秒、None/0: 上限なし）
+            stats: 計測結果の記録先
+
+        Raises:
+            AudioGenerationError: Cartesiaがエラーを返した
+            AudioTooLongError: 再利用分と生成分の合計が上限時間を超えた
+            TimeoutError: 受信タイムアウト
+        """
+        if stats is None:
+            stats = AudioGenerationStats()
+
+        sentences = split_sentences(text) or [text]
+        keys = [self._sentence_key(sentence, speed) for sentence in sentences]
+
+        # キャッシュ済みの文を確認（同じ文が複数回出てくる場合は1回だけ生成）
+        clip_paths: Dict[str, str] = {}
+        missing: Dict[str, str] = {}
+        reused_seconds = 0.0
+
+        for key, sentence in zip(keys, sentences):
+            if key in clip_paths or key in missing:
+                continue
+
+            entry = self.sentence_cache.get(key)
+            if entry is not None and entry[1] is not None:
+                meta, data_path = entry
+                clip_paths[key] = data_path
+                reused_seconds += meta.get("duration_seconds", 0.0)
+            else:
+                missing[key] = sentence
+
+        logger.info(
+            f"差分生成: {len(sentences)}文（再利用 {len(clip_paths)}文 / 新規 {len(missing)}文）"
+        )
+
+        if max_duration and reused_seconds > max_duration:
+            raise AudioTooLongError(reused_seconds, max_duration)
+
+        temp_paths: List[str] = []
+
+        try:
+            if missing:
+                missing_keys = list(missing)
+                sinks: List[PCMWavSink] = []
+
+                for _ in missing_keys:
+                    fd, path = tempfile.mkstemp(suffix=".wav")
+                    os.close(fd)
+                    temp_paths.append(path)
+                    sinks.append(PCMWavSink(
+                        path,
+                        sample_rate=self.sample_rate,
+                        source_rate=self.output_format["sample_rate"],
+                        source_encoding=self.output_format["encoding"]
+                    ))
+
+                def on_chunk(index: int, data: bytes) -> None:
+                    sinks[index].write(data)
+
+                def on_done(index: int) -> None:
+                    # 完了した文はすぐ保存（途中で失敗しても次回は再利用できる）
+                    clip = sinks[index]
+                    clip.close()
+                    key = missing_keys[index]
+                    if clip.byte_count:
+                        self.sentence_cache.put(
+                            key,
+                            {"duration_seconds": clip.duration_seconds},
+                            data_path=clip.path
+                        )
+                    clip_paths[key] = clip.path
+
+                # 再利用した分を差し引いた残りを上限とする
+                budget = max_duration - reused_seconds if max_duration else None
+
+                try:
+                    await self._stream_segments(
+                        list(missing.values()), speed, on_chunk, on_done, budget, stats
+                    )
+                except AudioTooLongError as e:
+                    raise AudioTooLongError(e.duration_seconds + reused_seconds, max_duration)
+                finally:
+                    for clip in sinks:
+                        clip.close()
+
+            # 連結はブロッキングのため別スレッドで（共有ループ上の他の生成を止めない）
+            await asyncio.get_running_loop().run_in_executor(
+                None,
+                splice_wav_files,
+                [clip_paths[key] for key in keys],
+                sink,
+                self.crossfade_ms
+            )
+
+        finally:
+            for path in temp_paths:
+                if os.path.exists(path):
+                    os.unlink(path)
+
+    def _build_request(self, context_id: str, transcript: str, speed: float) -> dict:
+        """
+        生成リクエストのメッセージを作成
+
+        Args:
+            context_id: コンテキストID
+            transcript: 生成するテキスト
+            speed: 再生速度
+
+        Returns:
+            送信するメッセージ
+        """
+        # 単一メッセージで全パラメータを送信（最新API仕様）
+        return {
+            "context_id": context_id,
+            "model_id": self.model,
+            "transcript": transcript,
+            "voice": {
+                "mode": "id",
+                "id": self.voice_id
+            },
+            "output_format": self.output_format,
+            "language": "ja",
+            "continue": False,
+            "_experimental_voice_controls": {
+                "speed": speed
+            }
+        }
+
+    async def _stream_contexts(
+        self,
+        websocket: _PooledConnection,
+        segments: List[str],
+        speed: float,
+        on_chunk: Callable[[int, bytes], None],
+        on_done: Callable[[int], None],
+        max_duration: Optional[float] = None,
+        stats: Optional[AudioGenerationStats] = None
+    ) -> None:
+        """
+        セグメントごとにcontext_idを割り当てて1つの接続で生成し、チャンクを受信
+
+        同時に生成するセグメントは max_in_flight 件まで。
+        交互に届くchunkをcontext_idで振り分けてコールバックに渡す
+
+        Args:
+            websocket: プールから借りた接続
+            segments: 生成するテキストのリスト（1件なら通常モード）
+            speed: 再生速度
+            on_chunk: chunk受信時に (セグメント番号, PCM) で呼ばれる
+            on_done: セグメント完了時に セグメント番号 で呼ばれる
+            max_duration: 上限時間（秒、None/0: 上限なし）。全セグメントの受信量の合計で判定
+            stats: 計測結果の記録先
+        """
+        if stats is None:
+            stats = AudioGenerationStats()
+
+        # 接続を再利用するため、呼び出しごとに一意のcontext_idを使う
+        base_id = uuid.uuid4().hex
+        context_ids = {}
+        finished = set()
+        next_index = 0
+        received = False
+
+        # 受信量から音声時間を算出するための1秒あたりのバイト数
+        sample_width = 4 if self.output_format["encoding"] == "pcm_f32le" else 2
+        bytes_per_second = self.output_format["sample_rate"] * sample_width
+        max_bytes = max_duration * bytes_per_second if max_duration else None
+        received_bytes = 0
+
+        # チャンクごとのログ文字列はDEBUG時のみ作る
+        debug = logger.isEnabledFor(logging.DEBUG)
+
+        # 計測の基準時刻（最初の送信開始）
+        clock = time.perf_counter
+        request_started = clock()
+
+        async def send_next() -> None:
+            nonlocal next_index
+            context_id = f"{base_id}-{next_index}"
+            context_ids[context_id] = next_index
+            message = self._build_request(context_id, segments[next_index], speed)
+            next_index += 1
+            send_started = clock()
+            await websocket.send(json.dumps(message))
+            stats.send_seconds += clock() - send_started
+            logger.debug(f"メッセージ送信完了: {context_id}")
+
+        def timed(callback, *args) -> None:
+            write_started = clock()
+            callback(*args)
+            stats.write_seconds += clock() - write_started
+
+        try:
+            while next_index < len(segments) and next_index < self.max_in_flight:
+                await send_next()
+
+            # 音声データ受信
+            while len(finished) < len(segments):
+                try:
+                    raw = await asyncio.wait_for(
+                        websocket.recv(),
+                        timeout=self.timeout
+                    )
+                except asyncio.TimeoutError:
+                    raise TimeoutError(f"音声生成タイムアウト（{self.timeout}秒）")
+
+                received = True
+                data = loads_json(raw)
+
+                # 以前の呼び出しの残りメッセージは無視
+                index = context_ids.get(data.get("context_id"))
+                if index is None:
+                    continue
+
+                message_type = data.get("type")
+
+                if message_type == "chunk":
+                    # Base64デコードして音声データを保存
+                    audio_data = decode_base64(data["data"])
+                    received_bytes += len(audio_data)
+
+                    elapsed = clock() - request_started
+                    if stats.first_chunk_seconds is None:
+                        stats.first_chunk_seconds = elapsed
+                    stats.last_chunk_seconds = elapsed
+                    stats.chunk_count += 1
+                    stats.audio_bytes = received_bytes
+
+                    if max_bytes and received_bytes > max_bytes:
+                        await self._cancel_contexts(
+                            websocket,
+                            [cid for cid, i in context_ids.items() if i not in finished]
+                        )
+                        # 例外でプールに返さず接続を閉じる
+                        raise AudioTooLongError(received_bytes / bytes_per_second, max_duration)
+
+                    timed(on_chunk, index, audio_data)
+
+                    if debug:
+                        logger.debug(f"音声チャンク受信: {len(audio_data)}バイト")
+
+                elif message_type == "done":
+                    if index in finished:
+                        continue
+                    finished.add(index)
+                    if debug:
+                        logger.debug(f"セグメント完了: {index + 1}/{len(segments)}")
+
+                    timed(on_done, index)
+
+                    # 空いた枠で次のセグメントを送信
+                    if next_index < len(segments):
+                        await send_next()
+
+                elif message_type == "error":
+                    error_msg = data.get("error", "Unknown error")
+                    raise AudioGenerationError(f"Cartesia error: {error_msg}")
+
+            logger.info("音声生成完了")
+
+        except websockets.exceptions.ConnectionClosed:
+            # 何も受信していない再利用接続なら、切断済みだっただけ
+            if websocket.reused and not received:
+                raise _StaleConnectionError()
+            raise
+
+    async def _cancel_contexts(
+        self,
+        websocket: _PooledConnection,
+        context_ids: List[str]
+    ) -> None:
+        """
+        生成中のコンテキストをキャンセル（失敗しても無視）
+
+        Args:
+            websocket: 接続
+            context_ids: キャンセルするcontext_id
+        """
+        for context_id in context_ids:
+            try:
+                await websocket.send(json.dumps({"context_id": context_id, "cancel": True}))
+            except websockets.exceptions.WebSocketException as e:
+                logger.debug(f"キャンセル送信失敗を無視: {e}")
+                return
+
+    def _record_stats(self, stats: AudioGenerationStats) -> None:
+        """
+        計測結果をログ出力し、ヒストグラムに集計
+
+        Args:
+            stats: 1回分の計測結果
+        """
+        if stats.cache_hit:
+            logger.info(f"音声生成計測: cache_hit=True total_seconds={stats.total_seconds:.3f}")
+            observe("cartesia.cache_hit_total_seconds", stats.total_seconds)
+            return
+
+        values = stats.model_dump(exclude={"cache_hit"})
+        values["streaming_seconds"] = stats.streaming_seconds
+        values["throughput_bytes_per_second"] = stats.throughput_bytes_per_second
+
+        logger.info(
+            "音声生成計測: " + " ".join(
+                f"{key}={value:.3f}" if isinstance(value, float) else f"{key}={value}"
+                for key, value in values.items()
+            )
+        )
+
+        for key, value in values.items():
+            if value is None or isinstance(value, bool):
+                continue
+            if key.endswith("_seconds"):
+                observe(f"cartesia.{key}", value)
+            elif key.endswith("_bytes") or key.endswith("_per_second"):
+                observe(f"cartesia.{key}", value, SIZE_BUCKETS)
+            else:
+                observe(f"cartesia.{key}", value, COUNT_BUCKETS)
+
+    async def close(self) -> None:
+        """
+        接続プールを閉じる
+
+        Example:
+            >>> await client.close()
+        """
+        await self.pool.close()
+
+    async def _encode(self, wav_path: str) -> str:
+        """
+        アップロード前にWAVをMP3/AACへエンコード
+
+        無効化されている・エンコーダーがない場合はWAVのまま返す
+        （Cloudinaryの場合はCloudinary側でMP3に変換する）
+
+        Args:
+            wav_path: WAVファイルパス
+
+        Returns:
+            アップロードするファイルのパス
+        """
+        config = get_config()
+        fmt = config.get("encoding.format", "mp3")
+
+        if not config.get("encoding.enabled", True) or not can_encode(fmt):
+            logger.warning("ローカルエンコードを使用しません（WAVのままアップロード）")
+            return wav_path
+
+        encoded_path = await encode_audio_async(
+            wav_path,
+            fmt,
+            bitrate_kbps=config.get("encoding.bitrate_kbps", 96),
+            max_workers=config.get("encoding.workers", 2)
+        )
+
+        logger.info(
+            f"エンコード完了（{fmt}）: {os.path.getsize(wav_path)}バイト → "
+            f"{os.path.getsize(encoded_path)}バイト"
+        )
+        return encoded_path
+
+
+# 同期ラッパー用のクライアント（共有イベントループ上で接続プールを使い回す）
+_sync_clients: Dict[Tuple[str, str, Optional[str], Optional[str]], CartesiaClient] = {}
+_sync_clients_lock = threading.Lock()
+
+
+def _get_sync_client(
+    api_key: str,
+    voice_id: str,
+    cloudinary_config: Optional[CloudinaryConfig],
+    did_api_key: Optional[str] = None
+) -> CartesiaClient:
+    """同じ認証情報のクライアントを再利用（接続プールを呼び出し間で共有するため）"""
+    key = (
+        api_key,
+        voice_id,
+        cloudinary_config.model_dump_json() if cloudinary_config else None,
+        did_api_key
+    )
+
+    with _sync_clients_lock:
+        if key not in _sync_clients:
+            audio_host = create_audio_host(
+                cloudinary_config=cloudinary_config,
+                did_api_key=did_api_key
+            )
+            _sync_clients[key] = CartesiaClient(
+                api_key, voice_id, cloudinary_config, audio_host=audio_host
+            )
+        return _sync_clients[key]
+
 
 # 同期ラッパー関数（Streamlitで使いやすくするため）
 def generate_audio_sync(
@@ -263,12 +1369,15 @@ def generate_audio_sync(
     api_key: str,
     voice_id: str,
     cloudinary_config: CloudinaryConfig,
-    speed: float = 1.0
+    speed: float = 1.0,
+    did_api_key: Optional[str] = None
 ) -> Tuple[Optional[GeneratedAudio], Optional[Exception]]:
     """
     音声生成（同期版）
 
-    Streamlitから呼び出しやすいように同期的にラップ
+    Streamlitから呼び出しやすいように同期的にラップ。
+    共有イベントループ（src/utils/event_loop.py）で実行するため、
+    複数スレッドから同時に呼び出せ、WebSocket接続も呼び出し間で再利用される
 
     Args:
         text: 生成するテキスト
@@ -276,6 +1385,7 @@ def generate_audio_sync(
         voice_id: 声クローンID
         cloudinary_config: Cloudinary設定
         speed: 再生速度
+        did_api_key: D-ID APIキー（audio_host.backend: did の場合）
 
     Returns:
         (audio, error): GeneratedAudioまたはエラー
@@ -288,13 +1398,30 @@ def generate_audio_sync(
         ...     cloudinary_config=config
         ... )
     """
-    client = CartesiaClient(api_key, voice_id, cloudinary_config)
+    client = _get_sync_client(api_key, voice_id, cloudinary_config, did_api_key)
+    return run_sync(client.generate(text, speed))
 
-    # イベントループで実行
-    loop = asyncio.new_event_loop()
-    asyncio.set_event_loop(loop)
-    try:
-        result = loop.run_until_complete(client.generate(text, speed))
-        return result
-    finally:
-        loop.close()
+
+def generate_audio_parts_sync(
+    text: str,
+    api_key: str,
+    voice_id: str,
+    cloudinary_config: CloudinaryConfig,
+    speed: float = 1.0,
+    max_part_seconds: Optional[float] = None,
+    did_api_key: Optional[str] = None
+) -> Tuple[Optional[List[GeneratedAudio]], Optional[Exception]]:
+    """
+    分割して音声生成（同期版、CartesiaClient.generate_parts を共有イベントループで実行）
+
+    Example:
+        >>> parts, err = generate_audio_parts_sync(
+        ...     long_text,
+        ...     api_key="cart_xxxxx",
+        ...     voice_id="voice_xxxxx",
+        ...     cloudinary_config=config,
+        ...     max_part_seconds=290
+        ... )
+    """
+    client = _get_sync_client(api_key, voice_id, cloudinary_config, did_api_key)
+    return run_sync(client.generate_parts(text, speed, max_part_seconds))
@@ -3,23 +3,214 @@ D-ID API - リップシンク動画生成
 
 機能:
   - 動画生成リクエスト
-  - ポーリング（完了待機）
+  - ポーリング（完了待機、音声の長さから完了時刻を予測）
   - 動画URL取得
+  - 完成した動画のローカル保存（再開可能なダウンロード、コンテンツアドレス方式のキャッシュ）
+  - 重複排除（同じ音声・アバター・設定の動画を再利用し、実行中の同じリクエストは合流）
+  - 接続の再利用（プロセス共有のHTTPセッション）
+  - 非同期版（1つのイベントループで多数のTalkを同時に追跡）
+  - Webhookモード（完了通知を受信、届かなければポーリング）
+  - バッチ実行（同時実行数・レート制限・優先度付きキュー）
   - エラーハンドリング
 """
 
+import asyncio
 import time
+import aiohttp
 import requests
-from typing import Tuple, Optional
+from concurrent.futures import TimeoutError as FutureTimeoutError
+from typing import Tuple, Optional, List, Iterable
+from urllib.parse import parse_qs, urlsplit
 
-from ..models.schemas import GeneratedVideo, DIDConfig
-from ..utils.errors import VideoCreationError, TimeoutError, APIError
+from ..models.schemas import GeneratedVideo, DIDConfig, DIDJob, DIDJobResult
+from ..utils.errors import (
+    VideoCreationError, TimeoutError, APIError, RateLimitError, DownloadError
+)
 from ..utils.logger import get_logger
 from ..utils.config import get_config
+from ..utils.http import get_session, get_async_session
+from ..utils.cache import DiskCache, get_cache
+from ..utils.dedup import ResultCache, get_result_cache
+from ..utils.download import fetch_to_cache
+from ..utils.polling import get_poll_policy
+from ..utils.rate_limit import TokenBucket, parse_retry_after
+from ..utils.webhook import get_webhook_receiver
 
 logger = get_logger(__name__)
 
 
+def _talk_payload(
+    audio_url: str,
+    avatar_url: str,
+    webhook_url: Optional[str] = None
+) -> dict:
+    """動画生成リクエストの本文（webhook_url があれば完了時に通知させる）"""
+    payload = {
+        "script": {
+            "type": "audio",
+            "audio_url": audio_url
+        },
+        "source_url": avatar_url,
+        "config": {
+            "stitch": True,
+            "result_format": "mp4"
+        }
+    }
+
+    if webhook_url:
+        payload["webhook"] = webhook_url
+
+    return payload
+
+
+def _download_options() -> dict:
+    """config.yaml の did.download から fetch_to_cache のオプションを作成"""
+    config = get_config()
+    return {
+        "chunk_size": int(config.get("did.download.chunk_size_kb", 1024) * 1024),
+        "max_attempts": config.get("did.download.max_attempts", 5),
+        "timeout": config.get("did.download.timeout_seconds", 60)
+    }
+
+
+def _save_video(
+    video: GeneratedVideo,
+    cache: Optional[DiskCache],
+    options: dict
+) -> GeneratedVideo:
+    """
+    完成した動画をキャッシュに保存し、video_path / sha256 を設定
+
+    失敗しても動画URLは使えるため、警告のみでそのまま返す
+    """
+    if cache is None:
+        return video
+
+    try:
+        path, digest = fetch_to_cache(
+            str(video.video_url),
+            cache,
+            session=get_session("download"),
+            **options
+        )
+    except DownloadError as e:
+        logger.warning(f"動画をローカルに保存できません（URLのみ使用）: {e}")
+        return video
+
+    return video.model_copy(update={"video_path": path, "sha256": digest})
+
+
+def _render_key(renders: ResultCache, audio_url: str, avatar_url: str) -> str:
+    """重複排除のキー（音声・アバター画像の内容ハッシュ + Talkの設定）"""
+    return renders.make_key(
+        "did",
+        renders.content_hash(audio_url),
+        renders.content_hash(avatar_url),
+        _talk_payload(audio_url, avatar_url)["config"]
+    )
+
+
+# 署名付きURL（S3など）のクエリパラメータ。有効期限があり、HEADでは署名が合わず403になる
+_PRESIGNED_PARAMS = {"x-amz-signature", "x-amz-expires", "signature", "expires"}
+
+
+def _is_presigned(url: str) -> bool:
+    """署名付きURL（期限付き）か"""
+    return any(name.lower() in _PRESIGNED_PARAMS for name in parse_qs(urlsplit(url).query))
+
+
+def _url_available(url: str) -> bool:
+    """URLの動画を取得できるか（先頭1バイトだけの範囲指定GETで確認）"""
+    try:
+        with get_session("download").get(
+            url, headers={"Range": "bytes=0-0"}, stream=True, timeout=10
+        ) as response:
+            return response.status_code in (200, 206)
+    except requests.RequestException:
+        return False
+
+
+def _load_render(
+    renders: ResultCache,
+    key: str,
+    video_cache: Optional[DiskCache],
+    check_url: bool = True
+) -> Optional[GeneratedVideo]:
+    """
+    保存済みの動画を取得
+
+    ローカルのコピーがあればそのパスを設定する。コピーがない場合、署名付きURLは
+    いずれ失効するため使わず、それ以外のURLは取得できることを確認して返す。
+    使えない結果は無効にしてNoneを返す
+
+    Args:
+        check_url: ローカルのコピーがない場合にURLを確認するか（False: コピーがなければNone）
+    """
+    meta = renders.get(key)
+    if not meta:
+        return None
+
+    video = GeneratedVideo(**meta)
+
+    if video.sha256 and video_cache:
+        entry = video_cache.get(video.sha256)
+        if entry is not None and entry[1]:
+            return video.model_copy(update={"video_path": entry[1]})
+
+    if not check_url:
+        return None
+
+    url = str(video.video_url)
+    if _is_presigned(url) or not _url_available(url):
+        logger.info("保存済みの動画のローカルのコピーがなく、URLも使えないため、生成し直します")
+        renders.invalidate(key)
+        return None
+
+    return video
+
+
+def _store_render(renders: ResultCache, key: str, video: GeneratedVideo) -> None:
+    """生成した動画を保存（ローカルのパスは動画キャッシュから sha256 で引き直す）"""
+    renders.put(key, video.model_dump(mode="json", exclude={"video_path"}))
+
+
+def _parse_result(
+    data: dict
+) -> Optional[Tuple[Optional[str], Optional[float], Optional[Exception]]]:
+    """
+    Talkの状態から結果を取り出す
+
+    Returns:
+        (video_url, duration, error)。処理中ならNone
+    """
+    status = data.get("status")
+
+    if status == "done":
+        video_url = data.get("result_url")
+        if not video_url:
+            return (None, None, VideoCreationError("動画URLが取得できませんでした"))
+        return (video_url, data.get("duration"), None)
+
+    if status == "error":
+        error_info = data.get("error", {})
+        error_desc = error_info.get("description", "Unknown error")
+        return (None, None, VideoCreationError(f"D-ID error: {error_desc}"))
+
+    return None
+
+
+def _webhook_wait_seconds(
+    predicted: Optional[float],
+    deadline: float,
+    fallback_factor: float,
+    min_wait: float
+) -> float:
+    """Webhookを待つ時間（過ぎたらポーリングに切り替える）"""
+    if not predicted:
+        return deadline
+    return min(deadline, max(predicted * fallback_factor, min_wait))
+
+
 class DIDClient:
     """
     D-ID API クライアント
@@ -46,20 +237,46 @@ class DIDClient:
         # 設定読み込み
         config = get_config()
         self.base_url = config.get("did.api_url", "https://api.d-id.com")
-        self.poll_interval = config.get("did.poll_interval_seconds", 5)
-        self.poll_timeout = config.get("did.poll_timeout_seconds", 300)
+
+        # ポーリング（音声の長さから所要時間を予測し、期限も長さに合わせる）
+        self.poll_policy = get_poll_policy("did")
+
+        # 共有セッション（全Talkのリクエストで接続を再利用）
+        self.session = get_session("did")
+
+        # Webhook受信（無効ならNone、ポーリングのみ）
+        self.webhook = get_webhook_receiver("did")
+        self.webhook_fallback_factor = config.get("did.webhook.fallback_factor", 1.5)
+        self.webhook_min_wait = config.get("did.webhook.min_wait_seconds", 60)
+
+        # 完成した動画の保存先（cache.videos が無効ならNone）
+        self.video_cache = get_cache("videos")
+        self.download_options = _download_options()
+
+        # 重複排除（cache.renders が無効ならNone）
+        self.renders = get_result_cache("renders")
+
+        # 認証ヘッダー（リクエストごとに作り直さない）
+        self._headers = {"Authorization": f"Basic {self.api_key}"}
+        self._json_headers = {**self._headers, "Content-Type": "application/json"}
 
     def generate(
         self,
         audio_url: str,
-        avatar_url: str
+        avatar_url: str,
+        audio_duration: Optional[float] = None
     ) -> Tuple[Optional[GeneratedVideo], Optional[Exception]]:
         """
         リップシンク動画を生成
 
+        音声・アバター画像の内容とTalkの設定が同じ動画を生成済みなら、Talkを作らずに返す。
+        同じ組み合わせを生成中の呼び出しがあれば、その結果を待つ（cache.renders が有効な場合）
+
         Args:
             audio_url: 音声ファイルURL
             avatar_url: アバター画像URL
+            audio_duration: 音声の長さ（秒）。指定するとポーリングの間隔と期限を
+                予測所要時間に合わせる（省略時は短い間隔から確認し、期限は poll_timeout_seconds）
 
         Returns:
             (video, error):
@@ -72,6 +289,50 @@ class DIDClient:
             ...     avatar_url="https://example.com/avatar.jpg"
             ... )
         """
+        if self.renders is None:
+            return self._generate(audio_url, avatar_url, audio_duration)
+
+        try:
+            key = _render_key(self.renders, audio_url, avatar_url)
+        except requests.RequestException as e:
+            logger.warning(f"音声・画像の内容を確認できないため、重複排除を使用しません: {e}")
+            return self._generate(audio_url, avatar_url, audio_duration)
+
+        # URLの確認は合流の前に（確認の間、同じ組み合わせの呼び出しを待たせない）
+        video = _load_render(self.renders, key, self.video_cache)
+        if video:
+            logger.info(f"動画キャッシュヒット（同じ音声・アバター）: {video.video_url}")
+            return (video, None)
+
+        future, owner = self.renders.join(key)
+        if not owner:
+            logger.info("同じ音声・アバターの生成中のTalkを待機")
+            return future.result()
+
+        result = (None, VideoCreationError("動画生成が中断されました"))
+        try:
+            # 確認の後に他の呼び出しが保存した動画（ローカルのコピーのみ）
+            video = _load_render(self.renders, key, self.video_cache, check_url=False)
+            if video:
+                logger.info(f"動画キャッシュヒット（同じ音声・アバター）: {video.video_url}")
+                result = (video, None)
+                return result
+
+            result = self._generate(audio_url, avatar_url, audio_duration)
+            if result[0]:
+                _store_render(self.renders, key, result[0])
+            return result
+        finally:
+            # 合流した呼び出しにも同じ結果を渡す
+            self.renders.finish(key, result)
+
+    def _generate(
+        self,
+        audio_url: str,
+        avatar_url: str,
+        audio_duration: Optional[float]
+    ) -> Tuple[Optional[GeneratedVideo], Optional[Exception]]:
+        """動画を生成（Talkの作成 → 完了待機 → ローカルへ保存）"""
         try:
             logger.info("動画生成リクエスト開始")
 
@@ -82,8 +343,14 @@ class DIDClient:
 
             logger.info(f"Talk ID取得: {talk_id}")
 
-            # ポーリング（完了待機）
-            video_url, duration, err = self._poll_status(talk_id)
+            # 完了待機（Webhook → 届かなければポーリング）
+            started_at = time.time()
+            result = None
+            if self.webhook:
+                result = self._wait_webhook(talk_id, audio_duration)
+            if result is None:
+                result = self._poll_status(talk_id, audio_duration, started_at)
+            video_url, duration, err = result
             if err:
                 return (None, err)
 
@@ -94,6 +361,9 @@ class DIDClient:
                 resolution="1920x1080"  # D-IDのデフォルト解像度
             )
 
+            # URLの期限が切れる前にローカルへ保存
+            video = _save_video(video, self.video_cache, self.download_options)
+
             logger.info(f"動画生成成功: {video_url}")
             return (video, None)
 
@@ -119,30 +389,29 @@ class DIDClient:
         try:
             url = f"{self.base_url}/talks"
 
-            headers = {
-                "Authorization": f"Basic {self.api_key}",
-                "Content-Type": "application/json"
-            }
-
-            payload = {
-                "script": {
-                    "type": "audio",
-                    "audio_url": audio_url
-                },
-                "source_url": avatar_url,
-                "config": {
-                    "stitch": True,
-                    "result_format": "mp4"
-                }
-            }
-
-            response = requests.post(
+            response = self.session.post(
                 url,
-                headers=headers,
-                json=payload,
+                headers=self._json_headers,
+                json=_talk_payload(
+                    audio_url,
+                    avatar_url,
+                    self.webhook.callback_url if self.webhook else None
+                ),
                 timeout=30
             )
 
+            if response.status_code == 429:
+                retry_after = parse_retry_after(response.headers.get("Retry-After"))
+                logger.warning(f"D-ID レート制限 (429, Retry-After: {retry_after})")
+                return (
+                    None,
+                    RateLimitError(
+                        "動画生成リクエスト失敗（レート制限）",
+                        retry_after=retry_after,
+                        response=response.text
+                    )
+                )
+
             if response.status_code != 201:
                 error_msg = response.text
                 logger.error(f"D-ID API error ({response.status_code}): {error_msg}")
@@ -172,43 +441,102 @@ class DIDClient:
         except Exception as e:
             return (None, e)
 
+    def _wait_webhook(
+        self,
+        talk_id: str,
+        audio_duration: Optional[float] = None
+    ) -> Optional[Tuple[Optional[str], Optional[float], Optional[Exception]]]:
+        """
+        Webhookで完了通知を待つ
+
+        予測所要時間 × did.webhook.fallback_factor を過ぎても届かなければNoneを返す
+        （呼び出し側でポーリングに切り替える）
+
+        Returns:
+            (video_url, duration, error)。届かなかった場合はNone
+        """
+        start_time = time.time()
+        schedule, deadline = self.poll_policy.plan(audio_duration)
+        wait_seconds = _webhook_wait_seconds(
+            schedule.predicted_seconds,
+            deadline,
+            self.webhook_fallback_factor,
+            self.webhook_min_wait
+        )
+
+        logger.info(f"Webhook待機（最大{wait_seconds:.0f}秒）: {talk_id}")
+
+        while True:
+            timeout = max(0.0, wait_seconds - (time.time() - start_time))
+            try:
+                result = _parse_result(self.webhook.expect(talk_id).result(timeout=timeout))
+            except FutureTimeoutError:
+                self.webhook.discard(talk_id)
+                logger.warning(f"Webhookが届かないためポーリングに切り替えます: {talk_id}")
+                return None
+
+            # 途中経過の通知は無視して待ち続ける
+            if result is not None:
+                break
+
+        elapsed = time.time() - start_time
+        logger.info(f"動画生成完了（{elapsed:.1f}秒、Webhook）")
+        if result[0]:
+            self.poll_policy.model.observe(audio_duration or result[1] or 0.0, elapsed)
+        return result
+
     def _poll_status(
         self,
-        talk_id: str
+        talk_id: str,
+        audio_duration: Optional[float] = None,
+        started_at: Optional[float] = None
     ) -> Tuple[Optional[str], Optional[float], Optional[Exception]]:
         """
         ステータスポーリング
 
+        予測完了時刻の少し前まで待ってから、短い間隔（ジッター付きバックオフ）で確認する。
+        完了したら所要時間を記録し、次回以降の予測に使う
+
         Args:
             talk_id: Talk ID
+            audio_duration: 音声の長さ（秒、None: 不明）
+            started_at: 待機開始時刻（time.time()、Webhookから切り替えた場合。None: 現在）
 
         Returns:
             (video_url, duration, error): 動画URL、時間、またはエラー
         """
-        start_time = time.time()
+        start_time = started_at or time.time()
+        schedule, deadline = self.poll_policy.plan(audio_duration)
         attempt = 0
 
-        logger.info(f"ポーリング開始（最大{self.poll_timeout}秒）")
+        if schedule.predicted_seconds:
+            logger.info(
+                f"ポーリング開始（予測{schedule.predicted_seconds:.0f}秒 / 最大{deadline:.0f}秒）"
+            )
+        else:
+            logger.info(f"ポーリング開始（最大{deadline:.0f}秒）")
+
+        def wait() -> None:
+            elapsed = time.time() - start_time
+            time.sleep(max(0.0, min(schedule.next_delay(elapsed), deadline - elapsed)))
 
-        while time.time() - start_time < self.poll_timeout:
+        wait()
+
+        while time.time() - start_time < deadline:
             attempt += 1
 
             try:
                 url = f"{self.base_url}/talks/{talk_id}"
 
-                headers = {
-                    "Authorization": f"Basic {self.api_key}"
-                }
-
-                response = requests.get(
+                response = self.session.get(
                     url,
-                    headers=headers,
+                    headers=self._headers,
                     timeout=10
                 )
 
                 if response.status_code != 200:
                     logger.warning(f"ステータス確認エラー ({response.status_code})")
-                    time.sleep(self.poll_interval)
+                    wait()
                     continue
 
                 data = response.json()
@@ -225,7 +553,12 @@ class DIDClient:
                         return (None, None, VideoCreationError("動画URLが取得できませんでした"))
 
                     elapsed = time.time() - start_time
-                    logger.info(f"動画生成完了（{elapsed:.1f}秒）")
+                    logger.info(f"動画生成完了（{elapsed:.1f}秒、確認{attempt}回）")
+
+                    # 次回以降の予測に使う（音声の長さが不明なら動画の長さで代用）。
+                    # 最初の確認で完了済みなら実際より長めに記録されるが、
+                    # 次回の最初の確認は lead_fraction 倍の時点になるため予測は縮んでいく
+                    self.poll_policy.model.observe(audio_duration or duration or 0.0, elapsed)
                     return (video_url, duration, None)
 
                 elif status == "error":
@@ -236,25 +569,548 @@ class DIDClient:
 
                 elif status in ["created", "started", "processing"]:
                     # 処理中 - 待機して再試行
-                    time.sleep(self.poll_interval)
+                    wait()
 
                 else:
                     # 不明なステータス
                     logger.warning(f"不明なステータス: {status}")
-                    time.sleep(self.poll_interval)
+                    wait()
 
             except requests.Timeout:
                 logger.warning("ステータス確認タイムアウト、リトライします")
-                time.sleep(self.poll_interval)
+                wait()
 
             except requests.RequestException as e:
                 logger.warning(f"ステータス確認エラー: {e}、リトライします")
-                time.sleep(self.poll_interval)
+                wait()
 
         # タイムアウト
         elapsed = time.time() - start_time
         return (
             None,
             None,
-            TimeoutError(f"動画生成タイムアウト（{elapsed:.1f}秒 / 最大{self.poll_timeout}秒）")
+            TimeoutError(f"動画生成タイムアウト（{elapsed:.1f}秒 / 最大{deadline:.0f}秒）")
+        )
+
+
+class AsyncDIDClient:
+    """
+    D-ID API 非同期クライアント
+
+    DIDClient と同じ generate(audio_url, avatar_url) を持つ。
+    待機は asyncio.sleep のため、1つのイベントループで多数のTalkを
+    スレッドを使わずに同時に追跡できる（HTTP接続は共有セッションで再利用）
+
+    Example:
+        >>> client = AsyncDIDClient(api_key="did_xxxxx")
+        >>> video, err = await client.generate(
+        ...     audio_url="https://...",
+        ...     avatar_url="https://..."
+        ... )
+    """
+
+    def __init__(self, api_key: str):
+        """
+        初期化
+
+        Args:
+            api_key: D-ID APIキー
+        """
+        self.api_key = api_key
+
+        # 設定読み込み
+        config = get_config()
+        self.base_url = config.get("did.api_url", "https://api.d-id.com")
+
+        # ポーリング（DIDClient と実績を共有）
+        self.poll_policy = get_poll_policy("did")
+
+        # Webhook受信（DIDClient と共有、無効ならNone）
+        self.webhook = get_webhook_receiver("did")
+        self.webhook_fallback_factor = config.get("did.webhook.fallback_factor", 1.5)
+        self.webhook_min_wait = config.get("did.webhook.min_wait_seconds", 60)
+
+        # 完成した動画の保存先（cache.videos が無効ならNone）
+        self.video_cache = get_cache("videos")
+        self.download_options = _download_options()
+
+        # 重複排除（cache.renders が無効ならNone）
+        self.renders = get_result_cache("renders")
+
+        # 認証ヘッダー（リクエストごとに作り直さない）
+        self._headers = {"Authorization": f"Basic {self.api_key}"}
+        self._json_headers = {**self._headers, "Content-Type": "application/json"}
+
+    async def generate(
+        self,
+        audio_url: str,
+        avatar_url: str,
+        audio_duration: Optional[float] = None
+    ) -> Tuple[Optional[GeneratedVideo], Optional[Exception]]:
+        """
+        リップシンク動画を生成
+
+        Args:
+            audio_url: 音声ファイルURL
+            avatar_url: アバター画像URL
+            audio_duration: 音声の長さ（秒、DIDClient.generate と同じ）
+
+        Returns:
+            (video, error):
+                - 成功: (GeneratedVideo, None)
+                - 失敗: (None, Exception)
+
+        Example:
+            >>> results = await asyncio.gather(*[
+            ...     client.generate(url, avatar_url) for url in audio_urls
+            ... ])
+        """
+        if self.renders is None:
+            return await self._generate(audio_url, avatar_url, audio_duration)
+
+        loop = asyncio.get_running_loop()
+        try:
+            key = await loop.run_in_executor(
+                None, _render_key, self.renders, audio_url, avatar_url
+            )
+        except requests.RequestException as e:
+            logger.warning(f"音声・画像の内容を確認できないため、重複排除を使用しません: {e}")
+            return await self._generate(audio_url, avatar_url, audio_duration)
+
+        # URLの確認は合流の前に（確認の間、同じ組み合わせの呼び出しを待たせない）
+        video = await loop.run_in_executor(
+            None, _load_render, self.renders, key, self.video_cache
+        )
+        if video:
+            logger.info(f"動画キャッシュヒット（同じ音声・アバター）: {video.video_url}")
+            return (video, None)
+
+        future, owner = self.renders.join(key)
+        if not owner:
+            logger.info("同じ音声・アバターの生成中のTalkを待機")
+            return await asyncio.wrap_future(future)
+
+        result = (None, VideoCreationError("動画生成が中断されました"))
+        try:
+            # 確認の後に他の呼び出しが保存した動画（ローカルのコピーのみ）
+            video = await loop.run_in_executor(
+                None, _load_render, self.renders, key, self.video_cache, False
+            )
+            if video:
+                logger.info(f"動画キャッシュヒット（同じ音声・アバター）: {video.video_url}")
+                result = (video, None)
+                return result
+
+            result = await self._generate(audio_url, avatar_url, audio_duration)
+            if result[0]:
+                _store_render(self.renders, key, result[0])
+            return result
+        finally:
+            # 合流した呼び出しにも同じ結果を渡す
+            self.renders.finish(key, result)
+
+    async def _generate(
+        self,
+        audio_url: str,
+        avatar_url: str,
+        audio_duration: Optional[float]
+    ) -> Tuple[Optional[GeneratedVideo], Optional[Exception]]:
+        """動画を生成（Talkの作成 → 完了待機 → ローカルへ保存）"""
+        try:
+            logger.info("動画生成リクエスト開始")
+
+            talk_id, err = await self._create_talk(audio_url, avatar_url)
+            if err:
+                return (None, err)
+
+            logger.info(f"Talk ID取得: {talk_id}")
+
+            # 完了待機（Webhook → 届かなければポーリング）
+            started_at = asyncio.get_running_loop().time()
+            result = None
+            if self.webhook:
+                result = await self._wait_webhook(talk_id, audio_duration)
+            if result is None:
+                result = await self._poll_status(talk_id, audio_duration, started_at)
+            video_url, duration, err = result
+            if err:
+                return (None, err)
+
+            video = GeneratedVideo(
+                video_url=video_url,
+                duration_seconds=duration or 0.0,
+                resolution="1920x1080"  # D-IDのデフォルト解像度
+            )
+
+            # URLの期限が切れる前にローカルへ保存（ファイル書き込みはスレッドで）
+            video = await asyncio.get_running_loop().run_in_executor(
+                None, _save_video, video, self.video_cache, self.download_options
+            )
+
+            logger.info(f"動画生成成功: {video_url}")
+            return (video, None)
+
+        except Exception as e:
+            logger.error(f"動画生成エラー: {e}", exc_info=True)
+            return (None, e)
+
+    async def _create_talk(
+        self,
+        audio_url: str,
+        avatar_url: str
+    ) -> Tuple[Optional[str], Optional[Exception]]:
+        """
+        動画生成リクエスト
+
+        Returns:
+            (talk_id, error): Talk IDまたはエラー
+        """
+        try:
+            session = get_async_session("did")
+
+            async with session.post(
+                f"{self.base_url}/talks",
+                headers=self._json_headers,
+                json=_talk_payload(
+                    audio_url,
+                    avatar_url,
+                    self.webhook.callback_url if self.webhook else None
+                ),
+                timeout=aiohttp.ClientTimeout(total=30)
+            ) as response:
+                if response.status == 429:
+                    retry_after = parse_retry_after(response.headers.get("Retry-After"))
+                    logger.warning(f"D-ID レート制限 (429, Retry-After: {retry_after})")
+                    return (
+                        None,
+                        RateLimitError(
+                            "動画生成リクエスト失敗（レート制限）",
+                            retry_after=retry_after,
+                            response=await response.text()
+                        )
+                    )
+
+                if response.status != 201:
+                    error_msg = await response.text()
+                    logger.error(f"D-ID API error ({response.status}): {error_msg}")
+                    return (
+                        None,
+                        APIError(
+                            "動画生成リクエスト失敗",
+                            status_code=response.status,
+                            response=error_msg
+                        )
+                    )
+
+                data = await response.json(content_type=None)
+
+            talk_id = data.get("id")
+            if not talk_id:
+                return (None, VideoCreationError("Talk IDが取得できませんでした"))
+
+            return (talk_id, None)
+
+        except asyncio.TimeoutError:
+            return (None, TimeoutError("動画生成リクエストタイムアウト（30秒）"))
+
+        except aiohttp.ClientError as e:
+            return (None, APIError(f"HTTP error: {e}"))
+
+    async def _wait_webhook(
+        self,
+        talk_id: str,
+        audio_duration: Optional[float] = None
+    ) -> Optional[Tuple[Optional[str], Optional[float], Optional[Exception]]]:
+        """
+        Webhookで完了通知を待つ（DIDClient._wait_webhook と同じ）
+
+        Returns:
+            (video_url, duration, error)。届かなかった場合はNone
+        """
+        loop = asyncio.get_running_loop()
+        start_time = loop.time()
+        schedule, deadline = self.poll_policy.plan(audio_duration)
+        wait_seconds = _webhook_wait_seconds(
+            schedule.predicted_seconds,
+            deadline,
+            self.webhook_fallback_factor,
+            self.webhook_min_wait
+        )
+
+        logger.info(f"Webhook待機（最大{wait_seconds:.0f}秒）: {talk_id}")
+
+        while True:
+            timeout = max(0.0, wait_seconds - (loop.time() - start_time))
+            future = asyncio.wrap_future(self.webhook.expect(talk_id))
+            try:
+                result = _parse_result(await asyncio.wait_for(future, timeout))
+            except asyncio.TimeoutError:
+                self.webhook.discard(talk_id)
+                logger.warning(f"Webhookが届かないためポーリングに切り替えます: {talk_id}")
+                return None
+
+            # 途中経過の通知は無視して待ち続ける
+            if result is not None:
+                break
+
+        elapsed = loop.time() - start_time
+        logger.info(f"動画生成完了（{elapsed:.1f}秒、Webhook）: {talk_id}")
+        if result[0]:
+            self.poll_policy.model.observe(audio_duration or result[1] or 0.0, elapsed)
+        return result
+
+    async def _poll_status(
+        self,
+        talk_id: str,
+        audio_duration: Optional[float] = None,
+        started_at: Optional[float] = None
+    ) -> Tuple[Optional[str], Optional[float], Optional[Exception]]:
+        """
+        ステータスポーリング（DIDClient._poll_status と同じスケジュール）
+
+        Args:
+            talk_id: Talk ID
+            audio_duration: 音声の長さ（秒、None: 不明）
+            started_at: 待機開始時刻（loop.time()、Webhookから切り替えた場合。None: 現在）
+
+        Returns:
+            (video_url, duration, error): 動画URL、時間、またはエラー
+        """
+        loop = asyncio.get_running_loop()
+        start_time = started_at or loop.time()
+        schedule, deadline = self.poll_policy.plan(audio_duration)
+        url = f"{self.base_url}/talks/{talk_id}"
+        attempt = 0
+
+        logger.info(f"ポーリング開始（最大{deadline:.0f}秒）: {talk_id}")
+
+        while True:
+            elapsed = loop.time() - start_time
+            if elapsed >= deadline:
+                break
+            await asyncio.sleep(min(schedule.next_delay(elapsed), deadline - elapsed))
+
+            attempt += 1
+
+            try:
+                session = get_async_session("did")
+
+                async with session.get(
+                    url,
+                    headers=self._headers,
+                    timeout=aiohttp.ClientTimeout(total=10)
+                ) as response:
+                    if response.status != 200:
+                        logger.warning(f"ステータス確認エラー ({response.status})")
+                        continue
+
+                    data = await response.json(content_type=None)
+
+            except asyncio.TimeoutError:
+                logger.warning("ステータス確認タイムアウト、リトライします")
+                continue
+
+            except aiohttp.ClientError as e:
+                logger.warning(f"ステータス確認エラー: {e}、リトライします")
+                continue
+
+            status = data.get("status")
+            logger.debug(f"ポーリング {attempt}回目: status={status}")
+
+            if status == "done":
+                video_url = data.get("result_url")
+                duration = data.get("duration")
+
+                if not video_url:
+                    return (None, None, VideoCreationError("動画URLが取得できませんでした"))
+
+                elapsed = loop.time() - start_time
+                logger.info(f"動画生成完了（{elapsed:.1f}秒、確認{attempt}回）: {talk_id}")
+                self.poll_policy.model.observe(audio_duration or duration or 0.0, elapsed)
+                return (video_url, duration, None)
+
+            if status == "error":
+                error_info = data.get("error", {})
+                error_desc = error_info.get("description", "Unknown error")
+                return (None, None, VideoCreationError(f"D-ID error: {error_desc}"))
+
+            if status not in ["created", "started", "processing"]:
+                logger.warning(f"不明なステータス: {status}")
+
+        elapsed = loop.time() - start_time
+        return (
+            None,
+            None,
+            TimeoutError(f"動画生成タイムアウト（{elapsed:.1f}秒 / 最大{deadline:.0f}秒）")
+        )
+
+
+class DIDBatchScheduler:
+    """
+    D-IDのバッチ実行スケジューラー
+
+    ジョブを優先度付きキュー（優先度が同じなら投入順）に入れ、
+    max_in_flight 件のTalkを同時に処理する。Talkの作成はトークンバケットで
+    rate_per_minute 以下に抑え、429 を受けたら Retry-After の間すべての作成を止めて
+    そのジョブを先頭に戻す
+
+    Example:
+        >>> scheduler = DIDBatchScheduler(AsyncDIDClient(api_key="did_xxxxx"))
+        >>> results = await scheduler.run([
+        ...     DIDJob(audio_url=url, avatar_url=avatar_url) for url in audio_urls
+        ... ])
+        >>> for result in results:
+        ...     print(result.job_id, result.succeeded, result.error)
+    """
+
+    def __init__(
+        self,
+        client: AsyncDIDClient,
+        max_in_flight: Optional[int] = None,
+        rate_per_minute: Optional[float] = None,
+        burst: Optional[int] = None,
+        max_rate_limit_retries: Optional[int] = None
+    ):
+        """
+        初期化（省略した値は config.yaml の did.scheduler に従う）
+
+        Args:
+            client: 非同期クライアント
+            max_in_flight: 同時に処理するTalk数
+            rate_per_minute: 1分あたりのTalk作成数の上限
+            burst: 連続して作成できる数
+            max_rate_limit_retries: 429 で再試行する回数（ジョブごと）
+        """
+        config = get_config()
+
+        self.client = client
+        self.max_in_flight = max_in_flight or config.get("did.scheduler.max_in_flight", 4)
+        self.max_retries = (
+            max_rate_limit_retries if max_rate_limit_retries is not None
+            else config.get("did.scheduler.max_rate_limit_retries", 5)
+        )
+        self.default_retry_after = config.get("did.scheduler.default_retry_after_seconds", 10)
+
+        rate = rate_per_minute or config.get("did.scheduler.rate_per_minute", 30)
+        self.bucket = TokenBucket(
+            rate_per_second=rate / 60.0,
+            capacity=burst or config.get("did.scheduler.burst", self.max_in_flight)
         )
+
+        self._queue: Optional[asyncio.PriorityQueue] = None
+        self._workers: List[asyncio.Task] = []
+        self._sequence = 0
+
+    def _ensure_workers(self) -> None:
+        """実行中のイベントループでキューとワーカーを用意"""
+        if self._queue is None:
+            self._queue = asyncio.PriorityQueue()
+
+        self._workers = [task for task in self._workers if not task.done()]
+        while len(self._workers) < self.max_in_flight:
+            self._workers.append(asyncio.ensure_future(self._worker()))
+
+    async def submit(self, job: DIDJob) -> "asyncio.Future[DIDJobResult]":
+        """
+        ジョブを投入
+
+        Args:
+            job: 動画生成ジョブ
+
+        Returns:
+            結果（DIDJobResult）を返す Future
+        """
+        self._ensure_workers()
+
+        self._sequence += 1
+        if job.job_id is None:
+            job = job.model_copy(update={"job_id": str(self._sequence)})
+
+        future = asyncio.get_running_loop().create_future()
+        submitted = time.monotonic()
+        await self._queue.put((job.priority, self._sequence, job, future, submitted, 0))
+        return future
+
+    async def run(self, jobs: Iterable[DIDJob]) -> List[DIDJobResult]:
+        """
+        ジョブをまとめて実行し、すべての結果を待つ
+
+        Args:
+            jobs: 動画生成ジョブ
+
+        Returns:
+            投入順の結果
+        """
+        futures = [await self.submit(job) for job in jobs]
+        results = await asyncio.gather(*futures)
+
+        succeeded = sum(1 for result in results if result.succeeded)
+        logger.info(f"バッチ実行完了: {succeeded}/{len(results)}件成功")
+        return list(results)
+
+    async def close(self) -> None:
+        """ワーカーを停止（キューに残ったジョブは実行しない）"""
+        for task in self._workers:
+            task.cancel()
+        await asyncio.gather(*self._workers, return_exceptions=True)
+        self._workers = []
+
+    async def _worker(self) -> None:
+        """キューからジョブを取り出して1件ずつ処理"""
+        while True:
+            priority, sequence, job, future, submitted, attempts = await self._queue.get()
+
+            try:
+                if future.cancelled():
+                    continue
+
+                await self.bucket.acquire()
+                attempts += 1
+                started = time.monotonic()
+
+                video, err = await self.client.generate(
+                    audio_url=job.audio_url,
+                    avatar_url=job.avatar_url,
+                    audio_duration=job.audio_duration
+                )
+
+                if isinstance(err, RateLimitError) and attempts <= self.max_retries:
+                    # 全体を止めてから、同じ順位でキューに戻す
+                    self.bucket.pause(err.retry_after or self.default_retry_after)
+                    await self._queue.put((priority, sequence, job, future, submitted, attempts))
+                    continue
+
+                result = DIDJobResult(
+                    job_id=job.job_id,
+                    video=video,
+                    error=str(err) if err else None,
+                    attempts=attempts,
+                    queued_seconds=started - submitted,
+                    elapsed_seconds=time.monotonic() - submitted
+                )
+
+                if result.succeeded:
+                    logger.info(f"ジョブ完了: {job.job_id}（{result.elapsed_seconds:.1f}秒）")
+                else:
+                    logger.warning(f"ジョブ失敗: {job.job_id}: {result.error}")
+
+                if not future.done():
+                    future.set_result(result)
+
+            except asyncio.CancelledError:
+                if not future.done():
+                    future.cancel()
+                raise
+
+            except Exception as e:
+                logger.error(f"ジョブ処理エラー: {job.job_id}: {e}", exc_info=True)
+                if not future.done():
+                    future.set_result(DIDJobResult(
+                        job_id=job.job_id,
+                        error=str(e),
+                        attempts=attempts,
+                        elapsed_seconds=time.monotonic() - submitted
+                    ))
+
+            finally:
+                self._queue.task_done()
@@ -3,7 +3,8 @@ ElevenLabs API - 音声生成（声クローン）
 
 機能:
   - 音声生成（声クローン使用）
-  - Cloudinaryアップロード
+  - ラウドネス正規化（Raw PCMで受信し、正規化後にエンコード）
+  - 音声ファイルのアップロード（audio_host.backend: Cloudinary / D-ID / S3）
   - エラーハンドリング
 
 参考: resources/声のクローニング実装ガイド.md
@@ -16,14 +17,16 @@ from pathlib import Path
 
 from elevenlabs import VoiceSettings
 from elevenlabs.client import ElevenLabs
-import cloudinary
-import cloudinary.uploader
 from mutagen import File as MutagenFile
 
 from ..models.schemas import GeneratedAudio, CloudinaryConfig
-from ..utils.errors import AudioGenerationError, CloudinaryError
+from ..utils.errors import AudioGenerationError
 from ..utils.logger import get_logger
 from ..utils.config import get_config
+from ..utils.audio import (
+    MP3StreamInfo, PCMWavSink, can_encode, encode_audio, normalize_loudness
+)
+from ..utils.audio_host import AudioHost, create_audio_host
 
 logger = get_logger(__name__)
 
@@ -48,7 +51,8 @@ class ElevenLabsClient:
         self,
         api_key: str,
         voice_id: str,
-        cloudinary_config: Optional[CloudinaryConfig] = None
+        cloudinary_config: Optional[CloudinaryConfig] = None,
+        audio_host: Optional[AudioHost] = None
     ):
         """
         初期化
@@ -57,6 +61,7 @@ class ElevenLabsClient:
             api_key: ElevenLabs APIキー
             voice_id: 声クローンID
             cloudinary_config: Cloudinary設定
+            audio_host: 音声のアップロード先（省略時は config.yaml の audio_host.backend）
         """
         self.api_key = api_key
         self.voice_id = voice_id
@@ -65,13 +70,18 @@ class ElevenLabsClient:
         # ElevenLabsクライアント初期化
         self.client = ElevenLabs(api_key=api_key)
 
-        # Cloudinary設定
-        if cloudinary_config:
-            cloudinary.config(
-                cloud_name=cloudinary_config.cloud_name,
-                api_key=cloudinary_config.api_key,
-                api_secret=cloudinary_config.api_secret
-            )
+        # ラウドネス正規化（有効な場合は Raw PCM で受信）
+        config = get_config()
+        self.loudness_enabled = config.get("loudness.enabled", False)
+        self.loudness_options = {
+            "target_db": config.get("loudness.target_db", -18.0),
+            "max_gain_db": config.get("loudness.max_gain_db", 20.0),
+            "ceiling_db": config.get("loudness.ceiling_db", -1.0),
+        }
+        self.pcm_sample_rate = config.get("elevenlabs.pcm_sample_rate", 22050)
+
+        # 音声のアップロード先
+        self.audio_host = audio_host or create_audio_host(cloudinary_config=cloudinary_config)
 
     def generate(
         self,
@@ -105,6 +115,10 @@ class ElevenLabsClient:
             logger.info(f"音声生成開始: {len(text)}文字")
 
             # 音声生成
+            options = {}
+            if self.loudness_enabled:
+                options["output_format"] = f"pcm_{self.pcm_sample_rate}"
+
             response = self.client.text_to_speech.convert(
                 voice_id=self.voice_id,
                 text=text,
@@ -114,31 +128,43 @@ class ElevenLabsClient:
                     similarity_boost=similarity_boost,
                     style=style,
                     use_speaker_boost=use_speaker_boost
-                )
+                ),
+                **options
             )
 
-            # 一時ファイルに保存
-            temp_file = tempfile.NamedTemporaryFile(
-                delete=False,
-                suffix=".mp3"
-            )
+            if self.loudness_enabled:
+                audio_path, duration, frame_count, sample_rate = self._save_normalized(response)
+                file_size = os.path.getsize(audio_path)
+            else:
+                # 一時ファイルに保存
+                temp_file = tempfile.NamedTemporaryFile(
+                    delete=False,
+                    suffix=".mp3"
+                )
+
+                # ストリーミングレスポンスを保存（MP3フレームを解析しながら）
+                mp3_info = MP3StreamInfo()
+                for chunk in response:
+                    temp_file.write(chunk)
+                    mp3_info.feed(chunk)
 
-            # ストリーミングレスポンスを保存
-            for chunk in response:
-                temp_file.write(chunk)
+                temp_file.close()
+                audio_path = temp_file.name
 
-            temp_file.close()
-            audio_path = temp_file.name
+                logger.info("音声生成完了")
 
-            logger.info("音声生成完了")
+                # 音声時間を取得（フレームが解析できなかった場合のみファイルを読む）
+                duration = mp3_info.duration_seconds
+                if not mp3_info.frame_count:
+                    duration = self._get_audio_duration(audio_path)
+                file_size = mp3_info.byte_count
+                frame_count = mp3_info.frame_count or None
+                sample_rate = mp3_info.sample_rate
 
-            # 音声時間を取得
-            duration = self._get_audio_duration(audio_path)
             logger.info(f"音声時間（実測）: {duration:.2f}秒")
 
-            # Cloudinaryにアップロード
-            logger.info("Cloudinaryにアップロード開始")
-            audio_url, err = self._upload_to_cloudinary(audio_path)
+            # アップロード
+            audio_url, err = self.audio_host.upload(audio_path)
 
             if err:
                 # 一時ファイル削除
@@ -148,8 +174,6 @@ class ElevenLabsClient:
                     pass
                 return (None, err)
 
-            logger.info(f"Cloudinaryアップロード完了: {audio_url}")
-
             # 一時ファイル削除
             try:
                 os.unlink(audio_path)
@@ -159,8 +183,12 @@ class ElevenLabsClient:
             # GeneratedAudioオブジェクト作成
             audio = GeneratedAudio(
                 audio_url=audio_url,
+                audio_host=self.audio_host.name,
+                audio_url_expires_at=self.audio_host.url_expires_at(),
                 duration_seconds=duration,
-                file_size_bytes=None  # ElevenLabsはサイズ情報を返さない
+                file_size_bytes=file_size,
+                frame_count=frame_count,
+                sample_rate=sample_rate
             )
 
             logger.info(f"音声生成成功: {audio_url} ({duration:.2f}秒)")
@@ -170,10 +198,52 @@ class ElevenLabsClient:
             logger.error(f"音声生成エラー: {e}", exc_info=True)
             return (None, AudioGenerationError(f"ElevenLabs error: {e}"))
 
+    def _save_normalized(self, response) -> Tuple[str, float, int, int]:
+        """
+        Raw PCMのレスポンスをWAVに保存し、ラウドネスを正規化してエンコード
+
+        エンコードできない場合はWAVのまま返す（Cloudinaryで変換する）
+
+        Args:
+            response: PCM（16bit、モノラル）のチャンクを返すイテレーター
+
+        Returns:
+            (audio_path, duration_seconds, frame_count, sample_rate)
+        """
+        fd, wav_path = tempfile.mkstemp(suffix=".wav")
+        os.close(fd)
+
+        try:
+            with PCMWavSink(wav_path, sample_rate=self.pcm_sample_rate) as sink:
+                for chunk in response:
+                    sink.write(chunk)
+
+            logger.info(f"音声生成完了: {sink.byte_count}バイト")
+
+            loudness, gain_db = normalize_loudness(wav_path, **self.loudness_options)
+            if loudness is not None:
+                logger.info(f"ラウドネス正規化: {loudness:.1f}dB → ゲイン{gain_db:+.1f}dB")
+
+            config = get_config()
+            fmt = config.get("encoding.format", "mp3")
+            if not config.get("encoding.enabled", True) or not can_encode(fmt):
+                return (wav_path, sink.duration_seconds, sink.frame_count, sink.sample_rate)
+
+            encoded_path = encode_audio(wav_path, fmt, config.get("encoding.bitrate_kbps", 96))
+            os.unlink(wav_path)
+            return (encoded_path, sink.duration_seconds, sink.frame_count, sink.sample_rate)
+
+        except BaseException:
+            if os.path.exists(wav_path):
+                os.unlink(wav_path)
+            raise
+
     def _get_audio_duration(self, file_path: str) -> float:
         """
         音声ファイルの時間を取得
 
+        ストリーミング中にMP3フレームを解析できなかった場合のフォールバック
+
         Args:
             file_path: 音声ファイルパス
 
@@ -188,38 +258,3 @@ class ElevenLabsClient:
         except Exception as e:
             logger.warning(f"音声時間取得失敗: {e}")
             return 0.0
-
-    def _upload_to_cloudinary(
-        self,
-        audio_path: str
-    ) -> Tuple[Optional[str], Optional[Exception]]:
-        """
-        Cloudinaryにアップロード
-
-        Args:
-            audio_path: 音声ファイルパス
-
-        Returns:
-            (url, error): URLまたはエラー
-        """
-        try:
-            # 設定読み込み
-            config = get_config()
-            folder = config.get("cloudinary.folder", "ai-avatar/audio")
-
-            result = cloudinary.uploader.upload(
-                audio_path,
-                resource_type="video",  # 音声も"video"
-                format="mp3",
-                folder=folder,
-                overwrite=True,
-                eager=[{"format": "mp3"}],  # MP3変換を強制
-                eager_async=False  # 変換完了まで待機
-            )
-
-            url = result["secure_url"]
-            return (url, None)
-
-        except Exception as e:
-            logger.error(f"Cloudinaryアップロードエラー: {e}", exc_info=True)
-            return (None, CloudinaryError(f"Upload failed: {e}"))
@@ -0,0 +1,207 @@
+"""
+動画生成パイプライン（非同期）
+
+機能:
+  - スクリプト → 音声（Cartesia）→ リップシンク動画（D-ID）を1つのコルーチンで実行
+  - D-IDの上限を超える音声の分割生成（部分ごとに並列で生成し、ストリームコピーで連結）
+  - 同期コードからの実行（共有イベントループ）
+
+音声生成とD-IDの完了待ちがどちらもイベントループ上で動くため、
+複数のジョブを asyncio.gather でスレッドなしに並行実行できる
+"""
+
+import asyncio
+import os
+import tempfile
+from typing import List, Optional, Tuple
+
+from .models.schemas import GeneratedAudio, GeneratedVideo
+from .modules.cartesia import CartesiaClient
+from .modules.did import AsyncDIDClient
+from .utils.cache import DiskCache, get_cache
+from .utils.download import download_file
+from .utils.errors import VideoCreationError
+from .utils.logger import get_logger
+from .utils.event_loop import run_sync
+from .utils.video import can_concat, concat_videos
+
+logger = get_logger(__name__)
+
+
+async def generate_video(
+    script: str,
+    cartesia_client: CartesiaClient,
+    did_client: AsyncDIDClient,
+    avatar_url: str,
+    speed: float = 1.0
+) -> Tuple[Optional[GeneratedAudio], Optional[GeneratedVideo], Optional[Exception]]:
+    """
+    スクリプトから動画を生成
+
+    Args:
+        script: スクリプト
+        cartesia_client: 音声生成クライアント
+        did_client: 動画生成クライアント（非同期）
+        avatar_url: アバター画像URL
+        speed: 再生速度
+
+    Returns:
+        (audio, video, error):
+            - 成功: (GeneratedAudio, GeneratedVideo, None)
+            - 音声生成の失敗: (None, None, Exception)
+            - 動画生成の失敗: (GeneratedAudio, None, Exception)
+
+    Example:
+        >>> audio, video, err = await generate_video(
+        ...     script, cartesia_client, did_client, avatar_url
+        ... )
+    """
+    audio, err = await cartesia_client.generate(script, speed)
+    if err:
+        return (None, None, err)
+
+    video, err = await did_client.generate(
+        audio_url=str(audio.audio_url),
+        avatar_url=avatar_url,
+        audio_duration=audio.duration_seconds
+    )
+    if err:
+        return (audio, None, err)
+
+    return (audio, video, None)
+
+
+def generate_video_sync(
+    script: str,
+    cartesia_client: CartesiaClient,
+    did_client: AsyncDIDClient,
+    avatar_url: str,
+    speed: float = 1.0
+) -> Tuple[Optional[GeneratedAudio], Optional[GeneratedVideo], Optional[Exception]]:
+    """
+    generate_video の同期ラッパー（共有イベントループで実行）
+
+    Example:
+        >>> audio, video, err = generate_video_sync(
+        ...     script, cartesia_client, did_client, avatar_url
+        ... )
+    """
+    return run_sync(generate_video(script, cartesia_client, did_client, avatar_url, speed))
+
+
+async def render_parts(
+    audios: List[GeneratedAudio],
+    did_client: AsyncDIDClient,
+    avatar_url: str
+) -> Tuple[Optional[GeneratedVideo], Optional[Exception]]:
+    """
+    分割した音声ごとの動画を並列に生成し、1本に連結
+
+    所要時間は最も長い部分の生成時間とほぼ同じになる。
+    連結は再エンコードなし（ffmpeg のストリームコピー）で、結果は cache.videos に保存する
+
+    Args:
+        audios: 順番通りの音声（CartesiaClient.generate_parts の結果）
+        did_client: 動画生成クライアント（非同期）
+        avatar_url: アバター画像URL
+
+    Returns:
+        (video, error):
+            - 成功: (GeneratedVideo, None)（部分が1つならその動画、複数なら video_url はNone）
+            - 失敗: (None, Exception)
+
+    Example:
+        >>> parts, err = await cartesia_client.generate_parts(long_script)
+        >>> video, err = await render_parts(parts, did_client, avatar_url)
+    """
+    if len(audios) > 1 and not can_concat():
+        # 生成してから連結できないと分かるとクレジットが無駄になるため先に確認
+        return (None, VideoCreationError("分割生成には ffmpeg が必要です（動画の連結に使用）"))
+
+    results = await asyncio.gather(*[
+        did_client.generate(
+            audio_url=str(audio.audio_url),
+            avatar_url=avatar_url,
+            audio_duration=audio.duration_seconds
+        )
+        for audio in audios
+    ])
+
+    for index, (_, err) in enumerate(results):
+        if err:
+            logger.error(f"部分{index + 1}/{len(results)}の動画生成に失敗: {err}")
+            return (None, err)
+
+    videos = [video for video, _ in results]
+    if len(videos) == 1:
+        return (videos[0], None)
+
+    try:
+        video = await asyncio.get_running_loop().run_in_executor(None, _stitch, videos)
+    except Exception as e:
+        logger.error(f"動画の連結エラー: {e}", exc_info=True)
+        return (None, e)
+
+    return (video, None)
+
+
+def _stitch(videos: List[GeneratedVideo]) -> GeneratedVideo:
+    """部分の動画を連結してキャッシュに保存（ローカルにない部分はダウンロード）"""
+    cache = get_cache("videos")
+    key = None
+    if cache and all(video.sha256 for video in videos):
+        key = DiskCache.make_key("stitched", [video.sha256 for video in videos])
+        entry = cache.get(key)
+        if entry is not None and entry[1]:
+            return GeneratedVideo(video_path=entry[1], **entry[0])
+
+    # キャッシュへ移動できるように同じファイルシステム上で作業
+    work_dir = tempfile.mkdtemp(prefix="stitch_", dir=str(cache.directory) if cache else None)
+    try:
+        paths = []
+        for index, video in enumerate(videos):
+            path = video.video_path
+            if not path or not os.path.exists(path):
+                path = os.path.join(work_dir, f"part{index}.mp4")
+                download_file(str(video.video_url), path)
+            paths.append(path)
+
+        output_path = concat_videos(paths, os.path.join(work_dir, "stitched.mp4"))
+        meta = {
+            "video_url": None,
+            "duration_seconds": sum(video.duration_seconds for video in videos),
+            "resolution": videos[0].resolution
+        }
+
+        if cache and key:
+            video_path = cache.put(key, meta, data_path=output_path, move=True)
+        else:
+            # キャッシュなし: 一時ディレクトリの外に残す
+            fd, video_path = tempfile.mkstemp(suffix=".mp4")
+            os.close(fd)
+            os.replace(output_path, video_path)
+
+    finally:
+        for name in os.listdir(work_dir):
+            os.unlink(os.path.join(work_dir, name))
+        os.rmdir(work_dir)
+
+    if not os.path.getsize(video_path):
+        raise VideoCreationError("連結した動画が空です")
+
+    logger.info(f"分割生成した動画を連結: {len(videos)}個 ({meta['duration_seconds']:.1f}秒)")
+    return GeneratedVideo(video_path=video_path, **meta)
+
+
+def render_parts_sync(
+    audios: List[GeneratedAudio],
+    did_client: AsyncDIDClient,
+    avatar_url: str
+) -> Tuple[Optional[GeneratedVideo], Optional[Exception]]:
+    """
+    render_parts の同期ラッパー（共有イベントループで実行）
+
+    Example:
+        >>> video, err = render_parts_sync(parts, did_client, avatar_url)
+    """
+    return run_sync(render_parts(audios, did_client, avatar_url))
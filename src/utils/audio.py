@@ -0,0 +1,1222 @@
+"""
+音声データ処理ユーティリティ
+
+機能:
+  - PCMのWAVファイルへの逐次書き込み（メモリに全体を保持しない）
+  - PCMのフォーマット変換・リサンプリング（NumPy）
+  - 複数のWAVファイルのクロスフェード連結
+  - 無音の圧縮（前後の無音の削除・長すぎる間の短縮）
+  - 長い音声の分割（上限時間以下に、間の位置で切る）
+  - ラウドネス正規化（ゲート付きブロックRMS + ピークリミッター）
+  - 音声メタデータ（時間・フレーム数・サイズ）をストリーミング中に算出
+    - PCM: バイト数から計算
+    - MP3: フレームヘッダーを解析
+  - アップロード前のローカルエンコード（MP3/AAC、プロセスプールで実行）
+"""
+
+import asyncio
+import os
+import shutil
+import subprocess
+import threading
+import wave
+from concurrent.futures import ProcessPoolExecutor
+from typing import List, Optional, Tuple
+
+import numpy as np
+
+from .logger import get_logger
+from .errors import AudioGenerationError
+
+logger = get_logger(__name__)
+
+try:
+    import lameenc
+except ImportError:  # 任意依存（なければffmpegを使う）
+    lameenc = None
+
+
+class PCMWavSink:
+    """
+    PCMをWAVファイルへ逐次書き込むシンク
+
+    受信したチャンクをその場でファイルに書き込むため、
+    メモリ使用量はスクリプトの長さによらずチャンクサイズ程度に収まる。
+    入力のエンコード（pcm_f32le）やサンプルレートが出力と異なる場合は
+    書き込み時に16bit整数への変換・リサンプリングを行う（モノラルのみ）
+
+    Example:
+        >>> with PCMWavSink("/tmp/out.wav", sample_rate=44100) as sink:
+        ...     for chunk in chunks:
+        ...         sink.write(chunk)
+        >>> print(sink.byte_count)
+    """
+
+    def __init__(
+        self,
+        path: str,
+        sample_rate: int = 44100,
+        channels: int = 1,
+        sample_width: int = 2,
+        source_rate: Optional[int] = None,
+        source_encoding: str = "pcm_s16le"
+    ):
+        """
+        初期化（WAVファイルを開く）
+
+        Args:
+            path: 出力WAVファイルパス
+            sample_rate: サンプルレート（Hz）
+            channels: チャンネル数
+            sample_width: 1サンプルのバイト数（pcm_s16le = 2）
+            source_rate: 入力のサンプルレート（省略時は sample_rate と同じ）
+            source_encoding: 入力のエンコード（pcm_s16le / pcm_f32le）
+        """
+        if source_encoding not in PCM_ENCODINGS:
+            raise ValueError(f"未対応のPCMエンコード: {source_encoding}")
+
+        self.path = path
+        self.sample_rate = sample_rate
+        self.channels = channels
+        self.sample_width = sample_width
+        self.source_encoding = source_encoding
+        self.byte_count = 0
+
+        self._resampler: Optional[StreamingResampler] = None
+        if source_rate and source_rate != sample_rate:
+            self._resampler = StreamingResampler(source_rate, sample_rate)
+
+        self._wav: Optional[wave.Wave_write] = wave.open(path, 'wb')
+        self._wav.setnchannels(channels)
+        self._wav.setsampwidth(sample_width)
+        self._wav.setframerate(sample_rate)
+
+    def write(self, data: bytes) -> None:
+        """
+        PCMチャンクを書き込む
+
+        Args:
+            data: PCMデータ
+        """
+        if self._resampler is not None:
+            data = _to_int16_bytes(self._resampler.process(_to_float(data, self.source_encoding)))
+        elif self.source_encoding != "pcm_s16le":
+            data = _to_int16_bytes(_to_float(data, self.source_encoding))
+
+        self._write_raw(data)
+
+    def _write_raw(self, data: bytes) -> None:
+        """16bit PCMをそのまま書き込む"""
+        # ヘッダーの更新はclose時にまとめて行う
+        self._wav.writeframesraw(data)
+        self.byte_count += len(data)
+
+    @property
+    def frame_count(self) -> int:
+        """書き込んだフレーム数（1フレーム = 全チャンネル分の1サンプル）"""
+        return self.byte_count // (self.sample_width * self.channels)
+
+    @property
+    def duration_seconds(self) -> float:
+        """書き込んだ音声の時間（秒）"""
+        return self.frame_count / self.sample_rate
+
+    def close(self) -> None:
+        """ファイルを閉じる（WAVヘッダーのサイズを確定）"""
+        if self._wav is not None:
+            if self._resampler is not None:
+                self._write_raw(_to_int16_bytes(self._resampler.flush()))
+            self._wav.close()
+            self._wav = None
+
+    def __enter__(self) -> "PCMWavSink":
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback) -> None:
+        self.close()
+
+
+# 対応するPCMエンコード（Cartesiaの raw 出力）
+PCM_ENCODINGS = ("pcm_s16le", "pcm_f32le")
+
+
+def _to_float(data: bytes, encoding: str) -> np.ndarray:
+    """PCMバイト列を -1.0〜1.0 のfloat32配列に変換"""
+    if encoding == "pcm_f32le":
+        return np.frombuffer(data, dtype="<f4").astype(np.float32)
+    return np.frombuffer(data, dtype="<i2").astype(np.float32) / 32768.0
+
+
+def _to_int16_bytes(samples: np.ndarray) -> bytes:
+    """float32配列を16bit PCMのバイト列に変換（範囲外はクリップ）"""
+    scaled = np.clip(np.rint(samples * 32768.0), -32768, 32767)
+    return scaled.astype("<i2").tobytes()
+
+
+class StreamingResampler:
+    """
+    ストリーミング対応のリサンプラー（NumPyでベクトル化）
+
+    窓付きsinc補間（Hann窓）で任意の比率に変換する。ダウンサンプリング時は
+    カットオフを出力のナイキスト周波数まで下げてエイリアシングを防ぐ。
+    チャンク境界をまたぐ補間のため、直前のチャンクの末尾だけを保持する
+
+    Example:
+        >>> resampler = StreamingResampler(44100, 16000)
+        >>> out = resampler.process(samples)  # float32配列
+        >>> out_tail = resampler.flush()
+    """
+
+    def __init__(self, source_rate: int, target_rate: int, half_width: int = 16):
+        """
+        初期化
+
+        Args:
+            source_rate: 入力サンプルレート（Hz）
+            target_rate: 出力サンプルレート（Hz）
+            half_width: 補間カーネルの片側のタップ数
+        """
+        self.source_rate = source_rate
+        self.target_rate = target_rate
+        self.half_width = half_width
+
+        # 出力1サンプルあたりの入力サンプル数
+        self._step = source_rate / target_rate
+        self._cutoff = min(1.0, target_rate / source_rate)
+        self._taps = np.arange(-half_width + 1, half_width + 1)
+
+        # 未処理の入力（先頭は左側の文脈としてゼロ埋め）と、次の出力位置
+        self._buffer = np.zeros(half_width, dtype=np.float32)
+        self._position = float(half_width)
+        self._input_count = 0
+        self._output_count = 0
+
+    def process(self, samples: np.ndarray) -> np.ndarray:
+        """
+        入力チャンクを変換
+
+        Args:
+            samples: 入力（float32配列）
+
+        Returns:
+            出力（float32配列）。右側の文脈が揃っていない末尾は次回に持ち越す
+        """
+        self._input_count += len(samples)
+        return self._resample(samples, limit=None)
+
+    def flush(self) -> np.ndarray:
+        """
+        残りを出力（右側をゼロ埋めして、入力長に対応するサンプル数まで）
+
+        Returns:
+            出力（float32配列）
+        """
+        expected = int(np.ceil(self._input_count * self.target_rate / self.source_rate))
+        padding = np.zeros(self.half_width + int(np.ceil(self._step)) + 1, dtype=np.float32)
+        return self._resample(padding, limit=expected - self._output_count)
+
+    def _resample(self, samples: np.ndarray, limit: Optional[int]) -> np.ndarray:
+        """保持中の入力に samples を足して、計算できる位置まで出力"""
+        buffer = np.concatenate((self._buffer, samples.astype(np.float32, copy=False)))
+
+        # 右側の文脈（half_width サンプル）が揃っている位置まで
+        last = len(buffer) - self.half_width - 1
+        count = int(np.floor((last - self._position) / self._step)) + 1 if last >= self._position else 0
+        if limit is not None:
+            count = max(0, min(count, limit))
+
+        positions = self._position + np.arange(count) * self._step
+        base = np.floor(positions).astype(np.int64)
+
+        # (出力数, タップ数) の行列で一括計算
+        indices = base[:, None] + self._taps[None, :]
+        distance = positions[:, None] - indices
+        weights = (
+            np.sinc(self._cutoff * distance)
+            * (0.5 + 0.5 * np.cos(np.pi * np.clip(distance / self.half_width, -1.0, 1.0)))
+        )
+        weights /= weights.sum(axis=1, keepdims=True)
+        output = (buffer[indices] * weights).sum(axis=1).astype(np.float32)
+
+        # 次の出力に必要な左側の文脈だけ残す
+        self._position += count * self._step
+        drop = max(0, int(np.floor(self._position)) - self.half_width + 1)
+        self._buffer = buffer[drop:]
+        self._position -= drop
+        self._output_count += count
+
+        return output
+
+
+def splice_wav_files(
+    paths: List[str],
+    sink: PCMWavSink,
+    crossfade_ms: float = 20.0
+) -> None:
+    """
+    16bit PCMのWAVファイルを順に連結してシンクに書き込む
+
+    継ぎ目では前のファイルの末尾と次のファイルの先頭を重ねて
+    線形にクロスフェードする（継ぎ目ごとに重ねた分だけ短くなる）。
+    メモリに保持するのは1ファイル分とクロスフェード区間のみ
+
+    Args:
+        paths: 連結するWAVファイル（sink と同じサンプルレート・モノラル）
+        sink: 書き込み先（16bit PCMをそのまま書き込む）
+        crossfade_ms: クロスフェードの長さ（ミリ秒、0: 単純連結）
+
+    Raises:
+        AudioGenerationError: サンプルレートやチャンネル数が一致しない
+    """
+    fade_frames = int(sink.sample_rate * crossfade_ms / 1000)
+    tail: Optional[np.ndarray] = None
+
+    for path in paths:
+        with wave.open(path, 'rb') as wav:
+            if (
+                wav.getframerate() != sink.sample_rate
+                or wav.getnchannels() != 1
+                or wav.getsampwidth() != 2
+            ):
+                raise AudioGenerationError(
+                    f"連結できないWAVです: {path} "
+                    f"({wav.getframerate()}Hz, {wav.getnchannels()}ch, {wav.getsampwidth() * 8}bit)"
+                )
+            samples = np.frombuffer(wav.readframes(wav.getnframes()), dtype="<i2").astype(np.float32)
+
+        if tail is not None:
+            overlap = min(len(tail), len(samples))
+            if overlap:
+                ramp = np.linspace(0.0, 1.0, overlap, endpoint=False, dtype=np.float32)
+                samples = samples.copy()
+                samples[:overlap] = tail[-overlap:] * (1.0 - ramp) + samples[:overlap] * ramp
+            # 重ならなかった前のファイルの末尾はそのまま書き出す
+            if len(tail) > overlap:
+                sink.write(_clip_int16(tail[:len(tail) - overlap]))
+
+        # 末尾は次のファイルとのクロスフェード用に保持
+        keep = min(fade_frames, len(samples))
+        sink.write(_clip_int16(samples[:len(samples) - keep]))
+        tail = samples[len(samples) - keep:]
+
+    if tail is not None and len(tail):
+        sink.write(_clip_int16(tail))
+
+
+def _clip_int16(samples: np.ndarray) -> bytes:
+    """16bitスケールのfloat32配列を16bit PCMのバイト列に変換"""
+    return np.clip(np.rint(samples), -32768, 32767).astype("<i2").tobytes()
+
+
+class SilenceCompactor:
+    """
+    無音の圧縮（フレームエネルギーによる音声区間検出、NumPyでベクトル化）
+
+    フレーム（既定20ms）ごとのRMSがしきい値未満を無音とみなし、
+    先頭・末尾の無音を edge_pad_ms まで削り、途中の無音を max_pause_ms までに縮める。
+    縮めた間は無音区間の前半と後半をつなげて残す。
+    ブロック単位で処理し、保持するのは処理中の無音区間の残す分だけ
+
+    Example:
+        >>> compactor = SilenceCompactor(22050, max_pause_ms=500)
+        >>> out = compactor.process(samples)  # int16配列
+        >>> out_tail = compactor.flush()
+        >>> print(compactor.removed_seconds)
+    """
+
+    def __init__(
+        self,
+        sample_rate: int,
+        threshold_db: float = -45.0,
+        frame_ms: float = 20.0,
+        max_pause_ms: float = 500.0,
+        edge_pad_ms: float = 100.0
+    ):
+        """
+        初期化
+
+        Args:
+            sample_rate: サンプルレート（Hz）
+            threshold_db: 無音とみなすフレームRMSの上限（dBFS）
+            frame_ms: 判定フレームの長さ（ミリ秒）
+            max_pause_ms: 途中の無音の最大長（ミリ秒）
+            edge_pad_ms: 先頭・末尾に残す無音の長さ（ミリ秒）
+        """
+        self.sample_rate = sample_rate
+        self.frame_length = max(1, int(sample_rate * frame_ms / 1000))
+        # RMSの比較は2乗で行う（16bitスケール）
+        self.threshold = (32768.0 * 10 ** (threshold_db / 20)) ** 2
+
+        self.max_pause = int(sample_rate * max_pause_ms / 1000)
+        self.edge_pad = int(sample_rate * edge_pad_ms / 1000)
+        self._head_limit = max(self.max_pause - self.max_pause // 2, self.edge_pad)
+        self._tail_limit = max(self.max_pause // 2, self.edge_pad)
+
+        self.input_samples = 0
+        self.output_samples = 0
+
+        self._started = False
+        self._remainder = np.zeros(0, dtype=np.int16)
+        self._reset_silence()
+
+    def _reset_silence(self) -> None:
+        """処理中の無音区間をクリア"""
+        self._silence_head = np.zeros(0, dtype=np.int16)
+        self._silence_tail = np.zeros(0, dtype=np.int16)
+        self._silence_length = 0
+
+    def _add_silence(self, samples: np.ndarray) -> None:
+        """無音区間に追加（先頭 _head_limit と末尾 _tail_limit サンプルだけ保持）"""
+        self._silence_length += len(samples)
+
+        room = self._head_limit - len(self._silence_head)
+        if room > 0:
+            self._silence_head = np.concatenate([self._silence_head, samples[:room]])
+            samples = samples[room:]
+
+        if len(samples):
+            self._silence_tail = np.concatenate([self._silence_tail, samples])[-self._tail_limit:]
+
+    def _close_silence(self) -> List[np.ndarray]:
+        """音声が再開した時点で、無音区間のうち残す部分を返す"""
+        if not self._silence_length:
+            return []
+
+        if not self._started:
+            # 先頭の無音: 音声直前の edge_pad だけ残す
+            whole = np.concatenate([self._silence_head, self._silence_tail])
+            kept = [whole[len(whole) - min(self.edge_pad, len(whole)):]]
+        elif self._silence_length <= self.max_pause:
+            kept = [self._silence_head, self._silence_tail]
+        else:
+            # 長い間: 前半と後半をつないで max_pause に縮める
+            tail_length = self.max_pause // 2
+            kept = [
+                self._silence_head[:self.max_pause - tail_length],
+                self._silence_tail[len(self._silence_tail) - tail_length:]
+            ]
+
+        self._reset_silence()
+        return kept
+
+    def process(self, samples: np.ndarray) -> np.ndarray:
+        """
+        ブロックを処理
+
+        Args:
+            samples: 16bit PCMのサンプル配列（int16、モノラル）
+
+        Returns:
+            出力するサンプル配列（判定待ちの分は次回以降に出力）
+        """
+        self.input_samples += len(samples)
+
+        samples = np.concatenate([self._remainder, samples.astype(np.int16, copy=False)])
+        frame_count = len(samples) // self.frame_length
+        usable = frame_count * self.frame_length
+        self._remainder = samples[usable:]
+        if not frame_count:
+            return np.zeros(0, dtype=np.int16)
+
+        frames = samples[:usable].reshape(frame_count, self.frame_length).astype(np.float32)
+        voiced = np.mean(frames * frames, axis=1) >= self.threshold
+
+        # 有音/無音が切り替わる位置で区間に分ける
+        boundaries = np.flatnonzero(np.diff(voiced.astype(np.int8))) + 1
+        starts = np.concatenate([[0], boundaries])
+        ends = np.concatenate([boundaries, [frame_count]])
+
+        output: List[np.ndarray] = []
+        for start, end in zip(starts, ends):
+            run = samples[start * self.frame_length:end * self.frame_length]
+            if voiced[start]:
+                output.extend(self._close_silence())
+                output.append(run)
+                self._started = True
+            else:
+                self._add_silence(run)
+
+        result = np.concatenate(output) if output else np.zeros(0, dtype=np.int16)
+        self.output_samples += len(result)
+        return result
+
+    def flush(self) -> np.ndarray:
+        """
+        残りを出力（末尾の無音は edge_pad だけ残す）
+
+        Returns:
+            出力するサンプル配列
+        """
+        # 1フレームに満たない残りは無音として扱う
+        if len(self._remainder):
+            self._add_silence(self._remainder)
+            self._remainder = np.zeros(0, dtype=np.int16)
+
+        if self._started:
+            result = self._silence_head[:self.edge_pad]
+        else:
+            # 全体が無音: そのまま残さない
+            result = np.zeros(0, dtype=np.int16)
+
+        self._reset_silence()
+        self.output_samples += len(result)
+        return result
+
+    @property
+    def removed_seconds(self) -> float:
+        """削った時間（秒）"""
+        return (self.input_samples - self.output_samples) / self.sample_rate
+
+
+# 無音圧縮で1回に読み込むフレーム数
+_SILENCE_BLOCK_FRAMES = 65536
+
+
+def compact_silence(wav_path: str, **options) -> Tuple[int, float]:
+    """
+    WAVファイルの無音を圧縮（ファイルを置き換え）
+
+    Args:
+        wav_path: 16bit PCM・モノラルのWAVファイル
+        **options: SilenceCompactor のオプション
+            （threshold_db / frame_ms / max_pause_ms / edge_pad_ms）
+
+    Returns:
+        (frame_count, removed_seconds): 圧縮後のフレーム数と、削った時間（秒）
+
+    Raises:
+        AudioGenerationError: 16bit PCM・モノラル以外のWAV
+
+    Example:
+        >>> frames, saved = compact_silence("/tmp/audio.wav", max_pause_ms=500)
+    """
+    tmp_path = f"{wav_path}.compact.tmp"
+
+    try:
+        with wave.open(wav_path, 'rb') as source:
+            if source.getnchannels() != 1 or source.getsampwidth() != 2:
+                raise AudioGenerationError(
+                    f"無音圧縮は16bit PCM・モノラルのみ対応: {wav_path}"
+                )
+
+            sample_rate = source.getframerate()
+            compactor = SilenceCompactor(sample_rate, **options)
+
+            with wave.open(tmp_path, 'wb') as dest:
+                dest.setnchannels(1)
+                dest.setsampwidth(2)
+                dest.setframerate(sample_rate)
+
+                while True:
+                    data = source.readframes(_SILENCE_BLOCK_FRAMES)
+                    if not data:
+                        break
+                    dest.writeframesraw(
+                        compactor.process(np.frombuffer(data, dtype="<i2")).astype("<i2").tobytes()
+                    )
+
+                dest.writeframesraw(compactor.flush().astype("<i2").tobytes())
+
+        os.replace(tmp_path, wav_path)
+
+    finally:
+        if os.path.exists(tmp_path):
+            os.unlink(tmp_path)
+
+    return (compactor.output_samples, compactor.removed_seconds)
+
+
+def find_split_points(
+    wav_path: str,
+    max_seconds: float,
+    threshold_db: float = -45.0,
+    frame_ms: float = 20.0,
+    search_fraction: float = 0.1,
+    min_pause_ms: float = 200.0
+) -> List[int]:
+    """
+    WAVファイルを max_seconds 以下に分ける位置（サンプル位置）を求める
+
+    残りを均等に分けた位置の前後 search_fraction の範囲で、min_pause_ms 以上の無音区間のうち
+    均等な位置に最も近いものの中央で切る（なければ最も長い無音区間、無音がなければ
+    最もエネルギーの小さいフレーム）。
+    各部分はなるべく同じ長さになる（並列処理の待ち時間は最も長い部分で決まるため）。
+    フレームのRMSはブロック単位で計算し、全体をメモリに載せない
+
+    Args:
+        wav_path: 16bit PCM・モノラルのWAVファイル
+        max_seconds: 1つの部分の上限時間（秒）
+        threshold_db: 無音とみなすフレームRMS（dBFS）
+        frame_ms: フレーム長（ミリ秒）
+        search_fraction: 切る位置を探す範囲（部分の長さに対する割合）
+        min_pause_ms: 文の区切りとみなす無音の長さ（ミリ秒）
+
+    Returns:
+        切る位置（サンプル位置、昇順）。分ける必要がなければ空
+
+    Raises:
+        AudioGenerationError: 16bit PCM・モノラル以外のWAV
+    """
+    with wave.open(wav_path, 'rb') as source:
+        if source.getnchannels() != 1 or source.getsampwidth() != 2:
+            raise AudioGenerationError(f"分割は16bit PCM・モノラルのみ対応: {wav_path}")
+
+        sample_rate = source.getframerate()
+        frame_len = max(1, int(sample_rate * frame_ms / 1000))
+        block_frames = max(1, _SILENCE_BLOCK_FRAMES // frame_len) * frame_len
+
+        levels = []
+        while True:
+            data = source.readframes(block_frames)
+            if not data:
+                break
+            samples = np.frombuffer(data, dtype="<i2").astype(np.float32)
+            pad = (-len(samples)) % frame_len
+            if pad:
+                samples = np.concatenate([samples, np.zeros(pad, dtype=np.float32)])
+            rms = np.sqrt(np.mean(samples.reshape(-1, frame_len) ** 2, axis=1))
+            levels.append(20 * np.log10(rms / 32768.0 + 1e-10))
+
+    db = np.concatenate(levels) if levels else np.zeros(0, dtype=np.float32)
+    max_frames = int(max_seconds * sample_rate) // frame_len
+    if max_frames < 1:
+        raise ValueError(f"max_seconds が短すぎます: {max_seconds}")
+
+    silent = db < threshold_db
+    min_pause_frames = max(1, int(min_pause_ms / frame_ms))
+    cuts: List[int] = []
+    start = 0
+
+    while len(db) - start > max_frames:
+        remaining = len(db) - start
+        target = remaining / -(-remaining // max_frames)
+        lo = start + max(1, int(target * (1 - search_fraction)))
+        hi = min(start + int(target * (1 + search_fraction)), start + max_frames)
+        center = start + target
+
+        # 範囲内の無音区間（連続する無音フレーム）を列挙
+        window = silent[lo:hi + 1].astype(np.int8)
+        edges = np.diff(np.concatenate([[0], window, [0]]))
+        run_starts = np.flatnonzero(edges == 1)
+        run_ends = np.flatnonzero(edges == -1)
+
+        if len(run_starts):
+            lengths = run_ends - run_starts
+            mids = lo + (run_starts + run_ends) // 2
+            pauses = np.flatnonzero(lengths >= min_pause_frames)
+            if len(pauses):
+                best = pauses[np.argmin(np.abs(mids[pauses] - center))]
+            else:
+                best = int(np.argmax(lengths))
+            cut = int(min(mids[best], hi))
+        else:
+            cut = lo + int(np.argmin(db[lo:hi + 1]))
+
+        cuts.append(cut)
+        start = cut
+
+    return [cut * frame_len for cut in cuts]
+
+
+def split_wav(
+    wav_path: str,
+    max_seconds: float,
+    **options
+) -> List[Tuple[str, int]]:
+    """
+    WAVファイルを max_seconds 以下の部分に分けて保存
+
+    部分のファイルは <wav_path>.partN.wav（呼び出し元で削除する）
+
+    Args:
+        wav_path: 16bit PCM・モノラルのWAVファイル
+        max_seconds: 1つの部分の上限時間（秒）
+        **options: find_split_points のオプション
+
+    Returns:
+        [(path, frame_count), ...]（分ける必要がなければ元のファイルのみ）
+
+    Example:
+        >>> parts = split_wav("/tmp/audio.wav", max_seconds=290)
+    """
+    cuts = find_split_points(wav_path, max_seconds, **options)
+    if not cuts:
+        with wave.open(wav_path, 'rb') as source:
+            return [(wav_path, source.getnframes())]
+
+    parts: List[Tuple[str, int]] = []
+    with wave.open(wav_path, 'rb') as source:
+        sample_rate = source.getframerate()
+        bounds = [0] + cuts + [source.getnframes()]
+
+        for index, (begin, end) in enumerate(zip(bounds, bounds[1:])):
+            path = f"{wav_path}.part{index}.wav"
+            with wave.open(path, 'wb') as dest:
+                dest.setnchannels(1)
+                dest.setsampwidth(2)
+                dest.setframerate(sample_rate)
+                remaining = end - begin
+                while remaining > 0:
+                    data = source.readframes(min(remaining, _SILENCE_BLOCK_FRAMES))
+                    if not data:
+                        break
+                    dest.writeframesraw(data)
+                    remaining -= len(data) // 2
+            parts.append((path, end - begin))
+
+    logger.info(
+        "音声を分割: " + " / ".join(f"{frames / sample_rate:.1f}秒" for _, frames in parts)
+    )
+    return parts
+
+
+class LoudnessMeter:
+    """
+    ラウドネス測定（ITU-R BS.1770 のゲート方式、周波数重み付けなし）
+
+    100msごとの2乗平均から400ms（75%重なり）のブロックラウドネスを求め、
+    -70dBFS の絶対ゲートと、ゲート通過分の平均から -10dB の相対ゲートを
+    通ったブロックの平均を全体のラウドネスとする。
+    保持するのは100msごとの2乗平均のみ（5分で3000個）
+
+    Example:
+        >>> meter = LoudnessMeter(22050)
+        >>> meter.process(samples)  # float32配列（-1.0〜1.0）
+        >>> print(meter.loudness_db, meter.peak)
+    """
+
+    ABSOLUTE_GATE_DB = -70.0
+    RELATIVE_GATE_DB = -10.0
+
+    def __init__(self, sample_rate: int):
+        """
+        初期化
+
+        Args:
+            sample_rate: サンプルレート（Hz）
+        """
+        self.sub_block = max(1, sample_rate // 10)
+        self.peak = 0.0
+        self._powers: List[float] = []
+        self._remainder = np.zeros(0, dtype=np.float32)
+
+    def process(self, samples: np.ndarray) -> None:
+        """
+        ブロックを測定
+
+        Args:
+            samples: float32配列（-1.0〜1.0、モノラル）
+        """
+        if len(samples):
+            self.peak = max(self.peak, float(np.max(np.abs(samples))))
+
+        samples = np.concatenate([self._remainder, samples])
+        count = len(samples) // self.sub_block
+        usable = count * self.sub_block
+        self._remainder = samples[usable:]
+
+        if count:
+            blocks = samples[:usable].reshape(count, self.sub_block)
+            self._powers.extend(np.mean(blocks * blocks, axis=1).tolist())
+
+    @property
+    def loudness_db(self) -> Optional[float]:
+        """全体のラウドネス（dBFS、ゲートを通るブロックがなければNone）"""
+        powers = np.array(self._powers, dtype=np.float64)
+        if len(self._remainder):
+            powers = np.append(powers, np.mean(self._remainder.astype(np.float64) ** 2))
+        if not len(powers):
+            return None
+
+        # 400msブロック（100msずつずらす）。短い音声は全体を1ブロックとする
+        window = min(4, len(powers))
+        block_powers = np.convolve(powers, np.ones(window) / window, mode="valid")
+
+        with np.errstate(divide="ignore"):
+            block_db = 10 * np.log10(block_powers)
+
+        gated = block_powers[block_db > self.ABSOLUTE_GATE_DB]
+        if not len(gated):
+            return None
+
+        relative_gate = 10 * np.log10(np.mean(gated)) + self.RELATIVE_GATE_DB
+        gated = block_powers[block_db > max(self.ABSOLUTE_GATE_DB, relative_gate)]
+        return float(10 * np.log10(np.mean(gated)))
+
+
+class PeakLimiter:
+    """
+    ピークリミッター（先読み付き、NumPyでベクトル化）
+
+    短い窓（既定5ms）ごとにピークを上限以下にするゲインを求め、前後の窓との
+    最小値を窓の中心間で線形補間して掛ける（どのサンプルも上限を超えない）。
+    補間に後ろの窓のピークが必要なため、末尾の2窓分だけを次回に持ち越す
+
+    Example:
+        >>> limiter = PeakLimiter(22050, ceiling_db=-1.0)
+        >>> out = limiter.process(samples * gain)
+        >>> out_tail = limiter.flush()
+    """
+
+    def __init__(self, sample_rate: int, ceiling_db: float = -1.0, window_ms: float = 5.0):
+        """
+        初期化
+
+        Args:
+            sample_rate: サンプルレート（Hz）
+            ceiling_db: ピークの上限（dBFS）
+            window_ms: 判定窓の長さ（ミリ秒）
+        """
+        self.ceiling = 10 ** (ceiling_db / 20)
+        self.window = max(1, int(sample_rate * window_ms / 1000))
+        self._pending = np.zeros(0, dtype=np.float32)
+        self._prev_required = 1.0
+        self._prev_gain: Optional[float] = None
+
+    def _required_gains(self, samples: np.ndarray) -> np.ndarray:
+        """窓ごとにピークを上限以下にするゲイン（最後の窓は端数も含む）"""
+        count = -(-len(samples) // self.window)
+        padded = np.zeros(count * self.window, dtype=np.float32)
+        padded[:len(samples)] = np.abs(samples)
+        peaks = padded.reshape(count, self.window).max(axis=1)
+        return np.minimum(1.0, self.ceiling / np.maximum(peaks, 1e-9))
+
+    def _apply(self, samples: np.ndarray, required: np.ndarray) -> np.ndarray:
+        """
+        samples にゲインを掛ける
+
+        required は samples の窓と、その後ろの先読み分の窓のゲイン
+        （先読みの窓は補間の終点を求めるためだけに使う）
+        """
+        count = -(-len(samples) // self.window)
+        neighbors = np.concatenate([[self._prev_required], required, [1.0]])
+        gains = np.minimum(np.minimum(neighbors[:-2], neighbors[1:-1]), neighbors[2:])
+
+        previous = gains[0] if self._prev_gain is None else self._prev_gain
+        points = np.concatenate([[previous], gains[:count + 1]])
+        centers = (np.arange(len(points)) - 0.5) * self.window
+        curve = np.interp(np.arange(len(samples), dtype=np.float32), centers, points)
+
+        self._prev_required = float(required[count - 1])
+        self._prev_gain = float(gains[count - 1])
+
+        return np.clip(samples * curve, -self.ceiling, self.ceiling).astype(np.float32)
+
+    def process(self, samples: np.ndarray) -> np.ndarray:
+        """
+        ブロックを処理
+
+        Args:
+            samples: float32配列（ゲイン適用済み、モノラル）
+
+        Returns:
+            リミッター適用後の配列（末尾の2窓分と端数は次回以降に出力）
+        """
+        samples = np.concatenate([self._pending, samples])
+        count = len(samples) // self.window
+        if count < 3:
+            self._pending = samples
+            return np.zeros(0, dtype=np.float32)
+
+        # 最後の窓の後半の補間には次の窓のゲイン（その次の窓のピークも必要）が要る
+        usable = (count - 2) * self.window
+        required = self._required_gains(samples[:count * self.window])
+        self._pending = samples[usable:]
+        return self._apply(samples[:usable], required)
+
+    def flush(self) -> np.ndarray:
+        """
+        残りを出力
+
+        Returns:
+            リミッター適用後の配列
+        """
+        samples, self._pending = self._pending, np.zeros(0, dtype=np.float32)
+        if not len(samples):
+            return samples
+        return self._apply(samples, self._required_gains(samples))
+
+
+# ラウドネス正規化で1回に読み込むフレーム数
+_LOUDNESS_BLOCK_FRAMES = 65536
+
+
+def normalize_loudness(
+    wav_path: str,
+    target_db: float = -18.0,
+    max_gain_db: float = 20.0,
+    ceiling_db: float = -1.0
+) -> Tuple[Optional[float], float]:
+    """
+    WAVファイルのラウドネスを正規化（ファイルを置き換え）
+
+    1回目の読み込みでラウドネスとピークを測定し、2回目でゲインとリミッターを掛ける。
+    どちらもブロック単位で処理し、floatで保持するのは1ブロック分のみ。
+    ゲインが不要な場合はファイルを書き換えない
+
+    Args:
+        wav_path: 16bit PCM・モノラルのWAVファイル
+        target_db: 目標ラウドネス（ゲート付きRMS、dBFS）
+        max_gain_db: 持ち上げる上限（ほぼ無音の音声でノイズを増幅しない）
+        ceiling_db: ピークの上限（dBFS）
+
+    Returns:
+        (loudness_db, gain_db): 測定したラウドネス（無音ならNone）と、掛けたゲイン
+
+    Raises:
+        AudioGenerationError: 16bit PCM・モノラル以外のWAV
+
+    Example:
+        >>> loudness, gain = normalize_loudness("/tmp/audio.wav", target_db=-18.0)
+    """
+    with wave.open(wav_path, 'rb') as source:
+        if source.getnchannels() != 1 or source.getsampwidth() != 2:
+            raise AudioGenerationError(
+                f"ラウドネス正規化は16bit PCM・モノラルのみ対応: {wav_path}"
+            )
+
+        sample_rate = source.getframerate()
+        meter = LoudnessMeter(sample_rate)
+
+        while True:
+            data = source.readframes(_LOUDNESS_BLOCK_FRAMES)
+            if not data:
+                break
+            meter.process(_to_float(data, "pcm_s16le"))
+
+    loudness = meter.loudness_db
+    if loudness is None:
+        return (None, 0.0)
+
+    gain_db = min(target_db - loudness, max_gain_db)
+    gain = 10 ** (gain_db / 20)
+    ceiling = 10 ** (ceiling_db / 20)
+
+    if abs(gain_db) < 0.1 and meter.peak <= ceiling:
+        return (loudness, 0.0)
+
+    tmp_path = f"{wav_path}.loudness.tmp"
+    limiter = PeakLimiter(sample_rate, ceiling_db)
+
+    try:
+        with wave.open(wav_path, 'rb') as source, wave.open(tmp_path, 'wb') as dest:
+            dest.setnchannels(1)
+            dest.setsampwidth(2)
+            dest.setframerate(sample_rate)
+
+            while True:
+                data = source.readframes(_LOUDNESS_BLOCK_FRAMES)
+                if not data:
+                    break
+                dest.writeframesraw(
+                    _to_int16_bytes(limiter.process(_to_float(data, "pcm_s16le") * gain))
+                )
+
+            dest.writeframesraw(_to_int16_bytes(limiter.flush()))
+
+        os.replace(tmp_path, wav_path)
+
+    finally:
+        if os.path.exists(tmp_path):
+            os.unlink(tmp_path)
+
+    return (loudness, gain_db)
+
+
+# MPEGオーディオのビットレート表（kbps）: [MPEG1, MPEG2/2.5][レイヤー1-3]
+_MP3_BITRATES = {
+    (1, 1): (0, 32, 64, 96, 128, 160, 192, 224, 256, 288, 320, 352, 384, 416, 448),
+    (1, 2): (0, 32, 48, 56, 64, 80, 96, 112, 128, 160, 192, 224, 256, 320, 384),
+    (1, 3): (0, 32, 40, 48, 56, 64, 80, 96, 112, 128, 160, 192, 224, 256, 320),
+    (2, 1): (0, 32, 48, 56, 64, 80, 96, 112, 128, 144, 160, 176, 192, 224, 256),
+    (2, 2): (0, 8, 16, 24, 32, 40, 48, 56, 64, 80, 96, 112, 128, 144, 160),
+    (2, 3): (0, 8, 16, 24, 32, 40, 48, 56, 64, 80, 96, 112, 128, 144, 160),
+}
+
+# サンプルレート表（Hz）: バージョンビット -> インデックス
+_MP3_SAMPLE_RATES = {
+    3: (44100, 48000, 32000),   # MPEG1
+    2: (22050, 24000, 16000),   # MPEG2
+    0: (11025, 12000, 8000),    # MPEG2.5
+}
+
+
+def _parse_mp3_header(header: bytes) -> Optional[Tuple[int, int, int]]:
+    """
+    MPEGオーディオのフレームヘッダーを解析
+
+    Args:
+        header: フレーム先頭の4バイト
+
+    Returns:
+        (frame_length, samples, sample_rate): フレーム長（バイト）、
+        フレームのサンプル数、サンプルレート。ヘッダーでなければNone
+    """
+    if header[0] != 0xFF or (header[1] & 0xE0) != 0xE0:
+        return None
+
+    version_bits = (header[1] >> 3) & 0x03
+    layer_bits = (header[1] >> 1) & 0x03
+    bitrate_index = header[2] >> 4
+    sample_rate_index = (header[2] >> 2) & 0x03
+    padding = (header[2] >> 1) & 0x01
+
+    if (
+        version_bits == 1 or layer_bits == 0
+        or bitrate_index in (0, 15) or sample_rate_index == 3
+    ):
+        # 予約値・フリーフォーマットは扱わない
+        return None
+
+    mpeg1 = version_bits == 3
+    layer = 4 - layer_bits
+    bitrate = _MP3_BITRATES[(1 if mpeg1 else 2, layer)][bitrate_index] * 1000
+    sample_rate = _MP3_SAMPLE_RATES[version_bits][sample_rate_index]
+
+    if layer == 1:
+        return ((12 * bitrate // sample_rate + padding) * 4, 384, sample_rate)
+
+    if layer == 2 or mpeg1:
+        return (144 * bitrate // sample_rate + padding, 1152, sample_rate)
+
+    # MPEG2/2.5 レイヤー3
+    return (72 * bitrate // sample_rate + padding, 576, sample_rate)
+
+
+class MP3StreamInfo:
+    """
+    MP3ストリームのメタデータを受信しながら算出
+
+    フレームヘッダーを順に解析してサンプル数を数える（ファイルの再読み込み不要）。
+    保持するのは解析途中の1フレーム分のみ
+
+    Example:
+        >>> info = MP3StreamInfo()
+        >>> for chunk in response:
+        ...     info.feed(chunk)
+        >>> print(info.duration_seconds)
+    """
+
+    def __init__(self):
+        """初期化"""
+        self.byte_count = 0
+        self.frame_count = 0
+        self.sample_count = 0
+        self.sample_rate: Optional[int] = None
+
+        self._buffer = bytearray()
+        self._skip = 0
+
+    def feed(self, data: bytes) -> None:
+        """
+        受信したデータを解析
+
+        Args:
+            data: MP3データの断片
+        """
+        self.byte_count += len(data)
+        self._buffer += data
+
+        buffer = self._buffer
+        pos = 0
+
+        while True:
+            # ID3タグの残りを読み飛ばす
+            if self._skip:
+                skipped = min(self._skip, len(buffer) - pos)
+                pos += skipped
+                self._skip -= skipped
+                if self._skip:
+                    break
+
+            remaining = len(buffer) - pos
+            if remaining < 4:
+                break
+
+            if buffer[pos:pos + 3] == b"ID3":
+                if remaining < 10:
+                    break
+                # ID3v2: サイズはsyncsafe整数（各バイト7ビット）
+                size = 0
+                for byte in buffer[pos + 6:pos + 10]:
+                    size = (size << 7) | (byte & 0x7F)
+                footer = 10 if buffer[pos + 5] & 0x10 else 0
+                self._skip = 10 + size + footer
+                continue
+
+            frame = _parse_mp3_header(bytes(buffer[pos:pos + 4]))
+            if frame is None:
+                # 同期が取れるまで1バイトずつ進める
+                pos += 1
+                continue
+
+            frame_length, samples, sample_rate = frame
+            if remaining < frame_length:
+                break
+
+            # 先頭のXing/Infoフレームは音声を含まない
+            body = buffer[pos + 4:pos + min(frame_length, 40)]
+            if not (self.frame_count == 0 and (b"Xing" in body or b"Info" in body)):
+                self.frame_count += 1
+                self.sample_count += samples
+                self.sample_rate = sample_rate
+
+            pos += frame_length
+
+        del buffer[:pos]
+
+    @property
+    def duration_seconds(self) -> float:
+        """これまでに受信した音声の時間（秒）"""
+        if not self.sample_rate:
+            return 0.0
+        return self.sample_count / self.sample_rate
+
+
+# エンコード形式ごとの拡張子
+ENCODED_EXTENSIONS = {
+    "mp3": ".mp3",
+    "aac": ".m4a",
+}
+
+# 1回にエンコーダーへ渡すフレーム数
+_ENCODE_BLOCK_FRAMES = 44100
+
+
+def can_encode(fmt: str) -> bool:
+    """
+    ローカルでエンコードできるか
+
+    Args:
+        fmt: エンコード形式（"mp3" / "aac"）
+
+    Returns:
+        利用できるエンコーダーがあればTrue
+    """
+    if fmt not in ENCODED_EXTENSIONS:
+        return False
+
+    if fmt == "mp3" and lameenc is not None:
+        return True
+
+    return shutil.which("ffmpeg") is not None
+
+
+def encode_audio(
+    wav_path: str,
+    fmt: str = "mp3",
+    bitrate_kbps: int = 96
+) -> str:
+    """
+    WAVファイルをMP3/AACにエンコード
+
+    MP3は lameenc があればプロセス内で、なければ ffmpeg でエンコードする。
+    AACは ffmpeg を使用。WAVはブロック単位で読むため全体をメモリに載せない
+
+    Args:
+        wav_path: 入力WAVファイルパス
+        fmt: エンコード形式（"mp3" / "aac"）
+        bitrate_kbps: ビットレート（kbps）
+
+    Returns:
+        エンコード後のファイルパス（入力と同じディレクトリ、拡張子のみ変更）
+
+    Raises:
+        AudioGenerationError: 未対応の形式・エンコード失敗
+
+    Example:
+        >>> mp3_path = encode_audio("/tmp/audio.wav", "mp3", 96)
+    """
+    if fmt not in ENCODED_EXTENSIONS:
+        raise AudioGenerationError(f"未対応のエンコード形式: {fmt}")
+
+    output_path = os.path.splitext(wav_path)[0] + ENCODED_EXTENSIONS[fmt]
+
+    if fmt == "mp3" and lameenc is not None:
+        _encode_mp3_lameenc(wav_path, output_path, bitrate_kbps)
+        return output_path
+
+    if shutil.which("ffmpeg") is None:
+        raise AudioGenerationError("エンコーダーが見つかりません（lameenc または ffmpeg が必要）")
+
+    codec = "libmp3lame" if fmt == "mp3" else "aac"
+    command = [
+        "ffmpeg", "-y", "-loglevel", "error",
+        "-i", wav_path,
+        "-c:a", codec,
+        "-b:a", f"{bitrate_kbps}k",
+    ]
+    if fmt == "aac":
+        command += ["-movflags", "+faststart"]
+    command.append(output_path)
+
+    result = subprocess.run(command, capture_output=True, text=True)
+    if result.returncode != 0:
+        raise AudioGenerationError(f"エンコード失敗（ffmpeg）: {result.stderr.strip()}")
+
+    return output_path
+
+
+def _encode_mp3_lameenc(wav_path: str, output_path: str, bitrate_kbps: int) -> None:
+    """lameencでWAVをMP3にエンコード（ブロック単位）"""
+    with wave.open(wav_path, 'rb') as wav_file:
+        encoder = lameenc.Encoder()
+        encoder.set_bit_rate(bitrate_kbps)
+        encoder.set_in_sample_rate(wav_file.getframerate())
+        encoder.set_channels(wav_file.getnchannels())
+        encoder.set_quality(2)
+
+        with open(output_path, 'wb') as output:
+            while True:
+                frames = wav_file.readframes(_ENCODE_BLOCK_FRAMES)
+                if not frames:
+                    break
+                output.write(encoder.encode(frames))
+
+            output.write(encoder.flush())
+
+
+# エンコード用プロセスプール（プロセス内で共有、初回使用時に作成）
+_executor: Optional[ProcessPoolExecutor] = None
+_executor_lock = threading.Lock()
+
+
+def _get_executor(max_workers: int) -> ProcessPoolExecutor:
+    """エンコード用プロセスプールを取得"""
+    global _executor
+
+    with _executor_lock:
+        if _executor is None:
+            _executor = ProcessPoolExecutor(max_workers=max_workers)
+        return _executor
+
+
+async def encode_audio_async(
+    wav_path: str,
+    fmt: str = "mp3",
+    bitrate_kbps: int = 96,
+    max_workers: int = 2
+) -> str:
+    """
+    encode_audio をプロセスプールで実行（イベントループを止めない）
+
+    Args:
+        wav_path: 入力WAVファイルパス
+        fmt: エンコード形式（"mp3" / "aac"）
+        bitrate_kbps: ビットレート（kbps）
+        max_workers: プロセスプールのワーカー数（初回のみ有効）
+
+    Returns:
+        エンコード後のファイルパス
+
+    Example:
+        >>> mp3_path = await encode_audio_async("/tmp/audio.wav")
+    """
+    loop = asyncio.get_running_loop()
+    return await loop.run_in_executor(
+        _get_executor(max_workers),
+        encode_audio,
+        wav_path,
+        fmt,
+        bitrate_kbps
+    )
@@ -0,0 +1,462 @@
+"""
+音声ファイルのホスティング
+
+機能:
+  - 共通インターフェース AudioHost（ファイルをアップロードし、D-IDが取得できるURLを返す）
+  - バックエンド
+    - cloudinary: Cloudinary（内容のハッシュを public_id にし、同じ音声は再アップロードしない）
+    - did: D-IDの音声アップロード（POST /audios、返る s3:// のURLをそのままTalkに渡す）
+    - s3: S3互換ストレージ（公開URLまたは署名付きURL、boto3が必要）
+    - stub: プロセス内に保持するだけ（テスト用、ネットワーク接続なし）
+  - config.yaml の audio_host.backend で選択
+  - 期限付きURL（s3 の署名付きURL、did の s3:// URL）の有効期限（url_expires_at / url_expired）
+  - バックエンドごとのアップロード時間の計測（audio_host.<backend>.upload_seconds）
+
+音声はD-IDに取得させるためだけにアップロードするため、
+D-IDへ直接アップロードすれば外部ホストへの往復と変換を省ける
+"""
+
+import hashlib
+import mimetypes
+import os
+import time
+from abc import ABC, abstractmethod
+from typing import Dict, Optional, Tuple
+
+import cloudinary
+import cloudinary.api
+import cloudinary.uploader
+
+from ..models.schemas import CloudinaryConfig
+from .logger import get_logger
+from .config import get_config
+from .cache import DiskCache, get_cache
+from .errors import CloudinaryError, ConfigError, UploadError
+from .http import get_session
+from .metrics import observe
+
+logger = get_logger(__name__)
+
+try:
+    import boto3
+except ImportError:  # 任意依存（s3 バックエンドを使う場合のみ）
+    boto3 = None
+
+
+# 拡張子のないファイル（キャッシュの本体 <key>.data など）の判別用
+_AUDIO_SIGNATURES = (
+    (b"ID3", "audio/mpeg", ".mp3"),
+    (b"\xff\xfb", "audio/mpeg", ".mp3"),
+    (b"\xff\xf3", "audio/mpeg", ".mp3"),
+    (b"RIFF", "audio/wav", ".wav"),
+    (b"\xff\xf1", "audio/aac", ".aac"),
+)
+
+
+def _audio_type(path: str) -> Tuple[str, str]:
+    """音声ファイルの (Content-Type, 拡張子)。拡張子で判別できなければ先頭のバイト列から"""
+    ext = os.path.splitext(path)[1].lower()
+    content_type = mimetypes.guess_type(path)[0]
+    if content_type and content_type.startswith("audio/"):
+        return (content_type, ext)
+
+    with open(path, 'rb') as f:
+        head = f.read(12)
+    for signature, content_type, ext in _AUDIO_SIGNATURES:
+        if head.startswith(signature):
+            return (content_type, ext)
+    if head[4:8] == b"ftyp":
+        return ("audio/mp4", ".m4a")
+    return ("application/octet-stream", ext)
+
+
+# 期限付きURLを再利用するのに必要な残り時間（秒）。D-IDがTalkの作成後に音声を取得し終えるまでの余裕
+URL_EXPIRY_MARGIN_SECONDS = 600
+
+
+def url_expired(expires_at: Optional[float]) -> bool:
+    """
+    期限付きURLを再利用できないか（期限切れ・残りが URL_EXPIRY_MARGIN_SECONDS 未満）
+
+    Args:
+        expires_at: URLの有効期限（UNIX時刻、None: 無期限）
+    """
+    return expires_at is not None and expires_at - time.time() < URL_EXPIRY_MARGIN_SECONDS
+
+
+def _file_sha256(path: str) -> str:
+    """ファイルのSHA-256（16進）"""
+    sha256 = hashlib.sha256()
+    with open(path, 'rb') as f:
+        for block in iter(lambda: f.read(1024 * 1024), b""):
+            sha256.update(block)
+    return sha256.hexdigest()
+
+
+class AudioHost(ABC):
+    """
+    音声ファイルのホスティング（バックエンドの共通インターフェース）
+
+    Example:
+        >>> host = create_audio_host(cloudinary_config=config)
+        >>> url, err = host.upload("/tmp/audio.mp3")
+    """
+
+    # バックエンド名（設定値・計測名に使用）
+    name = "base"
+
+    # 返すURLの有効期間（秒、None: 無期限）
+    url_lifetime: Optional[float] = None
+
+    def url_expires_at(self) -> Optional[float]:
+        """
+        今アップロードしたURLの有効期限
+
+        Returns:
+            UNIX時刻（無期限のURLならNone）
+        """
+        if self.url_lifetime is None:
+            return None
+        return time.time() + self.url_lifetime
+
+    def upload(self, path: str) -> Tuple[Optional[str], Optional[Exception]]:
+        """
+        音声ファイルをアップロード
+
+        Args:
+            path: 音声ファイルパス（MP3/AAC/WAV）
+
+        Returns:
+            (url, error): D-IDが取得できるURLまたはエラー
+        """
+        started = time.perf_counter()
+        try:
+            url = self._upload(path)
+        except Exception as e:
+            logger.error(f"音声アップロードエラー（{self.name}）: {e}")
+            if not isinstance(e, UploadError):
+                e = UploadError(f"アップロード失敗（{self.name}）: {e}")
+            return (None, e)
+
+        elapsed = time.perf_counter() - started
+        observe(f"audio_host.{self.name}.upload_seconds", elapsed)
+        logger.info(f"音声アップロード成功（{self.name}、{elapsed:.2f}秒）: {url}")
+        return (url, None)
+
+    @abstractmethod
+    def _upload(self, path: str) -> str:
+        """
+        アップロードしてURLを返す（失敗時は例外）
+
+        Args:
+            path: 音声ファイルパス
+
+        Returns:
+            URL
+        """
+
+
+class CloudinaryAudioHost(AudioHost):
+    """
+    Cloudinary
+
+    public_id は <folder>/<内容のSHA-256> のため、同じ音声は1つだけ保存される。
+    アップロード前にローカルの索引（cache.uploads）、次にCloudinary上の存在を確認し、
+    既にあればアップロードしない。
+    ローカルでエンコードできずWAVのままの場合は、Cloudinary側でMP3に変換する
+    """
+
+    name = "cloudinary"
+
+    def __init__(
+        self,
+        cloudinary_config: Optional[CloudinaryConfig] = None,
+        folder: str = "ai-avatar/audio",
+        check_existing: bool = True
+    ):
+        """
+        初期化
+
+        Args:
+            cloudinary_config: Cloudinary設定（省略時は設定済みのものを使う）
+            folder: アップロード先のフォルダ
+            check_existing: アップロード前にCloudinary上の存在を確認するか
+                （Admin APIを使うため、そのレート制限を避けたい場合はFalse）
+        """
+        self.folder = folder.strip("/")
+        self.check_existing = check_existing
+
+        # アップロード済みの索引（public_id → URL。無効ならNone）
+        self.index = get_cache("uploads")
+
+        if cloudinary_config:
+            cloudinary.config(
+                cloud_name=cloudinary_config.cloud_name,
+                api_key=cloudinary_config.api_key,
+                api_secret=cloudinary_config.api_secret
+            )
+
+    def _upload(self, path: str) -> str:
+        public_id = f"{self.folder}/{_file_sha256(path)}"
+        index_key = DiskCache.make_key("cloudinary", public_id)
+
+        if self.index is not None:
+            entry = self.index.get(index_key)
+            if entry is not None:
+                logger.info(f"アップロード省略（アップロード済み）: {public_id}")
+                return entry[0]["url"]
+
+        url = self._find_existing(public_id) if self.check_existing else None
+        if url:
+            logger.info(f"アップロード省略（Cloudinaryに存在）: {public_id}")
+        else:
+            url = self._upload_new(path, public_id)
+
+        if self.index is not None:
+            self.index.put(index_key, {"url": url})
+        return url
+
+    def _find_existing(self, public_id: str) -> Optional[str]:
+        """Cloudinary上にあればそのURL（ない・確認できない場合はNone）"""
+        try:
+            result = cloudinary.api.resource(public_id, resource_type="video")
+        except cloudinary.exceptions.NotFound:
+            return None
+        except cloudinary.exceptions.Error as e:
+            # レート制限などで確認できなくても、overwrite=False のアップロードで重複はしない
+            logger.warning(f"Cloudinaryの存在確認に失敗（アップロードします）: {e}")
+            return None
+        return result.get("secure_url")
+
+    def _upload_new(self, path: str, public_id: str) -> str:
+        """アップロード（同じ public_id が既にあれば上書きせず、そのURLが返る）"""
+        options = {}
+        if path.endswith(".wav"):
+            # ローカルでエンコードできなかった場合のみ、MP3への変換をCloudinaryで行う
+            options = {
+                "format": "mp3",  # WAVをMP3に自動変換
+                "eager": [{"format": "mp3"}],  # 変換を強制実行
+                "eager_async": False  # 変換完了まで待機
+            }
+
+        try:
+            result = cloudinary.uploader.upload(
+                path,
+                resource_type="video",  # 音声も"video"
+                public_id=public_id,
+                overwrite=False,
+                **options
+            )
+        except cloudinary.exceptions.Error as e:
+            raise CloudinaryError(f"アップロード失敗: {e}")
+
+        url = result.get("secure_url")
+        if not url:
+            raise CloudinaryError("URLが取得できませんでした")
+        return url
+
+
+class DIDAudioHost(AudioHost):
+    """
+    D-IDの音声アップロード（POST /audios）
+
+    返る s3:// のURLはD-IDのTalkでのみ使える（ブラウザでは再生できない）。
+    D-ID側で一定期間後に削除されるため、期限付きURLとして扱う
+    """
+
+    name = "did"
+
+    def __init__(
+        self,
+        api_key: str,
+        api_url: str = "https://api.d-id.com",
+        url_lifetime: float = 3600
+    ):
+        """
+        初期化
+
+        Args:
+            api_key: D-ID APIキー
+            api_url: D-ID API URL
+            url_lifetime: 返るURLを再利用してよい期間（秒）
+        """
+        self.api_url = api_url
+        self.url_lifetime = url_lifetime
+        self.session = get_session("did")
+        self._headers = {"Authorization": f"Basic {api_key}"}
+
+    def _upload(self, path: str) -> str:
+        content_type, ext = _audio_type(path)
+        filename = os.path.splitext(os.path.basename(path))[0] + ext
+
+        with open(path, 'rb') as f:
+            response = self.session.post(
+                f"{self.api_url}/audios",
+                headers=self._headers,
+                files={"audio": (filename, f, content_type)},
+                timeout=60
+            )
+
+        if response.status_code not in (200, 201):
+            raise UploadError(
+                f"D-IDへの音声アップロード失敗 (HTTP {response.status_code}): {response.text}"
+            )
+
+        url = response.json().get("url")
+        if not url:
+            raise UploadError("D-IDからURLが取得できませんでした")
+        return url
+
+
+class S3AudioHost(AudioHost):
+    """
+    S3互換ストレージ
+
+    キーは <prefix>/<内容のSHA-256>.<拡張子>。public_base_url があれば公開URL、
+    なければ署名付きURL（presign_seconds 秒有効）を返す
+    """
+
+    name = "s3"
+
+    def __init__(
+        self,
+        bucket: str,
+        prefix: str = "ai-avatar/audio",
+        endpoint_url: Optional[str] = None,
+        region: Optional[str] = None,
+        public_base_url: Optional[str] = None,
+        presign_seconds: int = 3600
+    ):
+        """
+        初期化（認証情報は boto3 の標準の方法で取得: 環境変数・~/.aws など）
+
+        Args:
+            bucket: バケット名
+            prefix: キーの接頭辞
+            endpoint_url: S3互換ストレージのURL（AWS S3なら省略）
+            region: リージョン
+            public_base_url: 公開URLのベース（例: "https://cdn.example.com"）
+            presign_seconds: 署名付きURLの有効期間（秒）
+
+        Raises:
+            ConfigError: boto3 がない・バケット未設定
+        """
+        if boto3 is None:
+            raise ConfigError("audio_host.backend: s3 には boto3 が必要です（pip install boto3）")
+        if not bucket:
+            raise ConfigError("audio_host.s3.bucket が未設定です")
+
+        self.bucket = bucket
+        self.prefix = prefix.strip("/")
+        self.public_base_url = public_base_url.rstrip("/") if public_base_url else None
+        self.presign_seconds = presign_seconds
+        # 公開URLは無期限、署名付きURLは presign_seconds 秒で失効
+        self.url_lifetime = None if self.public_base_url else presign_seconds
+        self.client = boto3.client(
+            "s3",
+            endpoint_url=endpoint_url or None,
+            region_name=region or None
+        )
+
+    def _upload(self, path: str) -> str:
+        content_type, ext = _audio_type(path)
+        key = f"{self.prefix}/{_file_sha256(path)}{ext}"
+
+        self.client.upload_file(path, self.bucket, key, ExtraArgs={"ContentType": content_type})
+
+        if self.public_base_url:
+            return f"{self.public_base_url}/{key}"
+
+        return self.client.generate_presigned_url(
+            "get_object",
+            Params={"Bucket": self.bucket, "Key": key},
+            ExpiresIn=self.presign_seconds
+        )
+
+
+class StubAudioHost(AudioHost):
+    """
+    テスト用（ファイルの内容をプロセス内に保持し、ダミーのURLを返す）
+
+    Example:
+        >>> host = StubAudioHost()
+        >>> url, _ = host.upload("/tmp/audio.mp3")
+        >>> data = host.files[url]
+    """
+
+    name = "stub"
+
+    def __init__(self, base_url: str = "https://stub.invalid/audio"):
+        """
+        初期化
+
+        Args:
+            base_url: 返すURLのベース
+        """
+        self.base_url = base_url.rstrip("/")
+        self.files: Dict[str, bytes] = {}
+
+    def _upload(self, path: str) -> str:
+        with open(path, 'rb') as f:
+            data = f.read()
+
+        url = f"{self.base_url}/{hashlib.sha256(data).hexdigest()}{_audio_type(path)[1]}"
+        self.files[url] = data
+        return url
+
+
+def create_audio_host(
+    backend: Optional[str] = None,
+    cloudinary_config: Optional[CloudinaryConfig] = None,
+    did_api_key: Optional[str] = None
+) -> AudioHost:
+    """
+    config.yaml の audio_host に従うバックエンドを作成
+
+    Args:
+        backend: バックエンド名（None: audio_host.backend、既定は cloudinary）
+        cloudinary_config: Cloudinary設定（cloudinary の場合）
+        did_api_key: D-ID APIキー（did の場合）
+
+    Returns:
+        AudioHostインスタンス
+
+    Raises:
+        ConfigError: 不明なバックエンド・必要な設定がない
+
+    Example:
+        >>> host = create_audio_host(cloudinary_config=config, did_api_key=did_key)
+    """
+    config = get_config()
+    backend = backend or config.get("audio_host.backend", "cloudinary")
+
+    if backend == "cloudinary":
+        return CloudinaryAudioHost(
+            cloudinary_config,
+            folder=config.get("cloudinary.folder", "ai-avatar/audio"),
+            check_existing=config.get("cloudinary.check_existing", True)
+        )
+
+    if backend == "did":
+        if not did_api_key:
+            raise ConfigError("audio_host.backend: did にはD-IDのAPIキーが必要です")
+        return DIDAudioHost(
+            did_api_key,
+            api_url=config.get("did.api_url", "https://api.d-id.com"),
+            url_lifetime=config.get("audio_host.did.url_lifetime_seconds", 3600)
+        )
+
+    if backend == "s3":
+        return S3AudioHost(
+            bucket=config.get("audio_host.s3.bucket", ""),
+            prefix=config.get("audio_host.s3.prefix", "ai-avatar/audio"),
+            endpoint_url=config.get("audio_host.s3.endpoint_url"),
+            region=config.get("audio_host.s3.region"),
+            public_base_url=config.get("audio_host.s3.public_base_url"),
+            presign_seconds=config.get("audio_host.s3.presign_seconds", 3600)
+        )
+
+    if backend == "stub":
+        return StubAudioHost(config.get("audio_host.stub.base_url", "https://stub.invalid/audio"))
+
+    raise ConfigError(f"不明な audio_host.backend: {backend}（cloudinary / did / s3 / stub）")
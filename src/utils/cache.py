@@ -0,0 +1,345 @@
+"""
+ディスクキャッシュ
+
+機能:
+  - コンテンツアドレス方式（キー = 内容のハッシュ）
+  - サイズ上限とLRU削除（上限なしも可）
+  - アトミック書き込み（複数プロセスで共有可能）
+  - ヒット/ミス回数の集計
+"""
+
+import hashlib
+import json
+import os
+import shutil
+import tempfile
+import threading
+from pathlib import Path
+from typing import Any, Dict, List, Optional, Tuple
+
+from .logger import get_logger
+from .config import get_config
+
+logger = get_logger(__name__)
+
+
+# 上限を超えたら、上限のこの割合まで削除する（上限付近で書き込みのたびに走査しないように）
+EVICT_TARGET = 0.9
+
+
+class DiskCache:
+    """
+    コンテンツアドレス方式のディスクキャッシュ
+
+    各エントリは <key>.json（メタデータ）と、任意で <key>.data（本体ファイル）からなる。
+    本体→メタデータの順に一時ファイルから os.replace で配置するため、
+    メタデータが読めるエントリは常に書き込み完了済み。
+    参照時にメタデータの更新時刻を更新し、上限超過時は古いものから削除する（LRU）。
+    合計サイズは最初の書き込み時に1回だけ走査して求め、以降は書き込み・削除の差分で更新する
+    （ディレクトリ全体の走査は上限を超えた時だけ）
+
+    Example:
+        >>> cache = DiskCache(".cache/audio", max_bytes=1024 ** 3)
+        >>> key = DiskCache.make_key("こんにちは", "voice_xxxxx", 1.0)
+        >>> cache.put(key, {"audio_url": "https://..."}, data_path="/tmp/a.wav")
+        >>> meta, path = cache.get(key)
+    """
+
+    def __init__(self, directory: str, max_bytes: Optional[int]):
+        """
+        初期化
+
+        Args:
+            directory: キャッシュディレクトリ
+            max_bytes: 合計サイズの上限（バイト、None: 上限なし・削除しない）
+        """
+        self.directory = Path(directory)
+        self.max_bytes = max_bytes
+        self.hits = 0
+        self.misses = 0
+        self._lock = threading.Lock()
+
+        # 合計サイズ（未走査ならNone。他プロセスの書き込みは次の走査で反映）
+        self._total_bytes: Optional[int] = None
+
+        self.directory.mkdir(parents=True, exist_ok=True)
+
+    @staticmethod
+    def make_key(*parts: Any) -> str:
+        """
+        キャッシュキーを作成
+
+        Args:
+            *parts: キーの構成要素（JSONにできる値）
+
+        Returns:
+            SHA-256の16進文字列
+        """
+        payload = json.dumps(parts, ensure_ascii=False, sort_keys=True)
+        return hashlib.sha256(payload.encode("utf-8")).hexdigest()
+
+    def _paths(self, key: str) -> Tuple[Path, Path]:
+        """(メタデータ, 本体) のパス（先頭2文字でディレクトリを分ける）"""
+        shard = self.directory / key[:2]
+        return (shard / f"{key}.json", shard / f"{key}.data")
+
+    def get(self, key: str) -> Optional[Tuple[Dict[str, Any], Optional[str]]]:
+        """
+        エントリを取得
+
+        Args:
+            key: キャッシュキー
+
+        Returns:
+            (meta, data_path): メタデータと本体ファイルのパス（本体なしはNone）
+            エントリがなければNone
+        """
+        meta_path, data_path = self._paths(key)
+
+        try:
+            with open(meta_path, 'r', encoding='utf-8') as f:
+                meta = json.load(f)
+
+            has_data = meta.get("_has_data", False)
+            if has_data and not data_path.exists():
+                # 他プロセスが削除中
+                raise FileNotFoundError(data_path)
+
+            # LRU用に参照時刻を更新
+            os.utime(meta_path)
+
+        except (FileNotFoundError, json.JSONDecodeError):
+            with self._lock:
+                self.misses += 1
+            return None
+
+        with self._lock:
+            self.hits += 1
+
+        meta = {k: v for k, v in meta.items() if k != "_has_data"}
+        return (meta, str(data_path) if has_data else None)
+
+    def put(
+        self,
+        key: str,
+        meta: Dict[str, Any],
+        data_path: Optional[str] = None,
+        move: bool = False
+    ) -> Optional[str]:
+        """
+        エントリを保存（既存のエントリは置き換え）
+
+        Args:
+            key: キャッシュキー
+            meta: メタデータ（JSONにできる値）
+            data_path: 本体としてコピーするファイル（省略可）
+            move: コピーせずに移動する（同じファイルシステム上の大きなファイル向け）
+
+        Returns:
+            キャッシュ内の本体ファイルのパス（本体なしはNone）
+        """
+        meta_path, cached_data_path = self._paths(key)
+        meta_path.parent.mkdir(parents=True, exist_ok=True)
+        old_size = self._entry_size(meta_path, cached_data_path)
+
+        if data_path is not None and move:
+            os.replace(data_path, cached_data_path)
+        elif data_path is not None:
+            self._atomic_copy(data_path, cached_data_path)
+
+        payload = dict(meta, _has_data=data_path is not None)
+        self._atomic_write(
+            meta_path,
+            json.dumps(payload, ensure_ascii=False).encode("utf-8")
+        )
+
+        total = self._track(self._entry_size(meta_path, cached_data_path) - old_size)
+        if total is not None and total > self.max_bytes:
+            self.evict()
+        return str(cached_data_path) if data_path is not None else None
+
+    def keys(self) -> List[str]:
+        """
+        保存されているキーの一覧
+
+        Returns:
+            キャッシュキーのリスト（順不同）
+        """
+        return [meta_path.stem for meta_path in self.directory.glob("*/*.json")]
+
+    def delete(self, key: str) -> None:
+        """
+        エントリを削除（なければ何もしない）
+
+        Args:
+            key: キャッシュキー
+        """
+        size = self._entry_size(*self._paths(key))
+
+        # メタデータを先に消す（読み手が本体だけ残ったエントリを見ないように）
+        for path in self._paths(key):
+            try:
+                path.unlink()
+            except FileNotFoundError:
+                pass
+
+        self._track(-size)
+
+    @staticmethod
+    def _entry_size(meta_path: Path, data_path: Path) -> int:
+        """エントリのバイト数（メタデータ + 本体、なければ0）"""
+        size = 0
+        for path in (meta_path, data_path):
+            try:
+                size += path.stat().st_size
+            except FileNotFoundError:
+                pass
+        return size
+
+    def _scan(self) -> List[Tuple[float, int, Path, Path]]:
+        """全エントリの (参照時刻, バイト数, メタデータ, 本体)"""
+        entries = []
+        for meta_path in self.directory.glob("*/*.json"):
+            data_path = meta_path.with_suffix(".data")
+            try:
+                mtime = meta_path.stat().st_mtime
+            except FileNotFoundError:
+                continue
+            entries.append((mtime, self._entry_size(meta_path, data_path), meta_path, data_path))
+        return entries
+
+    def _track(self, delta: int) -> Optional[int]:
+        """
+        合計サイズを差分で更新（初回のみ走査して求める）
+
+        Returns:
+            更新後の合計サイズ（上限なしならNone）
+        """
+        if self.max_bytes is None:
+            return None
+
+        with self._lock:
+            if self._total_bytes is None:
+                # 走査結果には今回の書き込み・削除が反映済み
+                self._total_bytes = sum(size for _, size, _, _ in self._scan())
+            else:
+                self._total_bytes = max(0, self._total_bytes + delta)
+            return self._total_bytes
+
+    def _atomic_copy(self, src: str, dest: Path) -> None:
+        """同じディレクトリの一時ファイルにコピーしてから置き換え"""
+        fd, tmp_path = tempfile.mkstemp(dir=dest.parent, suffix=".tmp")
+        try:
+            with os.fdopen(fd, 'wb') as f, open(src, 'rb') as source:
+                shutil.copyfileobj(source, f)
+            os.replace(tmp_path, dest)
+        except BaseException:
+            if os.path.exists(tmp_path):
+                os.unlink(tmp_path)
+            raise
+
+    def _atomic_write(self, dest: Path, data: bytes) -> None:
+        """同じディレクトリの一時ファイルに書いてから置き換え"""
+        fd, tmp_path = tempfile.mkstemp(dir=dest.parent, suffix=".tmp")
+        try:
+            with os.fdopen(fd, 'wb') as f:
+                f.write(data)
+            os.replace(tmp_path, dest)
+        except BaseException:
+            if os.path.exists(tmp_path):
+                os.unlink(tmp_path)
+            raise
+
+    def evict(self) -> int:
+        """
+        上限を超えている場合、参照の古いエントリから上限の EVICT_TARGET 倍まで削除
+
+        Returns:
+            削除したエントリ数
+        """
+        if self.max_bytes is None:
+            return 0
+
+        # 実際のサイズで判定し直す（他プロセスの書き込み・削除もここで反映）
+        entries = self._scan()
+        total = sum(size for _, size, _, _ in entries)
+
+        if total <= self.max_bytes:
+            with self._lock:
+                self._total_bytes = total
+            return 0
+
+        target = self.max_bytes * EVICT_TARGET
+        removed = 0
+        for _, size, meta_path, data_path in sorted(entries, key=lambda e: e[0]):
+            if total <= target:
+                break
+
+            # メタデータを先に消す（読み手が本体だけ残ったエントリを見ないように）
+            for path in (meta_path, data_path):
+                try:
+                    path.unlink()
+                except FileNotFoundError:
+                    pass
+
+            total -= size
+            removed += 1
+
+        with self._lock:
+            self._total_bytes = total
+
+        logger.info(f"キャッシュ削除（LRU）: {removed}件 ({self.directory})")
+        return removed
+
+    def stats(self) -> Dict[str, Any]:
+        """
+        ヒット/ミス回数を取得
+
+        Returns:
+            {"hits": int, "misses": int, "hit_rate": float}
+        """
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {
+                "hits": self.hits,
+                "misses": self.misses,
+                "hit_rate": self.hits / lookups if lookups else 0.0
+            }
+
+
+# キャッシュ名ごとのインスタンス（プロセス内で共有し、ヒット/ミス回数を累積）
+_caches: Dict[str, DiskCache] = {}
+_caches_lock = threading.Lock()
+
+
+def get_cache(name: str) -> Optional[DiskCache]:
+    """
+    config.yaml の cache.<name> に従うキャッシュを取得
+
+    Args:
+        name: キャッシュ名（例: "audio"）
+
+    Returns:
+        DiskCacheインスタンス（無効化されている場合はNone）
+
+    Example:
+        >>> cache = get_cache("audio")
+        >>> if cache:
+        ...     print(cache.stats())
+    """
+    config = get_config()
+
+    if not config.get(f"cache.{name}.enabled", False):
+        return None
+
+    with _caches_lock:
+        if name not in _caches:
+            base_dir = config.get("cache.dir", ".cache")
+            # max_size_mb: null は上限なし（ユーザーが保存したものなど、削除してはいけない場合）
+            max_mb = config.get(f"cache.{name}.max_size_mb", 1024)
+            _caches[name] = DiskCache(
+                os.path.join(base_dir, name),
+                max_bytes=int(max_mb * 1024 * 1024) if max_mb is not None else None
+            )
+
+        return _caches[name]
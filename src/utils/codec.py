@@ -0,0 +1,67 @@
+"""
+高速デコード
+
+機能:
+  - JSONデコード（orjson があれば使用、なければ標準ライブラリ）
+  - Base64デコード（pybase64 があれば使用、なければ binascii）
+
+Cartesiaのchunkメッセージは大部分がBase64文字列のため、
+長いスクリプトでは数千回のデコードが受信処理の大半を占める
+"""
+
+import binascii
+import json
+from typing import Any, Union
+
+try:
+    import orjson
+except ImportError:  # 任意依存
+    orjson = None
+
+try:
+    import pybase64
+except ImportError:  # 任意依存
+    pybase64 = None
+
+
+# 使用中のバックエンド名（ログ・ベンチマーク用）
+JSON_BACKEND = "orjson" if orjson is not None else "json"
+BASE64_BACKEND = "pybase64" if pybase64 is not None else "binascii"
+
+
+def loads_json(data: Union[str, bytes]) -> Any:
+    """
+    JSONをデコード
+
+    Args:
+        data: JSON文字列
+
+    Returns:
+        デコードした値
+
+    Raises:
+        ValueError: JSONとして不正（json.JSONDecodeError / orjson.JSONDecodeError）
+    """
+    if orjson is not None:
+        return orjson.loads(data)
+    return json.loads(data)
+
+
+def decode_base64(data: Union[str, bytes]) -> bytes:
+    """
+    Base64をデコード
+
+    base64.b64decode と異なり、文字列をいったんbytesに変換するコピーを挟まない
+
+    Args:
+        data: Base64文字列（ASCII）
+
+    Returns:
+        デコードしたバイト列
+
+    Raises:
+        binascii.Error: Base64として不正
+    """
+    if pybase64 is not None:
+        return pybase64.b64decode(data)
+    return binascii.a2b_base64(data)
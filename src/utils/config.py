@@ -114,7 +114,6 @@ class Config:
             },
             "did": {
                 "api_url": "https://api.d-id.com",
-                "poll_interval_seconds": 5,
                 "poll_timeout_seconds": 300
             },
             "logging": {
@@ -0,0 +1,206 @@
+"""
+結果の重複排除
+
+機能:
+  - 入力の内容ハッシュ（URLの中身のSHA-256）をキーにした結果の永続キャッシュ
+    （URLに内容ハッシュが含まれていれば、それを使いダウンロードしない）
+  - 実行中の同じキーのリクエストの合流（最初の1件だけ実行し、他はその結果を待つ）
+
+同じ音声・同じアバターを再送信した場合（再実行・UIの不具合後のやり直し・
+別のバッチに同じスクリプト）に、外部APIのクレジットと待ち時間を使わずに済む
+"""
+
+import hashlib
+import re
+import threading
+from concurrent.futures import Future
+from typing import Any, Dict, Optional, Tuple
+from urllib.parse import urlsplit
+
+import requests
+
+from .logger import get_logger
+from .cache import DiskCache, get_cache
+from .http import create_session
+
+logger = get_logger(__name__)
+
+# 内容のSHA-256をファイル名にしたURL（Cloudinaryの音声・アバター画像の public_id、S3のキーなど）
+_HASH_IN_PATH = re.compile(r"(?:^|/)([0-9a-f]{64})(?:\.[A-Za-z0-9]+)?$")
+
+
+class ResultCache:
+    """
+    重複排除キャッシュ
+
+    URLのファイル名が内容のSHA-256ならそれを使う（アップロード先が内容ハッシュで保存したもの）。
+    それ以外のURLは内容をダウンロードしてハッシュを求め、URL ごとに記録して
+    2回目以降はダウンロードしない（同じURLの内容が変わらない前提）。
+    合流用の Future は concurrent.futures.Future のため、
+    同期コードからは result()、非同期コードからは asyncio.wrap_future で待てる
+
+    Example:
+        >>> results = get_result_cache("renders")
+        >>> key = results.make_key(results.content_hash(audio_url), "config")
+        >>> future, owner = results.join(key)
+        >>> if owner:
+        ...     result = do_work()
+        ...     results.put(key, result_meta)
+        ...     results.finish(key, result)
+        ... else:
+        ...     result = future.result()
+    """
+
+    def __init__(self, cache: DiskCache, session: Optional[requests.Session] = None):
+        """
+        初期化
+
+        Args:
+            cache: 保存先のキャッシュ
+            session: 内容のダウンロードに使うセッション
+                （省略時はリトライなし。確認できなければ重複排除を使わないだけのため待たない）
+        """
+        self.cache = cache
+        self.session = session or create_session(max_retries=0)
+        self._pending: Dict[str, Future] = {}
+        self._lock = threading.Lock()
+
+    def content_hash(self, url: str, timeout: float = 30.0) -> str:
+        """
+        URLの内容のSHA-256（URLに含まれる・記録済みならダウンロードしない）
+
+        Args:
+            url: 内容を確認するURL
+            timeout: 接続・読み込みのタイムアウト（秒）
+
+        Returns:
+            SHA-256の16進文字列
+
+        Raises:
+            requests.RequestException: ダウンロードに失敗
+        """
+        if urlsplit(url).scheme not in ("http", "https"):
+            # 取得できないURL（D-IDにアップロードした音声の s3:// など）はURL自体を識別子にする
+            return DiskCache.make_key("opaque", url)
+
+        match = _HASH_IN_PATH.search(urlsplit(url).path)
+        if match:
+            return match.group(1)
+
+        url_key = DiskCache.make_key("content", url)
+        entry = self.cache.get(url_key)
+        if entry is not None:
+            return entry[0]["sha256"]
+
+        sha256 = hashlib.sha256()
+        with self.session.get(url, stream=True, timeout=timeout) as response:
+            response.raise_for_status()
+            for chunk in response.iter_content(chunk_size=64 * 1024):
+                sha256.update(chunk)
+
+        digest = sha256.hexdigest()
+        self.cache.put(url_key, {"sha256": digest})
+        return digest
+
+    @staticmethod
+    def make_key(*parts: Any) -> str:
+        """
+        結果のキーを作成
+
+        Args:
+            *parts: キーの構成要素（内容ハッシュ・設定など、JSONにできる値）
+
+        Returns:
+            SHA-256の16進文字列
+        """
+        return DiskCache.make_key("result", *parts)
+
+    def get(self, key: str) -> Optional[Dict[str, Any]]:
+        """
+        保存済みの結果を取得
+
+        Args:
+            key: 結果のキー
+
+        Returns:
+            結果のメタデータ（なければNone）
+        """
+        entry = self.cache.get(key)
+        return entry[0] if entry is not None else None
+
+    def put(self, key: str, meta: Dict[str, Any]) -> None:
+        """
+        結果を保存
+
+        Args:
+            key: 結果のキー
+            meta: 結果のメタデータ（JSONにできる値）
+        """
+        self.cache.put(key, meta)
+
+    def invalidate(self, key: str) -> None:
+        """
+        結果を無効にする（参照先が使えなくなった場合など）
+
+        Args:
+            key: 結果のキー
+        """
+        self.cache.delete(key)
+
+    def join(self, key: str) -> Tuple[Future, bool]:
+        """
+        同じキーの処理に合流
+
+        Args:
+            key: 結果のキー
+
+        Returns:
+            (future, owner): owner がTrueなら呼び出し元が処理し、finish() で結果を渡す。
+            Falseなら処理中の呼び出しの結果を future で待つ
+        """
+        with self._lock:
+            future = self._pending.get(key)
+            if future is not None:
+                return (future, False)
+
+            future = Future()
+            self._pending[key] = future
+            return (future, True)
+
+    def finish(self, key: str, result: Any) -> None:
+        """
+        処理の結果を待っている呼び出しに渡す
+
+        Args:
+            key: 結果のキー
+            result: 結果（合流した呼び出しの future.result() の値）
+        """
+        with self._lock:
+            future = self._pending.pop(key, None)
+        if future is not None and not future.done():
+            future.set_result(result)
+
+
+# 名前ごとのインスタンス（プロセス内で共有し、実行中のリクエストを合流させる）
+_result_caches: Dict[str, ResultCache] = {}
+_result_caches_lock = threading.Lock()
+
+
+def get_result_cache(name: str) -> Optional[ResultCache]:
+    """
+    config.yaml の cache.<name> に従う重複排除キャッシュを取得
+
+    Args:
+        name: キャッシュ名（例: "renders"）
+
+    Returns:
+        ResultCacheインスタンス（無効化されている場合はNone）
+    """
+    cache = get_cache(name)
+    if cache is None:
+        return None
+
+    with _result_caches_lock:
+        if name not in _result_caches:
+            _result_caches[name] = ResultCache(cache)
+        return _result_caches[name]
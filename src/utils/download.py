@@ -0,0 +1,228 @@
+"""
+ファイルのダウンロード
+
+機能:
+  - チャンク単位のストリーミング（全体をメモリに載せない）
+  - 途中で切れた場合は HTTP Range で続きから再開
+  - サイズ・チェックサムの検証（SHA-256、S3の ETag が MD5 なら照合）
+  - コンテンツアドレス方式のキャッシュへの保存（同じURLは再ダウンロードしない）
+
+D-IDの動画URL（S3の署名付きURL）は期限切れになるため、
+完了時にローカルへ保存しておけばプレビューとダウンロードを何度でも行える
+"""
+
+import hashlib
+import re
+import time
+from pathlib import Path
+from typing import Optional, Tuple
+from urllib.parse import urlsplit, urlunsplit
+
+import requests
+
+from .logger import get_logger
+from .cache import DiskCache
+from .errors import DownloadError
+from .http import get_session
+
+logger = get_logger(__name__)
+
+# S3 の単一パートアップロードの ETag（本体の MD5）
+_MD5_ETAG = re.compile(r'^"?([0-9a-f]{32})"?$')
+
+
+def _hash_file(path: Path, *algorithms: str) -> tuple:
+    """途中までダウンロードしたファイルのハッシュを計算（再開時に続きから更新する）"""
+    hashes = tuple(hashlib.new(name) for name in algorithms)
+    with open(path, 'rb') as f:
+        for block in iter(lambda: f.read(1024 * 1024), b""):
+            for h in hashes:
+                h.update(block)
+    return hashes
+
+
+def download_file(
+    url: str,
+    dest_path: str,
+    session: Optional[requests.Session] = None,
+    chunk_size: int = 1024 * 1024,
+    max_attempts: int = 5,
+    timeout: float = 60.0,
+    expected_sha256: Optional[str] = None
+) -> Tuple[str, int]:
+    """
+    URLの内容をファイルに保存（途中で切れたら続きから再開）
+
+    dest_path に途中までのファイルがあれば、そこから再開する
+    （サーバーが Range に対応していなければ最初から）
+
+    Args:
+        url: ダウンロードするURL
+        dest_path: 保存先
+        session: 使用するセッション（省略時は共有セッション "download"）
+        chunk_size: 1回に読み込むバイト数
+        max_attempts: 接続を試みる回数（再開を含む）
+        timeout: 接続・読み込みのタイムアウト（秒）
+        expected_sha256: 期待するSHA-256（省略時は検証しない）
+
+    Returns:
+        (sha256, size): 内容のSHA-256（16進）とバイト数
+
+    Raises:
+        DownloadError: 回数内に完了しない・サイズやチェックサムが一致しない
+
+    Example:
+        >>> sha256, size = download_file(video_url, "/tmp/video.mp4.part")
+    """
+    session = session or get_session("download")
+    path = Path(dest_path)
+    path.parent.mkdir(parents=True, exist_ok=True)
+
+    total_size: Optional[int] = None
+    etag_md5: Optional[str] = None
+    last_error: Optional[Exception] = None
+
+    for attempt in range(1, max_attempts + 1):
+        offset = path.stat().st_size if path.exists() else 0
+        headers = {"Range": f"bytes={offset}-"} if offset else {}
+
+        try:
+            with session.get(url, headers=headers, stream=True, timeout=timeout) as response:
+                if response.status_code == 416:
+                    # 途中のファイルが既に全体の長さに達している
+                    match = re.match(r"bytes \*/(\d+)", response.headers.get("Content-Range", ""))
+                    if match and int(match.group(1)) == offset:
+                        total_size = offset
+                        sha256, md5 = _hash_file(path, "sha256", "md5")
+                        break
+                    path.unlink()
+                    raise DownloadError("途中のファイルが一致しないため最初から再開します")
+
+                if response.status_code == 206:
+                    content_range = response.headers.get("Content-Range", "")
+                    match = re.match(r"bytes (\d+)-\d+/(\d+|\*)", content_range)
+                    if not match or int(match.group(1)) != offset:
+                        path.unlink()
+                        raise DownloadError(f"想定外の Content-Range: {content_range!r}")
+                    if match.group(2) != "*":
+                        total_size = int(match.group(2))
+                    sha256, md5 = _hash_file(path, "sha256", "md5")
+                    mode = 'ab'
+
+                elif response.status_code == 200:
+                    # Range 非対応（または初回）は最初から
+                    if offset:
+                        logger.info("Range 非対応のため最初からダウンロード")
+                        offset = 0
+                    length = response.headers.get("Content-Length")
+                    total_size = int(length) if length and length.isdigit() else None
+                    sha256, md5 = hashlib.sha256(), hashlib.md5()
+                    mode = 'wb'
+
+                else:
+                    raise DownloadError(
+                        f"ダウンロード失敗 (HTTP {response.status_code})"
+                    )
+
+                match = _MD5_ETAG.match(response.headers.get("ETag", "").lower())
+                if match:
+                    etag_md5 = match.group(1)
+
+                with open(path, mode) as f:
+                    for chunk in response.iter_content(chunk_size=chunk_size):
+                        f.write(chunk)
+                        sha256.update(chunk)
+                        md5.update(chunk)
+
+            size = path.stat().st_size
+            if total_size is not None and size < total_size:
+                raise DownloadError(f"途中で切断されました（{size}/{total_size}バイト）")
+            break
+
+        except (requests.RequestException, DownloadError) as e:
+            last_error = e
+            received = path.stat().st_size if path.exists() else 0
+            logger.warning(
+                f"ダウンロード中断（{attempt}/{max_attempts}回目、{received}バイト受信済み）: {e}"
+            )
+            if attempt < max_attempts:
+                time.sleep(min(2 ** (attempt - 1), 10))
+    else:
+        raise DownloadError(f"ダウンロードできませんでした: {last_error}")
+
+    size = path.stat().st_size
+    if total_size is not None and size != total_size:
+        path.unlink()
+        raise DownloadError(f"サイズが一致しません（{size}/{total_size}バイト）")
+
+    digest = sha256.hexdigest()
+    if etag_md5 and md5.hexdigest() != etag_md5:
+        path.unlink()
+        raise DownloadError("チェックサムが一致しません（ETag）")
+    if expected_sha256 and digest != expected_sha256:
+        path.unlink()
+        raise DownloadError("チェックサムが一致しません（SHA-256）")
+
+    return (digest, size)
+
+
+def _strip_query(url: str) -> str:
+    """署名などのクエリを除いたURL（同じファイルの署名付きURLを同一視する）"""
+    parts = urlsplit(url)
+    return urlunsplit((parts.scheme, parts.netloc, parts.path, "", ""))
+
+
+def fetch_to_cache(
+    url: str,
+    cache: DiskCache,
+    session: Optional[requests.Session] = None,
+    **options
+) -> Tuple[str, str]:
+    """
+    URLの内容をキャッシュに保存し、ローカルのパスを取得
+
+    本体は内容のSHA-256をキーに保存し（同じ内容は1つだけ）、
+    URL（クエリを除く）からそのキーを引けるようにする。
+    途中までの受信は <cache>/partial に残り、次の呼び出しで続きから再開する
+
+    Args:
+        url: ダウンロードするURL
+        cache: 保存先のキャッシュ
+        session: 使用するセッション
+        **options: download_file のオプション
+
+    Returns:
+        (data_path, sha256)
+
+    Raises:
+        DownloadError: ダウンロード・検証に失敗
+
+    Example:
+        >>> path, sha256 = fetch_to_cache(video.video_url, get_cache("videos"))
+    """
+    url_key = DiskCache.make_key("url", _strip_query(url))
+
+    entry = cache.get(url_key)
+    if entry is not None:
+        content = cache.get(entry[0]["sha256"])
+        if content is not None and content[1]:
+            logger.info(f"ダウンロード省略（キャッシュ済み）: {entry[0]['sha256'][:12]}")
+            return (content[1], entry[0]["sha256"])
+
+    partial_path = cache.directory / "partial" / f"{url_key}.part"
+    started = time.time()
+    digest, size = download_file(url, str(partial_path), session=session, **options)
+
+    data_path = cache.put(
+        digest,
+        {"size": size, "source_url": _strip_query(url)},
+        data_path=str(partial_path),
+        move=True
+    )
+    cache.put(url_key, {"sha256": digest})
+
+    elapsed = time.time() - started
+    logger.info(
+        f"ダウンロード完了: {size / 1024 / 1024:.1f}MB（{elapsed:.1f}秒）sha256={digest[:12]}"
+    )
+    return (data_path, digest)
@@ -38,6 +38,36 @@ class AudioGenerationError(VideoGenerationError):
     pass
 
 
+class AudioTooLongError(AudioGenerationError):
+    """
+    音声長超過エラー
+
+    音声がD-IDの制限時間を超えた（受信中に超えた場合はその時点で中止、
+    無音の圧縮が有効な場合は圧縮後の長さで判定）
+
+    Attributes:
+        duration_seconds: 上限を超えた音声の時間（秒、受信中に中止した場合はその時点まで）
+        limit_seconds: 上限（秒）
+
+    Example:
+        >>> raise AudioTooLongError(290.2, 290)
+    """
+
+    def __init__(self, duration_seconds: float, limit_seconds: float):
+        """
+        初期化
+
+        Args:
+            duration_seconds: 上限を超えた音声の時間（秒、受信中に中止した場合はその時点まで）
+            limit_seconds: 上限（秒）
+        """
+        super().__init__(
+            f"音声が長すぎるため生成を中止しました（{duration_seconds:.1f}秒 / 最大{limit_seconds}秒）"
+        )
+        self.duration_seconds = duration_seconds
+        self.limit_seconds = limit_seconds
+
+
 class VideoCreationError(VideoGenerationError):
     """
     動画作成エラー
@@ -98,6 +128,37 @@ class APIError(VideoGenerationError):
         return super().__str__()
 
 
+class RateLimitError(APIError):
+    """
+    レート制限エラー
+
+    APIが429（Too Many Requests）を返した
+
+    Attributes:
+        retry_after: 再試行まで待つ秒数（Retry-After ヘッダー、なければNone）
+
+    Example:
+        >>> raise RateLimitError("動画生成リクエスト失敗", retry_after=10.0)
+    """
+
+    def __init__(
+        self,
+        message: str,
+        retry_after: float = None,
+        response: str = None
+    ):
+        """
+        初期化
+
+        Args:
+            message: エラーメッセージ
+            retry_after: 再試行まで待つ秒数
+            response: レスポンス内容
+        """
+        super().__init__(message, status_code=429, response=response)
+        self.retry_after = retry_after
+
+
 class TimeoutError(VideoGenerationError):
     """
     タイムアウトエラー
@@ -110,7 +171,31 @@ class TimeoutError(VideoGenerationError):
     pass
 
 
-class CloudinaryError(VideoGenerationError):
+class DownloadError(VideoGenerationError):
+    """
+    ダウンロードエラー
+
+    生成された動画などの取得・検証の失敗
+
+    Example:
+        >>> raise DownloadError("チェックサムが一致しません")
+    """
+    pass
+
+
+class UploadError(VideoGenerationError):
+    """
+    アップロードエラー
+
+    音声ファイルのホスティング（src/utils/audio_host.py）関連のエラー
+
+    Example:
+        >>> raise UploadError("D-IDへの音声アップロード失敗 (HTTP 500)")
+    """
+    pass
+
+
+class CloudinaryError(UploadError):
     """
     Cloudinaryエラー
 
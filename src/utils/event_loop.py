@@ -0,0 +1,110 @@
+"""
+共有イベントループ
+
+機能:
+  - プロセス全体で1つのイベントループを専用スレッド（デーモン）で実行
+  - 同期コードからのコルーチン実行（submit / run_sync）
+
+呼び出しごとにループを作り直さないため、接続プールやセッションなど
+ループに紐付く非同期リソースを呼び出し間で共有できる。
+Streamlitの複数スレッドから同時に呼び出しても安全
+"""
+
+import asyncio
+import threading
+from concurrent.futures import Future
+from typing import Any, Coroutine, Optional
+
+from .logger import get_logger
+
+logger = get_logger(__name__)
+
+_loop: Optional[asyncio.AbstractEventLoop] = None
+_thread: Optional[threading.Thread] = None
+_lock = threading.Lock()
+
+
+def get_loop() -> asyncio.AbstractEventLoop:
+    """
+    共有イベントループを取得（初回呼び出し時にスレッドを起動）
+
+    Returns:
+        バックグラウンドスレッドで実行中のイベントループ
+    """
+    global _loop, _thread
+
+    with _lock:
+        if _loop is None or _loop.is_closed() or not _thread.is_alive():
+            loop = asyncio.new_event_loop()
+            started = threading.Event()
+
+            def run() -> None:
+                asyncio.set_event_loop(loop)
+                loop.call_soon(started.set)
+                loop.run_forever()
+
+            thread = threading.Thread(target=run, name="shared-event-loop", daemon=True)
+            thread.start()
+            started.wait()
+
+            _loop, _thread = loop, thread
+            logger.debug("共有イベントループを起動")
+
+        return _loop
+
+
+def submit(coro: Coroutine[Any, Any, Any]) -> Future:
+    """
+    コルーチンを共有イベントループに投入
+
+    Args:
+        coro: 実行するコルーチン
+
+    Returns:
+        concurrent.futures.Future（result() で結果を待てる）
+
+    Example:
+        >>> future = submit(client.generate("こんにちは"))
+        >>> audio, err = future.result()
+    """
+    loop = get_loop()
+
+    try:
+        running = asyncio.get_running_loop()
+    except RuntimeError:
+        running = None
+
+    if running is loop:
+        coro.close()
+        raise RuntimeError("共有イベントループ上からsubmit()を呼ぶとデッドロックします（awaitしてください）")
+
+    return asyncio.run_coroutine_threadsafe(coro, loop)
+
+
+def run_sync(
+    coro: Coroutine[Any, Any, Any],
+    timeout: Optional[float] = None
+) -> Any:
+    """
+    コルーチンを共有イベントループで実行し、結果を待つ
+
+    Args:
+        coro: 実行するコルーチン
+        timeout: 待機時間の上限（秒、None: 無制限）
+
+    Returns:
+        コルーチンの戻り値
+
+    Raises:
+        concurrent.futures.TimeoutError: timeout を超えた（コルーチンはキャンセル）
+
+    Example:
+        >>> audio, err = run_sync(client.generate("こんにちは"))
+    """
+    future = submit(coro)
+
+    try:
+        return future.result(timeout)
+    except BaseException:
+        future.cancel()
+        raise
@@ -0,0 +1,159 @@
+"""
+HTTPセッション
+
+機能:
+  - プロセス全体で共有する requests.Session（名前ごと）
+  - 接続プール（Keep-Alive でTCP/TLS接続を再利用）
+  - 自動リトライ（接続エラー・429・5xx、Retry-After を尊重）
+  - 非同期版の共有セッション（aiohttp.ClientSession、イベントループごと）
+
+ポーリングのように同じホストへ繰り返しリクエストする場合、
+毎回の接続確立（TCP + TLSハンドシェイク）を省ける
+"""
+
+import asyncio
+import threading
+from typing import Dict, Iterable, Tuple
+
+import aiohttp
+import requests
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
+
+from .logger import get_logger
+from .config import get_config
+
+logger = get_logger(__name__)
+
+# ステータスコードでリトライする対象（レート制限・一時的なサーバーエラー）
+RETRY_STATUS_CODES = (429, 500, 502, 503, 504)
+
+
+def create_session(
+    pool_maxsize: int = 10,
+    max_retries: int = 3,
+    backoff_factor: float = 1.0,
+    retry_methods: Iterable[str] = ("GET", "HEAD")
+) -> requests.Session:
+    """
+    接続プールとリトライを設定したセッションを作成
+
+    接続エラーはすべてのメソッドでリトライする（リクエストは未送信のため）。
+    読み込みエラー・ステータスコードでのリトライは retry_methods のみ
+    （POSTの再送で二重に作成しないように）
+
+    Args:
+        pool_maxsize: ホストごとに保持する接続数
+        max_retries: リトライ回数
+        backoff_factor: バックオフ係数（backoff_factor * 2^(n-1) 秒待つ）
+        retry_methods: 読み込みエラー・ステータスコードでリトライするメソッド
+
+    Returns:
+        requests.Session
+    """
+    retry = Retry(
+        total=max_retries,
+        connect=max_retries,
+        read=max_retries,
+        status=max_retries,
+        backoff_factor=backoff_factor,
+        status_forcelist=RETRY_STATUS_CODES,
+        allowed_methods=frozenset(retry_methods),
+        respect_retry_after_header=True,
+        raise_on_status=False  # リトライし尽くしたら最後のレスポンスを返す
+    )
+    adapter = HTTPAdapter(
+        pool_connections=pool_maxsize,
+        pool_maxsize=pool_maxsize,
+        max_retries=retry
+    )
+
+    session = requests.Session()
+    session.mount("https://", adapter)
+    session.mount("http://", adapter)
+    return session
+
+
+# 名前ごとのセッション（プロセス内で共有）
+_sessions: Dict[str, requests.Session] = {}
+_sessions_lock = threading.Lock()
+
+
+def get_session(name: str = "default") -> requests.Session:
+    """
+    共有セッションを取得（なければ config.yaml の設定で作成）
+
+    接続数は http.<name>.pool_maxsize（なければ http.pool_maxsize）、
+    リトライは retry.max_retries / retry.initial_delay（初回の待ち時間、以降2倍ずつ）に従う
+
+    Args:
+        name: セッション名（例: "did"）
+
+    Returns:
+        requests.Session（スレッド間で共有してよい）
+
+    Example:
+        >>> session = get_session("did")
+        >>> response = session.get(url, headers=headers, timeout=10)
+    """
+    with _sessions_lock:
+        if name not in _sessions:
+            config = get_config()
+            pool_maxsize = config.get(
+                f"http.{name}.pool_maxsize",
+                config.get("http.pool_maxsize", 10)
+            )
+            _sessions[name] = create_session(
+                pool_maxsize=pool_maxsize,
+                max_retries=config.get("retry.max_retries", 3),
+                backoff_factor=config.get("retry.initial_delay", 1.0)
+            )
+            logger.debug(f"HTTPセッション作成: {name}（接続数 {pool_maxsize}）")
+
+        return _sessions[name]
+
+
+# 名前ごとの非同期セッション（作成したイベントループと組で保持）
+_async_sessions: Dict[str, Tuple[asyncio.AbstractEventLoop, aiohttp.ClientSession]] = {}
+
+
+def get_async_session(name: str = "default") -> aiohttp.ClientSession:
+    """
+    実行中のイベントループで共有する aiohttp.ClientSession を取得
+
+    セッションはイベントループに紐付くため、別のループから呼ばれた場合は作り直す
+    （通常は共有イベントループ utils.event_loop から使うため1つに収まる）。
+    接続数は get_session と同じく http.<name>.pool_maxsize に従う
+
+    Args:
+        name: セッション名（例: "did"）
+
+    Returns:
+        aiohttp.ClientSession
+
+    Raises:
+        RuntimeError: イベントループの外から呼ばれた
+
+    Example:
+        >>> session = get_async_session("did")
+        >>> async with session.get(url, headers=headers) as response:
+        ...     data = await response.json()
+    """
+    loop = asyncio.get_running_loop()
+
+    with _sessions_lock:
+        entry = _async_sessions.get(name)
+        if entry is not None and entry[0] is loop and not entry[1].closed:
+            return entry[1]
+
+        config = get_config()
+        pool_maxsize = config.get(
+            f"http.{name}.pool_maxsize",
+            config.get("http.pool_maxsize", 10)
+        )
+        session = aiohttp.ClientSession(
+            connector=aiohttp.TCPConnector(limit=pool_maxsize, limit_per_host=pool_maxsize)
+        )
+        _async_sessions[name] = (loop, session)
+        logger.debug(f"非同期HTTPセッション作成: {name}（接続数 {pool_maxsize}）")
+        return session
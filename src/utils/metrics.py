@@ -0,0 +1,153 @@
+"""
+計測（ヒストグラム集計）
+
+機能:
+  - 処理時間・サイズなどの値をヒストグラムに集計
+  - プロセス内で共有（名前ごとに1つ）
+  - 集計結果のスナップショット（件数・合計・最小/最大・パーセンタイル）
+
+接続プールやセグメントサイズの調整に使う
+"""
+
+import bisect
+import threading
+from typing import Any, Dict, List, Optional, Sequence
+
+from .logger import get_logger
+
+logger = get_logger(__name__)
+
+# 既定のバケット上限（秒を想定、1ms〜10分を対数的に分割）
+DEFAULT_BUCKETS = (
+    0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5,
+    1.0, 2.5, 5.0, 10.0, 25.0, 50.0, 100.0, 250.0, 600.0
+)
+
+# サイズ・スループット用のバケット上限（1KB〜64MB、2倍刻み）
+SIZE_BUCKETS = tuple(float(2 ** i) for i in range(10, 27))
+
+# 件数用のバケット上限（1〜4096、2倍刻み）
+COUNT_BUCKETS = tuple(float(2 ** i) for i in range(0, 13))
+
+
+class Histogram:
+    """
+    固定バケットのヒストグラム
+
+    Example:
+        >>> histogram = Histogram("cartesia.first_chunk_seconds")
+        >>> histogram.observe(0.42)
+        >>> histogram.snapshot()["p50"]
+    """
+
+    def __init__(self, name: str, buckets: Sequence[float] = DEFAULT_BUCKETS):
+        """
+        初期化
+
+        Args:
+            name: 名前
+            buckets: バケットの上限値（昇順）。最後のバケットより大きい値は +Inf に入る
+        """
+        self.name = name
+        self.buckets = tuple(buckets)
+        self._counts: List[int] = [0] * (len(self.buckets) + 1)
+        self._count = 0
+        self._sum = 0.0
+        self._min: Optional[float] = None
+        self._max: Optional[float] = None
+        self._lock = threading.Lock()
+
+    def observe(self, value: float) -> None:
+        """
+        値を記録
+
+        Args:
+            value: 記録する値
+        """
+        with self._lock:
+            self._counts[bisect.bisect_left(self.buckets, value)] += 1
+            self._count += 1
+            self._sum += value
+            self._min = value if self._min is None else min(self._min, value)
+            self._max = value if self._max is None else max(self._max, value)
+
+    def _percentile(self, q: float) -> Optional[float]:
+        """パーセンタイル（該当バケットの上限値で近似し、最大値で頭打ち。ロック取得済みで呼ぶ）"""
+        if not self._count:
+            return None
+
+        target = q * self._count
+        cumulative = 0
+        for i, count in enumerate(self._counts):
+            cumulative += count
+            if cumulative >= target:
+                return min(self.buckets[i], self._max) if i < len(self.buckets) else self._max
+
+        return self._max
+
+    def snapshot(self) -> Dict[str, Any]:
+        """
+        集計結果を取得
+
+        Returns:
+            count, sum, min, max, mean, p50, p90, p99, buckets（上限値 → 件数）
+        """
+        with self._lock:
+            labels = [str(b) for b in self.buckets] + ["+Inf"]
+            return {
+                "count": self._count,
+                "sum": self._sum,
+                "min": self._min,
+                "max": self._max,
+                "mean": self._sum / self._count if self._count else None,
+                "p50": self._percentile(0.5),
+                "p90": self._percentile(0.9),
+                "p99": self._percentile(0.99),
+                "buckets": dict(zip(labels, self._counts)),
+            }
+
+
+# 名前ごとのヒストグラム（プロセス内で共有）
+_histograms: Dict[str, Histogram] = {}
+_histograms_lock = threading.Lock()
+
+
+def get_histogram(name: str, buckets: Sequence[float] = DEFAULT_BUCKETS) -> Histogram:
+    """
+    ヒストグラムを取得（なければ作成）
+
+    Args:
+        name: 名前（例: "cartesia.first_chunk_seconds"）
+        buckets: 作成時のバケット上限値
+
+    Returns:
+        Histogramインスタンス
+    """
+    with _histograms_lock:
+        if name not in _histograms:
+            _histograms[name] = Histogram(name, buckets)
+        return _histograms[name]
+
+
+def observe(name: str, value: float, buckets: Sequence[float] = DEFAULT_BUCKETS) -> None:
+    """
+    値を記録（get_histogram(name, buckets).observe(value) の省略形）
+
+    Example:
+        >>> observe("cartesia.upload_seconds", 1.8)
+        >>> observe("cartesia.audio_bytes", 1048576, SIZE_BUCKETS)
+    """
+    get_histogram(name, buckets).observe(value)
+
+
+def snapshot_all() -> Dict[str, Dict[str, Any]]:
+    """
+    すべてのヒストグラムの集計結果を取得
+
+    Returns:
+        名前 → snapshot() の辞書
+    """
+    with _histograms_lock:
+        histograms = list(_histograms.values())
+
+    return {histogram.name: histogram.snapshot() for histogram in histograms}
@@ -0,0 +1,299 @@
+"""
+ポーリングのスケジュール
+
+機能:
+  - 処理時間の予測（音声の長さ → 所要時間、過去のジョブから学習してファイルに保存）
+  - 予測完了時刻の少し前まで待ち、その後は短い間隔＋ジッター付きバックオフで確認
+  - 音声の長さに応じた期限
+
+固定間隔のポーリングに比べ、処理中の無駄なリクエストと、
+完了から検知までの待ち時間（最大で1間隔分）を減らす
+"""
+
+import json
+import os
+import random
+import tempfile
+import threading
+from pathlib import Path
+from typing import Dict, List, Optional, Tuple
+
+from .logger import get_logger
+from .config import get_config
+
+logger = get_logger(__name__)
+
+
+class RenderTimeModel:
+    """
+    処理時間の予測モデル（所要時間 = 固定分 + 係数 × 音声の長さ）
+
+    直近 history_size 件の実績から最小二乗法で求める。
+    実績が少ない・音声の長さにばらつきがない場合は「所要時間 / 音声の長さ」の中央値で、
+    実績がなければ事前の値（prior_*）で予測する
+
+    Example:
+        >>> model = RenderTimeModel(".cache/did_render_times.json")
+        >>> model.predict(45.0)
+        >>> model.observe(45.0, 62.3)
+    """
+
+    def __init__(
+        self,
+        path: Optional[str] = None,
+        history_size: int = 50,
+        prior_overhead_seconds: float = 15.0,
+        prior_seconds_per_audio_second: float = 1.0
+    ):
+        """
+        初期化（保存済みの実績があれば読み込む）
+
+        Args:
+            path: 実績の保存先（None: 保存しない）
+            history_size: 予測に使う実績の件数
+            prior_overhead_seconds: 実績がない場合の固定分（秒）
+            prior_seconds_per_audio_second: 実績がない場合の係数
+        """
+        self.path = Path(path) if path else None
+        self.history_size = history_size
+        self.prior_overhead = prior_overhead_seconds
+        self.prior_rate = prior_seconds_per_audio_second
+        self._history: List[Tuple[float, float]] = []
+        self._lock = threading.Lock()
+
+        if self.path and self.path.exists():
+            try:
+                with open(self.path, 'r', encoding='utf-8') as f:
+                    self._history = [tuple(item) for item in json.load(f)][-history_size:]
+            except (OSError, ValueError, TypeError) as e:
+                logger.warning(f"処理時間の実績を読み込めません: {e}")
+
+    def observe(self, audio_seconds: float, elapsed_seconds: float) -> None:
+        """
+        実績を記録
+
+        Args:
+            audio_seconds: 音声の長さ（秒）
+            elapsed_seconds: 所要時間（秒）
+        """
+        if audio_seconds <= 0 or elapsed_seconds <= 0:
+            return
+
+        with self._lock:
+            self._history.append((float(audio_seconds), float(elapsed_seconds)))
+            self._history = self._history[-self.history_size:]
+            history = list(self._history)
+
+        if self.path:
+            self._save(history)
+
+    def _save(self, history: List[Tuple[float, float]]) -> None:
+        """一時ファイルに書いてから置き換え（複数プロセスで共有可能）"""
+        try:
+            self.path.parent.mkdir(parents=True, exist_ok=True)
+            fd, tmp_path = tempfile.mkstemp(dir=self.path.parent, suffix=".tmp")
+            with os.fdopen(fd, 'w', encoding='utf-8') as f:
+                json.dump(history, f)
+            os.replace(tmp_path, self.path)
+        except OSError as e:
+            logger.warning(f"処理時間の実績を保存できません: {e}")
+
+    def predict(self, audio_seconds: float) -> float:
+        """
+        所要時間を予測
+
+        Args:
+            audio_seconds: 音声の長さ（秒）
+
+        Returns:
+            予測所要時間（秒）
+        """
+        with self._lock:
+            history = list(self._history)
+
+        if not history:
+            return self.prior_overhead + self.prior_rate * audio_seconds
+
+        durations = [d for d, _ in history]
+        elapsed = [e for _, e in history]
+        n = len(history)
+        mean_d = sum(durations) / n
+        var_d = sum((d - mean_d) ** 2 for d in durations) / n
+
+        if n >= 3 and var_d >= 1.0:
+            mean_e = sum(elapsed) / n
+            slope = sum((d - mean_d) * (e - mean_e) for d, e in history) / (var_d * n)
+            slope = max(slope, 0.0)
+            intercept = max(mean_e - slope * mean_d, 0.0)
+            return intercept + slope * audio_seconds
+
+        ratios = sorted(e / d for d, e in history)
+        return ratios[len(ratios) // 2] * audio_seconds
+
+    @property
+    def sample_count(self) -> int:
+        """記録済みの実績の件数"""
+        with self._lock:
+            return len(self._history)
+
+
+class PollSchedule:
+    """
+    1つのジョブのポーリング間隔
+
+    予測所要時間の lead_fraction 倍の時点までは確認せずに待ち、
+    以降は min_interval から backoff 倍ずつ max_interval まで間隔を広げる（±jitter の揺らぎ付き）。
+    予測がない場合は最初から短い間隔で確認する
+
+    Example:
+        >>> schedule = PollSchedule(predicted_seconds=60.0)
+        >>> delay = schedule.next_delay(elapsed_seconds=0.0)  # 約48秒
+        >>> delay = schedule.next_delay(elapsed_seconds=48.1)  # 約1秒
+    """
+
+    def __init__(
+        self,
+        predicted_seconds: Optional[float] = None,
+        lead_fraction: float = 0.8,
+        min_interval: float = 1.0,
+        max_interval: float = 5.0,
+        backoff: float = 1.5,
+        jitter: float = 0.2
+    ):
+        """
+        初期化
+
+        Args:
+            predicted_seconds: 予測所要時間（秒、None: 予測なし）
+            lead_fraction: 最初の確認までに待つ割合（予測所要時間に対する）
+            min_interval: 最短の間隔（秒）
+            max_interval: 最長の間隔（秒）
+            backoff: 間隔を広げる倍率
+            jitter: 間隔の揺らぎ（割合、多数のジョブの確認が同時刻に重ならないように）
+        """
+        self.predicted_seconds = predicted_seconds
+        self.lead_fraction = lead_fraction
+        self.min_interval = min_interval
+        self.max_interval = max_interval
+        self.backoff = backoff
+        self.jitter = jitter
+        self.poll_count = 0
+        self._interval = min_interval
+
+    def next_delay(self, elapsed_seconds: float) -> float:
+        """
+        次の確認までの待ち時間
+
+        Args:
+            elapsed_seconds: ジョブ開始からの経過時間（秒）
+
+        Returns:
+            待ち時間（秒）
+        """
+        self.poll_count += 1
+
+        if self.poll_count == 1 and self.predicted_seconds:
+            wait = self.predicted_seconds * self.lead_fraction - elapsed_seconds
+            if wait > self.min_interval:
+                return wait
+
+        delay = self._interval * random.uniform(1 - self.jitter, 1 + self.jitter)
+        self._interval = min(self._interval * self.backoff, self.max_interval)
+        return delay
+
+
+class PollPolicy:
+    """
+    予測モデルと設定から、ジョブごとのスケジュールと期限を作る
+
+    Example:
+        >>> policy = get_poll_policy("did")
+        >>> schedule, deadline = policy.plan(audio_seconds=45.0)
+    """
+
+    def __init__(
+        self,
+        model: RenderTimeModel,
+        fallback_timeout: float = 300.0,
+        deadline_factor: float = 3.0,
+        min_deadline: float = 120.0,
+        **schedule_options
+    ):
+        """
+        初期化
+
+        Args:
+            model: 処理時間の予測モデル
+            fallback_timeout: 音声の長さが不明な場合の期限（秒）
+            deadline_factor: 期限 = 予測所要時間 × deadline_factor
+            min_deadline: 期限の下限（秒）
+            **schedule_options: PollSchedule のオプション
+        """
+        self.model = model
+        self.fallback_timeout = fallback_timeout
+        self.deadline_factor = deadline_factor
+        self.min_deadline = min_deadline
+        self.schedule_options = schedule_options
+
+    def plan(self, audio_seconds: Optional[float] = None) -> Tuple[PollSchedule, float]:
+        """
+        ジョブのスケジュールと期限を作成
+
+        Args:
+            audio_seconds: 音声の長さ（秒、None: 不明）
+
+        Returns:
+            (schedule, deadline_seconds)
+        """
+        if not audio_seconds:
+            return (PollSchedule(None, **self.schedule_options), self.fallback_timeout)
+
+        predicted = self.model.predict(audio_seconds)
+        deadline = max(predicted * self.deadline_factor, self.min_deadline)
+        return (PollSchedule(predicted, **self.schedule_options), deadline)
+
+
+# 名前ごとのポリシー（プロセス内で共有し、実績を累積）
+_policies: Dict[str, PollPolicy] = {}
+_policies_lock = threading.Lock()
+
+
+def get_poll_policy(name: str) -> PollPolicy:
+    """
+    config.yaml の <name>.polling に従うポリシーを取得
+
+    実績は cache.dir/<name>_render_times.json に保存する
+
+    Args:
+        name: 設定のセクション名（例: "did"）
+
+    Returns:
+        PollPolicyインスタンス
+    """
+    with _policies_lock:
+        if name not in _policies:
+            config = get_config()
+            prefix = f"{name}.polling"
+            path = os.path.join(config.get("cache.dir", ".cache"), f"{name}_render_times.json")
+
+            model = RenderTimeModel(
+                path,
+                history_size=config.get(f"{prefix}.history_size", 50),
+                prior_overhead_seconds=config.get(f"{prefix}.prior_overhead_seconds", 15.0),
+                prior_seconds_per_audio_second=config.get(
+                    f"{prefix}.prior_seconds_per_audio_second", 1.0
+                )
+            )
+            _policies[name] = PollPolicy(
+                model,
+                fallback_timeout=config.get(f"{name}.poll_timeout_seconds", 300),
+                deadline_factor=config.get(f"{prefix}.deadline_factor", 3.0),
+                min_deadline=config.get(f"{prefix}.min_deadline_seconds", 120),
+                lead_fraction=config.get(f"{prefix}.lead_fraction", 0.8),
+                min_interval=config.get(f"{prefix}.min_interval_seconds", 1.0),
+                max_interval=config.get(f"{prefix}.max_interval_seconds", 5.0),
+                backoff=config.get(f"{prefix}.backoff", 1.5),
+                jitter=config.get(f"{prefix}.jitter", 0.2)
+            )
+
+        return _policies[name]
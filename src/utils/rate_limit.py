@@ -0,0 +1,111 @@
+"""
+レート制限
+
+機能:
+  - トークンバケット（非同期、一定レートで補充・バースト上限あり）
+  - 429 応答時の一時停止（Retry-After に従って全体の取得を止める）
+  - Retry-After ヘッダーの解釈
+"""
+
+import asyncio
+import time
+from datetime import datetime, timezone
+from email.utils import parsedate_to_datetime
+from typing import Optional
+
+from .logger import get_logger
+
+logger = get_logger(__name__)
+
+
+def parse_retry_after(value: Optional[str]) -> Optional[float]:
+    """
+    Retry-After ヘッダーを秒数に変換
+
+    Args:
+        value: ヘッダーの値（秒数、またはHTTP日付）
+
+    Returns:
+        秒数（ヘッダーなし・解釈できない場合はNone）
+    """
+    if not value:
+        return None
+
+    try:
+        return max(0.0, float(value))
+    except ValueError:
+        pass
+
+    try:
+        retry_at = parsedate_to_datetime(value)
+    except (TypeError, ValueError):
+        return None
+
+    return max(0.0, (retry_at - datetime.now(timezone.utc)).total_seconds())
+
+
+class TokenBucket:
+    """
+    トークンバケット（非同期）
+
+    rate_per_second でトークンを補充し、capacity まで貯める。
+    acquire() はトークンが1つ貯まるまで待つ（待っている呼び出しは到着順に処理）。
+    pause() を呼ぶと、指定時間が過ぎるまで全体の取得を止める
+
+    Example:
+        >>> bucket = TokenBucket(rate_per_second=0.5, capacity=5)
+        >>> await bucket.acquire()
+        >>> bucket.pause(10.0)  # 429 Retry-After: 10
+    """
+
+    def __init__(self, rate_per_second: float, capacity: float = 1.0):
+        """
+        初期化
+
+        Args:
+            rate_per_second: 1秒あたりの補充数
+            capacity: 貯められる上限（バースト）
+        """
+        self.rate = rate_per_second
+        self.capacity = max(capacity, 1.0)
+        self._tokens = self.capacity
+        self._updated = time.monotonic()
+        self._paused_until = 0.0
+        self._lock: Optional[asyncio.Lock] = None
+
+    def _refill(self) -> None:
+        """経過時間分のトークンを補充"""
+        now = time.monotonic()
+        self._tokens = min(self.capacity, self._tokens + (now - self._updated) * self.rate)
+        self._updated = now
+
+    async def acquire(self) -> None:
+        """トークンを1つ取得（なければ貯まるまで待つ）"""
+        if self._lock is None:
+            self._lock = asyncio.Lock()
+
+        async with self._lock:
+            while True:
+                now = time.monotonic()
+                if now < self._paused_until:
+                    await asyncio.sleep(self._paused_until - now)
+                    continue
+
+                self._refill()
+                if self._tokens >= 1.0:
+                    self._tokens -= 1.0
+                    return
+
+                await asyncio.sleep((1.0 - self._tokens) / self.rate)
+
+    def pause(self, seconds: float) -> None:
+        """
+        指定時間、取得を止める（貯まっていたトークンも捨てる）
+
+        Args:
+            seconds: 止める時間（秒）
+        """
+        self._paused_until = max(self._paused_until, time.monotonic() + seconds)
+        self._tokens = 0.0
+        self._updated = self._paused_until
+        logger.info(f"レート制限のため {seconds:.1f}秒 リクエストを停止")
@@ -5,7 +5,7 @@ Cartesiaの早口問題に対処するため、スクリプトを自動調整
 """
 
 import re
-from typing import Tuple
+from typing import Tuple, List
 
 
 def optimize_for_cartesia(script: str, mode: str = "moderate") -> str:
@@ -60,11 +60,12 @@ def _optimize_moderate(script: str) -> str:
             optimized_lines.append(line)
             continue
 
-        # 文を「。」で分割
-        sentences = line.split('。')
         optimized_sentences = []
 
-        for sentence in sentences:
+        for chunk in _sentence_chunks(line):
+            sentence = chunk.rstrip()
+            if sentence.endswith('。'):
+                sentence = sentence[:-1]
             if not sentence.strip():
                 continue
 
@@ -114,6 +115,72 @@ def _add_commas_to_long_sentence(sentence: str) -> str:
     return sentence
 
 
+# 1文（「。」または改行まで）と、その後の空白・改行
+_SENTENCE_CHUNK = re.compile(r"[^。\n]*。?\s*")
+
+
+def _sentence_chunks(script: str) -> List[str]:
+    """
+    スクリプトを文の境界で区切った断片（連結すると元のスクリプトに戻る）
+
+    各断片は文と、その後の空白・改行（間を取るための改行を含む）からなる
+    """
+    return [chunk for chunk in _SENTENCE_CHUNK.findall(script) if chunk]
+
+
+def split_sentences(script: str) -> List[str]:
+    """
+    スクリプトを文単位に分割
+
+    「。」と改行を文の境界とし、句点は各文の末尾に残す
+
+    Args:
+        script: スクリプト
+
+    Returns:
+        文のリスト（空の文は除く）
+
+    Example:
+        >>> split_sentences("こんにちは。今日は晴れです。")
+        ['こんにちは。', '今日は晴れです。']
+    """
+    sentences = [chunk.strip() for chunk in _sentence_chunks(script)]
+    return [sentence for sentence in sentences if sentence.rstrip('。')]
+
+
+def segment_script(script: str, max_chars: int = 200) -> List[str]:
+    """
+    スクリプトを文の境界でセグメントに分割
+
+    連続する文を max_chars 以内にまとめる（1文が max_chars を超える場合はその文単独）。
+    セグメント内の改行（間を取るための改行・空行）は元のまま残す
+
+    Args:
+        script: スクリプト
+        max_chars: 1セグメントの最大文字数
+
+    Returns:
+        セグメントのリスト
+
+    Example:
+        >>> segment_script("一文目。二文目。三文目。", max_chars=8)
+        ['一文目。二文目。', '三文目。']
+    """
+    segments = []
+    current = ""
+
+    for chunk in _sentence_chunks(script):
+        if current.strip() and len(current.rstrip()) + len(chunk.rstrip()) > max_chars:
+            segments.append(current.strip())
+            current = ""
+        current += chunk
+
+    if current.strip():
+        segments.append(current.strip())
+
+    return segments
+
+
 def compare_versions(original: str) -> Tuple[str, str, str]:
     """
     3つのバージョンを生成して比較
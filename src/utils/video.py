@@ -0,0 +1,78 @@
+"""
+動画ファイル処理ユーティリティ
+
+機能:
+  - 複数のMP4の連結（ffmpeg の concat demuxer、再エンコードなしのストリームコピー）
+
+同じアバター・同じ設定で生成した動画はコーデック・解像度が揃っているため、
+再エンコードせずに連結でき、処理時間はファイルのコピーとほぼ同じ
+"""
+
+import os
+import shutil
+import subprocess
+import tempfile
+from typing import List
+
+from .logger import get_logger
+from .errors import VideoCreationError
+
+logger = get_logger(__name__)
+
+
+def can_concat() -> bool:
+    """
+    動画を連結できるか（ffmpeg があるか）
+
+    Returns:
+        連結できればTrue
+    """
+    return shutil.which("ffmpeg") is not None
+
+
+def concat_videos(paths: List[str], output_path: str) -> str:
+    """
+    MP4ファイルを順に連結（ストリームコピー）
+
+    Args:
+        paths: 連結するファイル（同じコーデック・解像度）
+        output_path: 出力先
+
+    Returns:
+        出力先のパス
+
+    Raises:
+        VideoCreationError: ffmpeg がない・連結に失敗
+
+    Example:
+        >>> concat_videos(["/tmp/part0.mp4", "/tmp/part1.mp4"], "/tmp/video.mp4")
+    """
+    if not can_concat():
+        raise VideoCreationError("動画を連結できません（ffmpeg が必要）")
+
+    # concat demuxer の入力リスト（パスの ' はエスケープ）
+    fd, list_path = tempfile.mkstemp(suffix=".txt")
+    try:
+        with os.fdopen(fd, 'w', encoding='utf-8') as f:
+            for path in paths:
+                escaped = os.path.abspath(path).replace("'", "'\\''")
+                f.write(f"file '{escaped}'\n")
+
+        command = [
+            "ffmpeg", "-y", "-loglevel", "error",
+            "-f", "concat", "-safe", "0",
+            "-i", list_path,
+            "-c", "copy",
+            "-movflags", "+faststart",  # 先頭にインデックスを置き、ダウンロード中でも再生できるように
+            "-f", "mp4",
+            output_path
+        ]
+        result = subprocess.run(command, capture_output=True, text=True)
+        if result.returncode != 0:
+            raise VideoCreationError(f"動画の連結に失敗（ffmpeg）: {result.stderr.strip()}")
+
+    finally:
+        os.unlink(list_path)
+
+    logger.info(f"動画を連結: {len(paths)}個 → {os.path.getsize(output_path)}バイト")
+    return output_path
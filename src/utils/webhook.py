@@ -0,0 +1,238 @@
+"""
+Webhook受信
+
+機能:
+  - 共有イベントループ上で動く小さなHTTPサーバー（aiohttp）
+  - ジョブIDごとの Future を、コールバックの受信時に完了させる
+  - URLのトークンで第三者からのコールバックを拒否
+
+Future は concurrent.futures.Future のため、同期コードからは result(timeout)、
+非同期コードからは asyncio.wrap_future で待てる
+"""
+
+import secrets
+import threading
+import time
+from concurrent.futures import Future
+from typing import Any, Dict, Optional, Tuple
+
+from aiohttp import web
+
+from .logger import get_logger
+from .config import get_config
+from .event_loop import run_sync
+
+logger = get_logger(__name__)
+
+
+class WebhookReceiver:
+    """
+    Webhook受信サーバー
+
+    コールバックの本文（JSON）の id_field の値でジョブを特定する。
+    登録より先に届いたコールバックは一定時間保持し、登録時に即座に完了させる
+
+    Example:
+        >>> receiver = WebhookReceiver("https://example.com", port=8080)
+        >>> receiver.start()
+        >>> url = receiver.callback_url  # D-IDに渡すURL
+        >>> future = receiver.expect("tlk_xxxxx")
+        >>> data = future.result(timeout=300)
+    """
+
+    def __init__(
+        self,
+        public_url: str,
+        host: str = "0.0.0.0",
+        port: int = 8080,
+        path: str = "/webhook",
+        id_field: str = "id",
+        early_ttl_seconds: float = 600.0
+    ):
+        """
+        初期化
+
+        Args:
+            public_url: 外部から到達できるベースURL（例: "https://xxxx.ngrok.app"）
+            host: 待ち受けアドレス
+            port: 待ち受けポート（0: 空いているポート）
+            path: 受信するパス
+            id_field: ジョブIDが入っている本文のフィールド
+            early_ttl_seconds: 登録前に届いたコールバックを保持する時間（秒）
+        """
+        self.public_url = public_url.rstrip("/")
+        self.host = host
+        self.port = port
+        self.path = path
+        self.id_field = id_field
+        self.early_ttl = early_ttl_seconds
+        self.token = secrets.token_urlsafe(16)
+
+        self._futures: Dict[str, Future] = {}
+        self._early: Dict[str, Tuple[float, Any]] = {}
+        self._lock = threading.Lock()
+        self._runner: Optional[web.AppRunner] = None
+
+    @property
+    def callback_url(self) -> str:
+        """コールバック先のURL（トークン付き）"""
+        return f"{self.public_url}{self.path}?token={self.token}"
+
+    @property
+    def running(self) -> bool:
+        """サーバーが起動しているか"""
+        return self._runner is not None
+
+    def start(self) -> None:
+        """
+        共有イベントループ上でサーバーを起動（起動済みなら何もしない）
+
+        Raises:
+            OSError: ポートを開けない
+        """
+        if self._runner is None:
+            run_sync(self._start())
+
+    async def _start(self) -> None:
+        """サーバーを起動（共有イベントループ上で実行）"""
+        app = web.Application()
+        app.router.add_post(self.path, self._handle)
+
+        runner = web.AppRunner(app, access_log=None)
+        await runner.setup()
+        site = web.TCPSite(runner, self.host, self.port)
+        try:
+            await site.start()
+        except BaseException:
+            await runner.cleanup()
+            raise
+
+        # ポート0の場合は割り当てられたポートを記録
+        if runner.addresses:
+            self.port = runner.addresses[0][1]
+
+        self._runner = runner
+        logger.info(f"Webhook受信開始: {self.host}:{self.port}{self.path}")
+
+    def stop(self) -> None:
+        """サーバーを停止"""
+        if self._runner is not None:
+            run_sync(self._runner.cleanup())
+            self._runner = None
+
+    async def _handle(self, request: web.Request) -> web.Response:
+        """コールバックを受信し、対応する Future を完了させる"""
+        if request.query.get("token") != self.token:
+            logger.warning(f"Webhook: トークン不一致のため拒否 ({request.remote})")
+            return web.Response(status=403)
+
+        try:
+            data = await request.json()
+        except ValueError:
+            return web.Response(status=400)
+
+        job_id = data.get(self.id_field) if isinstance(data, dict) else None
+        if not job_id:
+            return web.Response(status=400)
+
+        logger.debug(f"Webhook受信: {job_id} status={data.get('status')}")
+
+        with self._lock:
+            future = self._futures.pop(job_id, None)
+            if future is None:
+                now = time.monotonic()
+                self._early = {
+                    key: value for key, value in self._early.items()
+                    if now - value[0] < self.early_ttl
+                }
+                self._early[job_id] = (now, data)
+
+        if future is not None and not future.done():
+            future.set_result(data)
+
+        return web.Response(status=200)
+
+    def expect(self, job_id: str) -> Future:
+        """
+        ジョブのコールバックを待つ Future を取得
+
+        Args:
+            job_id: ジョブID（D-IDのTalk ID）
+
+        Returns:
+            concurrent.futures.Future（結果はコールバックの本文）
+        """
+        with self._lock:
+            if job_id in self._futures:
+                return self._futures[job_id]
+
+            future: Future = Future()
+            early = self._early.pop(job_id, None)
+            if early is not None:
+                future.set_result(early[1])
+            else:
+                self._futures[job_id] = future
+
+        return future
+
+    def discard(self, job_id: str) -> None:
+        """
+        待つのをやめる（ポーリングに切り替えた場合など）
+
+        Args:
+            job_id: ジョブID
+        """
+        with self._lock:
+            future = self._futures.pop(job_id, None)
+        if future is not None:
+            future.cancel()
+
+
+# 名前ごとの受信サーバー（プロセス内で共有）
+_receivers: Dict[str, Optional[WebhookReceiver]] = {}
+_receivers_lock = threading.Lock()
+
+
+def get_webhook_receiver(name: str) -> Optional[WebhookReceiver]:
+    """
+    config.yaml の <name>.webhook に従う受信サーバーを取得（初回に起動）
+
+    Args:
+        name: 設定のセクション名（例: "did"）
+
+    Returns:
+        起動済みの WebhookReceiver（無効・起動できない場合はNone）
+    """
+    with _receivers_lock:
+        if name not in _receivers:
+            _receivers[name] = _create_receiver(name)
+        return _receivers[name]
+
+
+def _create_receiver(name: str) -> Optional[WebhookReceiver]:
+    """設定から受信サーバーを作成して起動"""
+    config = get_config()
+    prefix = f"{name}.webhook"
+
+    if not config.get(f"{prefix}.enabled", False):
+        return None
+
+    public_url = config.get(f"{prefix}.public_url")
+    if not public_url:
+        logger.warning(f"{prefix}.public_url が未設定のため、Webhookを使用しません")
+        return None
+
+    receiver = WebhookReceiver(
+        public_url,
+        host=config.get(f"{prefix}.host", "0.0.0.0"),
+        port=config.get(f"{prefix}.port", 8080),
+        path=config.get(f"{prefix}.path", f"/{name}/webhook")
+    )
+
+    try:
+        receiver.start()
+    except OSError as e:
+        logger.warning(f"Webhook受信サーバーを起動できません（ポーリングのみ使用）: {e}")
+        return None
+
+    return receiver
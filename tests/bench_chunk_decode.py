@@ -0,0 +1,109 @@
+"""
+chunkメッセージ デコード ベンチマーク
+
+Cartesiaのchunkメッセージ列（290秒・22.05kHz相当）を記録済みストリームとして再生し、
+受信処理1件あたりの時間を比較します。
+
+  - 旧方式: json.loads → base64.b64decode → 毎回f-stringでdebugログ
+  - 新方式: src.utils.codec（orjson / pybase64 があれば使用）、DEBUG時のみログ文字列作成
+
+APIキー不要（ネットワーク接続なし）
+"""
+
+import sys
+from pathlib import Path
+
+project_root = Path(__file__).parent.parent
+sys.path.insert(0, str(project_root))
+
+import base64
+import json
+import logging
+import os
+import time
+
+from src.utils.codec import loads_json, decode_base64, JSON_BACKEND, BASE64_BACKEND
+
+DURATION_SECONDS = 290
+SAMPLE_RATE = 22050
+CHUNK_BYTES = 4410  # 約0.1秒分
+REPEAT = 5
+
+logger = logging.getLogger("bench_chunk_decode")
+logger.setLevel(logging.INFO)
+
+
+def record_messages():
+    """Cartesiaのchunkメッセージ列を作成（受信時と同じJSON文字列）"""
+    messages = []
+    total_bytes = DURATION_SECONDS * SAMPLE_RATE * 2
+
+    for i in range(total_bytes // CHUNK_BYTES):
+        pcm = os.urandom(CHUNK_BYTES)
+        messages.append(json.dumps({
+            "type": "chunk",
+            "context_id": f"bench-{i % 4}",
+            "data": base64.b64encode(pcm).decode(),
+            "done": False,
+            "status_code": 206,
+            "step_time": 12.3
+        }))
+
+    return messages
+
+
+def decode_baseline(messages):
+    """旧方式"""
+    total = 0
+    for message in messages:
+        data = json.loads(message)
+        if data.get("type") == "chunk":
+            audio_data = base64.b64decode(data["data"])
+            total += len(audio_data)
+            logger.debug(f"音声チャンク受信: {len(audio_data)}バイト")
+    return total
+
+
+def decode_fast(messages):
+    """新方式"""
+    total = 0
+    debug = logger.isEnabledFor(logging.DEBUG)
+    for message in messages:
+        data = loads_json(message)
+        if data.get("type") == "chunk":
+            audio_data = decode_base64(data["data"])
+            total += len(audio_data)
+            if debug:
+                logger.debug(f"音声チャンク受信: {len(audio_data)}バイト")
+    return total
+
+
+def measure(name, func, messages):
+    """REPEAT回実行して最速値を表示"""
+    best = float("inf")
+    for _ in range(REPEAT):
+        start_time = time.perf_counter()
+        total = func(messages)
+        best = min(best, time.perf_counter() - start_time)
+
+    per_chunk = best / len(messages) * 1e6
+    print(f"{name}: {best * 1000:.1f}ms（{per_chunk:.1f}μs/件, {total}バイト）")
+    return best
+
+
+if __name__ == "__main__":
+    print("=" * 60)
+    print("chunkメッセージ デコード ベンチマーク")
+    print("=" * 60)
+    print(f"バックエンド: JSON={JSON_BACKEND}, Base64={BASE64_BACKEND}")
+    print()
+
+    messages = record_messages()
+    print(f"メッセージ数: {len(messages)}件")
+    print()
+
+    before = measure("旧方式", decode_baseline, messages)
+    after = measure("新方式", decode_fast, messages)
+
+    print()
+    print(f"高速化: {before / after:.2f}倍")
@@ -0,0 +1,109 @@
+"""
+PCMシンク メモリベンチマーク
+
+Cartesiaのchunkメッセージ列（290秒・44.1kHz相当）を再生し、
+tracemallocでピークメモリを比較します。
+
+  - 旧方式: チャンクをリストに溜めて b"".join → WAV書き込み
+  - 新方式: PCMWavSinkで受信しながらWAVに書き込み
+
+APIキー不要（ネットワーク接続なし）
+"""
+
+import sys
+from pathlib import Path
+
+project_root = Path(__file__).parent.parent
+sys.path.insert(0, str(project_root))
+
+import base64
+import json
+import os
+import tempfile
+import time
+import tracemalloc
+import wave
+
+from src.utils.audio import PCMWavSink
+
+DURATION_SECONDS = 290
+SAMPLE_RATE = 44100
+CHUNK_BYTES = 8820  # 約0.1秒分
+
+
+def recorded_messages():
+    """
+    Cartesiaのchunkメッセージ列を生成（1件ずつ、ジェネレーター）
+    """
+    total_bytes = DURATION_SECONDS * SAMPLE_RATE * 2
+    pcm = os.urandom(CHUNK_BYTES)
+    encoded = base64.b64encode(pcm).decode()
+
+    for _ in range(total_bytes // CHUNK_BYTES):
+        yield json.dumps({"type": "chunk", "context_id": "bench", "data": encoded})
+
+    yield json.dumps({"type": "done", "context_id": "bench"})
+
+
+def receive_join(path: str) -> int:
+    """旧方式: 全チャンクを保持して結合してから書き込み"""
+    audio_chunks = []
+
+    for message in recorded_messages():
+        data = json.loads(message)
+        if data.get("type") == "chunk":
+            audio_chunks.append(base64.b64decode(data["data"]))
+
+    audio_bytes = b"".join(audio_chunks)
+
+    with wave.open(path, 'wb') as wav_file:
+        wav_file.setnchannels(1)
+        wav_file.setsampwidth(2)
+        wav_file.setframerate(SAMPLE_RATE)
+        wav_file.writeframes(audio_bytes)
+
+    return len(audio_bytes)
+
+
+def receive_sink(path: str) -> int:
+    """新方式: 受信しながらWAVに書き込み"""
+    with PCMWavSink(path, sample_rate=SAMPLE_RATE) as sink:
+        for message in recorded_messages():
+            data = json.loads(message)
+            if data.get("type") == "chunk":
+                sink.write(base64.b64decode(data["data"]))
+
+    return sink.byte_count
+
+
+def measure(name, func):
+    """ピークメモリと処理時間を測定"""
+    fd, path = tempfile.mkstemp(suffix=".wav")
+    os.close(fd)
+
+    try:
+        tracemalloc.start()
+        start_time = time.perf_counter()
+        byte_count = func(path)
+        elapsed = time.perf_counter() - start_time
+        _, peak = tracemalloc.get_traced_memory()
+        tracemalloc.stop()
+
+        print(f"{name}: ピーク {peak / 1024 / 1024:.1f}MB / {elapsed:.2f}秒 / {byte_count}バイト")
+        return peak
+
+    finally:
+        os.unlink(path)
+
+
+if __name__ == "__main__":
+    print("=" * 60)
+    print(f"PCMシンク メモリベンチマーク（{DURATION_SECONDS}秒 / {SAMPLE_RATE}Hz）")
+    print("=" * 60)
+    print()
+
+    before = measure("旧方式（join）", receive_join)
+    after = measure("新方式（sink）", receive_sink)
+
+    print()
+    print(f"ピークメモリ削減: {before / max(after, 1):.0f}倍")
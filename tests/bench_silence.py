@@ -0,0 +1,81 @@
+"""
+無音圧縮 ベンチマーク
+
+300秒・22.05kHzの音声（発話3秒 + 無音1.2秒の繰り返し、前後に無音）を作成し、
+compact_silence の処理時間と短縮した時間を表示します。
+
+APIキー不要（ネットワーク接続なし）
+"""
+
+import sys
+from pathlib import Path
+
+project_root = Path(__file__).parent.parent
+sys.path.insert(0, str(project_root))
+
+import os
+import tempfile
+import time
+import wave
+
+import numpy as np
+
+from src.utils.audio import compact_silence
+
+DURATION_SECONDS = 300
+SAMPLE_RATE = 22050
+SPEECH_SECONDS = 3.0
+PAUSE_SECONDS = 1.2
+EDGE_SECONDS = 1.0
+MAX_PAUSE_MS = 500
+
+
+def make_audio() -> np.ndarray:
+    """発話（振幅変調したノイズ）と無音（微小ノイズ）を並べた16bit PCMを作成"""
+    rng = np.random.default_rng(0)
+
+    def speech(seconds):
+        n = int(SAMPLE_RATE * seconds)
+        envelope = 0.5 + 0.5 * np.sin(np.linspace(0, 20 * np.pi, n))
+        return rng.normal(0, 6000, n) * envelope
+
+    def silence(seconds):
+        return rng.normal(0, 20, int(SAMPLE_RATE * seconds))
+
+    parts = [silence(EDGE_SECONDS)]
+    while sum(len(p) for p in parts) < (DURATION_SECONDS - EDGE_SECONDS) * SAMPLE_RATE:
+        parts += [speech(SPEECH_SECONDS), silence(PAUSE_SECONDS)]
+    parts.append(silence(EDGE_SECONDS))
+
+    return np.clip(np.concatenate(parts), -32768, 32767).astype("<i2")
+
+
+if __name__ == "__main__":
+    print("=" * 60)
+    print(f"無音圧縮 ベンチマーク（{DURATION_SECONDS}秒 / {SAMPLE_RATE}Hz）")
+    print("=" * 60)
+    print()
+
+    samples = make_audio()
+    fd, path = tempfile.mkstemp(suffix=".wav")
+    os.close(fd)
+
+    try:
+        with wave.open(path, 'wb') as wav_file:
+            wav_file.setnchannels(1)
+            wav_file.setsampwidth(2)
+            wav_file.setframerate(SAMPLE_RATE)
+            wav_file.writeframes(samples.tobytes())
+
+        input_seconds = len(samples) / SAMPLE_RATE
+
+        start_time = time.perf_counter()
+        frame_count, removed = compact_silence(path, max_pause_ms=MAX_PAUSE_MS)
+        elapsed = time.perf_counter() - start_time
+
+        print(f"入力: {input_seconds:.1f}秒")
+        print(f"出力: {frame_count / SAMPLE_RATE:.1f}秒（{removed:.1f}秒短縮）")
+        print(f"処理時間: {elapsed * 1000:.1f}ms（実時間の{input_seconds / elapsed:.0f}倍速）")
+
+    finally:
+        os.unlink(path)
@@ -0,0 +1,179 @@
+"""
+音声アップロード先（audio_host）テストスクリプト（ローカルスタブ）
+
+Cartesiaの代わりにローカルのWebSocketスタブを起動し、
+アップロード先に StubAudioHost を使って、以下を確認します。
+
+  1. CartesiaClient.generate: 生成した音声がアップロード先に届き、URLが返る
+  2. 同じテキストの再生成: キャッシュから返り、アップロードしない
+  3. アップロード先の変更: キャッシュの音声を新しいアップロード先にだけアップロードし直す
+  4. CartesiaClient.generate_parts: 分割した部分ごとにアップロードされる
+  5. 期限付きURL: 期限が近いキャッシュのURLは再利用せず、アップロードし直す
+
+APIキー不要（ネットワーク接続なし）
+"""
+
+import sys
+from pathlib import Path
+
+project_root = Path(__file__).parent.parent
+sys.path.insert(0, str(project_root))
+
+import asyncio
+import base64
+import json
+import tempfile
+
+import websockets
+
+from src.modules.cartesia import CartesiaClient
+from src.utils.audio_host import StubAudioHost
+from src.utils.cache import DiskCache
+
+# 1文字あたりの音声の長さ（秒）
+SECONDS_PER_CHAR = 0.05
+
+
+async def stub_cartesia(websocket):
+    """
+    Cartesia WebSocket APIのスタブ
+
+    リクエストごとに、文字数に比例した長さの Raw PCM（16bit）を
+    チャンクに分けて返し、最後に done を送る
+    """
+    async def serve(message):
+        context_id = message["context_id"]
+        sample_rate = message["output_format"]["sample_rate"]
+        frames = int(len(message["transcript"]) * SECONDS_PER_CHAR * sample_rate)
+
+        # 無音ではない波形（無音の圧縮・ラウドネス正規化で消えないように）
+        pcm = (b"\x00\x10\x00\xf0" * (frames // 2 + 1))[:frames * 2]
+
+        for offset in range(0, len(pcm), 8192):
+            await websocket.send(json.dumps({
+                "type": "chunk",
+                "context_id": context_id,
+                "data": base64.b64encode(pcm[offset:offset + 8192]).decode()
+            }))
+        await websocket.send(json.dumps({"type": "done", "context_id": context_id}))
+
+    tasks = []
+    try:
+        async for raw in websocket:
+            message = json.loads(raw)
+            if message.get("cancel"):
+                continue
+            tasks.append(asyncio.ensure_future(serve(message)))
+    except websockets.exceptions.ConnectionClosed:
+        pass
+
+
+def check(name, ok, detail=""):
+    print(f"{'✅' if ok else '❌'} {name} {detail}")
+    return ok
+
+
+async def run():
+    server = await websockets.serve(stub_cartesia, "127.0.0.1", 0)
+    port = server.sockets[0].getsockname()[1]
+
+    host = StubAudioHost()
+    client = CartesiaClient(api_key="stub", voice_id="stub", audio_host=host)
+    client.pool.uri = f"ws://127.0.0.1:{port}"
+
+    # 実際のキャッシュを汚さないよう、一時ディレクトリのキャッシュを使う
+    cache_dir = tempfile.mkdtemp(prefix="audio_host_stub_")
+    client.cache = DiskCache(cache_dir, max_bytes=None)
+
+    text = "これはアップロード先のテストです。ネットワークには接続しません。"
+    results = []
+
+    # 1. 生成してアップロード
+    audio, err = await client.generate(text)
+    results.append(check(
+        "generate: スタブにアップロード",
+        audio is not None
+        and str(audio.audio_url) in host.files
+        and audio.audio_host == "stub",
+        f"(err={err}, {audio.duration_seconds if audio else 0:.2f}秒)"
+    ))
+
+    # 2. 同じテキストはキャッシュから（アップロードしない）
+    uploads = len(host.files)
+    cached, err = await client.generate(text)
+    results.append(check(
+        "generate: キャッシュヒット",
+        cached is not None
+        and cached.stats.cache_hit
+        and cached.audio_url == audio.audio_url
+        and len(host.files) == uploads,
+        f"(err={err})"
+    ))
+
+    # 3. アップロード先を変えると、キャッシュの音声だけアップロードし直す
+    other = StubAudioHost("https://other.invalid/audio")
+    other.name = "other"
+    client.audio_host = other
+    rehosted, err = await client.generate(text)
+    results.append(check(
+        "generate: アップロード先の変更",
+        rehosted is not None
+        and rehosted.stats.cache_hit
+        and str(rehosted.audio_url) in other.files
+        and other.files[str(rehosted.audio_url)] == host.files[str(audio.audio_url)],
+        f"(err={err}, {rehosted.audio_url if rehosted else None})"
+    ))
+
+    # 4. 分割生成は部分ごとにアップロード
+    client.audio_host = host
+    long_text = "".join(f"これは{i}番目の文です。" for i in range(12))
+    uploads = len(host.files)
+    parts, err = await client.generate_parts(long_text, max_part_seconds=3.0)
+    results.append(check(
+        "generate_parts: 部分ごとにアップロード",
+        parts is not None
+        and len(parts) > 1
+        and all(str(part.audio_url) in host.files for part in parts)
+        and len(host.files) == uploads + len(parts),
+        f"(err={err}, {len(parts) if parts else 0}個)"
+    ))
+
+    # 5. 期限付きURL（有効期間が再利用に必要な残り時間より短い）はアップロードし直す
+    expiring = StubAudioHost("https://expiring.invalid/audio")
+    expiring.url_lifetime = 60
+    client.audio_host = expiring
+    expiring_text = "これは期限付きのURLのテストです。"
+    first, err = await client.generate(expiring_text)
+    expiring.files.clear()
+    renewed, err = await client.generate(expiring_text)
+    results.append(check(
+        "generate: 期限付きURLの再アップロード",
+        first is not None
+        and first.audio_url_expires_at is not None
+        and renewed is not None
+        and renewed.stats.cache_hit
+        and str(renewed.audio_url) in expiring.files
+        and renewed.audio_url_expires_at >= first.audio_url_expires_at,
+        f"(err={err})"
+    ))
+
+    server.close()
+    await server.wait_closed()
+    return results
+
+
+def main():
+    print("=" * 60)
+    print("音声アップロード先テスト（ローカルスタブ）")
+    print("=" * 60)
+    print()
+
+    results = asyncio.run(run())
+
+    print()
+    print(f"結果: {sum(results)}/{len(results)} 成功")
+    return all(results)
+
+
+if __name__ == "__main__":
+    sys.exit(0 if main() else 1)
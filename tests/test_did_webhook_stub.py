@@ -0,0 +1,234 @@
+"""
+D-ID Webhookモード テストスクリプト（ローカルスタブ）
+
+D-IDの代わりにローカルのスタブサーバーを起動し、Talkの完了時に
+Webhookでコールバックさせて、以下を確認します。
+
+  1. DIDClient: Webhookで完了を受け取り、ポーリングしない
+  2. AsyncDIDClient: 複数のTalkを同時に待ち、ポーリングしない
+  3. コールバックが届かない場合、ポーリングに切り替えて完了する
+  4. 同じ音声・アバターの再生成: 保存済みの動画を返し、Talkを作成しない
+
+APIキー不要（ネットワーク接続なし）
+"""
+
+import sys
+from pathlib import Path
+
+project_root = Path(__file__).parent.parent
+sys.path.insert(0, str(project_root))
+
+import asyncio
+import hashlib
+import itertools
+import json
+import os
+import tempfile
+import threading
+import time
+import urllib.request
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+from src.modules.did import DIDClient, AsyncDIDClient
+from src.utils.cache import DiskCache
+from src.utils.dedup import ResultCache
+from src.utils.webhook import WebhookReceiver
+
+RENDER_SECONDS = 0.5
+
+# result_url で返す動画の内容（完了時のダウンロード用）
+VIDEO_BYTES = b"\x00\x00\x00\x18ftypmp42" + bytes(1024)
+
+
+class StubDID:
+    """
+    D-ID APIのスタブ
+
+    POST /talks でTalkを作成し、RENDER_SECONDS 後に完了させる。
+    send_callbacks が True なら、完了時にリクエストの webhook へPOSTする。
+    GET /videos/<talk_id>.mp4 は result_url の動画を返す
+    """
+
+    def __init__(self):
+        self.talks = {}
+        self.create_requests = 0
+        self.status_requests = 0
+        self.send_callbacks = True
+        self._ids = itertools.count(1)
+
+        stub = self
+
+        class Handler(BaseHTTPRequestHandler):
+            protocol_version = "HTTP/1.1"
+
+            def log_message(self, *args):
+                pass
+
+            def _send(self, code, body):
+                data = json.dumps(body).encode()
+                self.send_response(code)
+                self.send_header("Content-Type", "application/json")
+                self.send_header("Content-Length", str(len(data)))
+                self.end_headers()
+                self.wfile.write(data)
+
+            def do_POST(self):
+                length = int(self.headers.get("Content-Length", 0))
+                payload = json.loads(self.rfile.read(length))
+                stub.create_requests += 1
+                talk_id = f"tlk_stub_{next(stub._ids)}"
+                stub.talks[talk_id] = time.time() + RENDER_SECONDS
+
+                if payload.get("webhook") and stub.send_callbacks:
+                    threading.Thread(
+                        target=stub._callback,
+                        args=(payload["webhook"], talk_id),
+                        daemon=True
+                    ).start()
+
+                self._send(201, {"id": talk_id, "status": "created"})
+
+            def do_GET(self):
+                if self.path.startswith("/videos/"):
+                    # 完成した動画のダウンロード（ポーリングとは数えない）
+                    self.send_response(200)
+                    self.send_header("Content-Type", "video/mp4")
+                    self.send_header("Content-Length", str(len(VIDEO_BYTES)))
+                    self.end_headers()
+                    self.wfile.write(VIDEO_BYTES)
+                    return
+
+                stub.status_requests += 1
+                talk_id = self.path.rsplit("/", 1)[-1]
+                self._send(200, stub._status(talk_id))
+
+        self.server = ThreadingHTTPServer(("127.0.0.1", 0), Handler)
+        self.url = f"http://127.0.0.1:{self.server.server_address[1]}"
+        threading.Thread(target=self.server.serve_forever, daemon=True).start()
+
+    def _status(self, talk_id):
+        if time.time() < self.talks[talk_id]:
+            return {"id": talk_id, "status": "started"}
+        return {
+            "id": talk_id,
+            "status": "done",
+            "result_url": f"{self.url}/videos/{talk_id}.mp4",
+            "duration": 3.0
+        }
+
+    def _callback(self, webhook_url, talk_id):
+        time.sleep(RENDER_SECONDS)
+        request = urllib.request.Request(
+            webhook_url,
+            data=json.dumps(self._status(talk_id)).encode(),
+            headers={"Content-Type": "application/json"}
+        )
+        urllib.request.urlopen(request, timeout=5)
+
+
+def media_url(name, ext):
+    """
+    音声・画像のURL（パスに内容ハッシュを含むため、重複排除のキーの計算でダウンロードしない）
+    """
+    return f"https://stub.invalid/{hashlib.sha256(name.encode()).hexdigest()}{ext}"
+
+
+def setup_client(client, stub, receiver, caches):
+    """クライアントをスタブとWebhook受信サーバー、一時ディレクトリのキャッシュに向ける"""
+    client.renders, client.video_cache = caches
+    client.base_url = stub.url
+    client.webhook = receiver
+    client.webhook_min_wait = 2.0
+    client.poll_policy.schedule_options.update(min_interval=0.1, max_interval=0.5)
+    client.poll_policy.model.path = None  # スタブの所要時間を実績として保存しない
+    return client
+
+
+def check(name, ok, detail=""):
+    print(f"{'✅' if ok else '❌'} {name} {detail}")
+    return ok
+
+
+def main():
+    print("=" * 60)
+    print("D-ID Webhookモード テスト（ローカルスタブ）")
+    print("=" * 60)
+    print()
+
+    stub = StubDID()
+    receiver = WebhookReceiver("http://127.0.0.1", host="127.0.0.1", port=0, path="/did/webhook")
+    receiver.start()
+    receiver.public_url = f"http://127.0.0.1:{receiver.port}"
+
+    # 実際のキャッシュ（cache.renders / cache.videos）を汚さないよう、一時ディレクトリを使う
+    cache_dir = tempfile.TemporaryDirectory(prefix="did_webhook_stub_")
+    caches = (
+        ResultCache(DiskCache(os.path.join(cache_dir.name, "renders"), max_bytes=None)),
+        DiskCache(os.path.join(cache_dir.name, "videos"), max_bytes=None)
+    )
+    avatar_url = media_url("avatar", ".jpg")
+
+    results = []
+
+    # 1. 同期クライアント
+    client = setup_client(DIDClient(api_key="stub"), stub, receiver, caches)
+    before = stub.status_requests
+    video, err = client.generate(media_url("a", ".mp3"), avatar_url, 5.0)
+    results.append(check(
+        "DIDClient: Webhookで完了",
+        video is not None and stub.status_requests == before,
+        f"(err={err}, ポーリング {stub.status_requests - before}回)"
+    ))
+
+    # 2. 非同期クライアント（10件同時）
+    async def run_async():
+        client = setup_client(AsyncDIDClient(api_key="stub"), stub, receiver, caches)
+        return await asyncio.gather(*[
+            client.generate(media_url(str(i), ".mp3"), avatar_url, 5.0)
+            for i in range(10)
+        ])
+
+    before = stub.status_requests
+    start_time = time.time()
+    outcomes = asyncio.run(run_async())
+    elapsed = time.time() - start_time
+    results.append(check(
+        "AsyncDIDClient: 10件同時にWebhookで完了",
+        all(video for video, _ in outcomes) and stub.status_requests == before,
+        f"({elapsed:.1f}秒, ポーリング {stub.status_requests - before}回)"
+    ))
+
+    # 3. コールバックが届かない場合
+    stub.send_callbacks = False
+    client = setup_client(DIDClient(api_key="stub"), stub, receiver, caches)
+    before = stub.status_requests
+    video, err = client.generate(media_url("b", ".mp3"), avatar_url, 5.0)
+    results.append(check(
+        "コールバックなし: ポーリングで完了",
+        video is not None and stub.status_requests > before,
+        f"(err={err}, ポーリング {stub.status_requests - before}回)"
+    ))
+
+    # 4. 同じ音声・アバターは保存済みの動画を返す（Talkを作成しない）
+    client = setup_client(DIDClient(api_key="stub"), stub, receiver, caches)
+    before = stub.create_requests
+    video, err = client.generate(media_url("a", ".mp3"), avatar_url, 5.0)
+    results.append(check(
+        "重複排除: 同じ音声・アバターはTalkを作成しない",
+        video is not None
+        and video.video_path is not None
+        and stub.create_requests == before,
+        f"(err={err}, Talk作成 {stub.create_requests - before}回)"
+    ))
+
+    receiver.stop()
+    stub.server.shutdown()
+    cache_dir.cleanup()
+
+    print()
+    print(f"結果: {sum(results)}/{len(results)} 成功")
+    return all(results)
+
+
+if __name__ == "__main__":
+    sys.exit(0 if main() else 1)
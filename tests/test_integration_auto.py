@@ -10,7 +10,6 @@ from pathlib import Path
 project_root = Path(__file__).parent
 sys.path.insert(0, str(project_root))
 
-import asyncio
 import time
 import toml
 import cloudinary
@@ -18,6 +17,7 @@ import cloudinary.uploader
 
 from src.modules.cartesia import CartesiaClient
 from src.modules.did import DIDClient
+from src.utils.event_loop import run_sync
 
 
 async def run_test():
@@ -142,7 +142,7 @@ async def run_test():
 
 if __name__ == "__main__":
     try:
-        asyncio.run(run_test())
+        run_sync(run_test())
     except KeyboardInterrupt:
         print("\n\n中断されました")
     except Exception as e: